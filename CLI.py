@@ -1,66 +1,163 @@
 # Import libraries
 import argparse  # Handles parsing command-line arguments
-from cleaner.core import clean_data  # Main data-cleaning logic
+import glob
+import os
+import sys
+import time
 from cleaner.logger import setup_logger  # Logging system
-import pandas as pd
-import numpy as np
 
 
 def main():
     parser = argparse.ArgumentParser(description="Clean messy CSV files.")
 
-    parser.add_argument('--input', required=True, help='Path to input CSV file')
-    parser.add_argument('--output', help='Path to output CSV file')  # no longer required
+    parser.add_argument('--input', nargs='+',
+                        help='Input CSV file(s); directories and globs like "data/*.csv" start a batch run')
+    parser.add_argument('--output', help='Path to output CSV file (output directory in batch runs)')
     parser.add_argument('--log', default='logs/clean_run.log', help='Log file path')
     parser.add_argument('--fill-missing', choices=['mean', 'median', 'mode'], default='mean')
     parser.add_argument('--normalize', choices=['zscore', 'minmax'], default=None)
     parser.add_argument('--remove-outliers', choices=['zscore', 'iqr'], default=None)
-    parser.add_argument('--profile', action='store_true', help='Show a summary of the input dataset')
+    parser.add_argument('--profile', action='store_true',
+                        help='Show a summary of the input dataset (one streaming pass, in --chunksize chunks)')
+    parser.add_argument('--profile-json', help='With --profile, also save the summary to this JSON file')
+    parser.add_argument('--sample-rows', type=int, default=None,
+                        help='With --profile, estimate the summary from the first N rows only')
     parser.add_argument('--encode-categoricals', choices=['label', 'onehot'], help='Encode categorical columns using "label" or "onehot"')
     parser.add_argument('--drop-duplicates', action='store_true', help='Remove duplicate rows from the dataset')
     parser.add_argument('--duplicate-cols', help='Comma-separated column names to check for duplicates (default: all columns)')
+    parser.add_argument('--duplicates-output', help='Save the rows dropped as duplicates to this file')
+    parser.add_argument('--dedup-memory', type=float, default=None,
+                        help='MB of row hashes kept in memory by --stream dedup before spilling to disk (default: 256)')
     parser.add_argument('--strip-whitespace', action='store_true', help='Strip whitespace from string columns')
+    parser.add_argument('--casefold', action='store_true',
+                        help='With --strip-whitespace, also case-fold text ("Straße" and "STRASSE" become "strasse")')
+    parser.add_argument('--unicode-normalize', choices=['NFC', 'NFKC', 'NFD', 'NFKD'], default=None,
+                        help='With --strip-whitespace, also normalize text to this Unicode form')
     parser.add_argument('--validate-cols', action='store_true', help='Check for common column issues')
     parser.add_argument('--report', help='Path to write a Markdown report with dataset summary')
+    parser.add_argument('--bundle', metavar='PATH',
+                        help='Also pack the output, report and log into this .zip (CSV output is compressed while '
+                             'it is written) or .tar.zst archive (needs zstandard)')
     parser.add_argument('--normalize-cols', type=str,
                         help='Comma-separated list of numeric columns to normalize (overrides auto)')
     parser.add_argument('--encode-cols', type=str,
                         help='Comma-separated list of categorical columns to encode (overrides auto)')
+    parser.add_argument('--max-categories', type=int, default=None,
+                        help='One-hot: keep the N-1 most frequent levels per column; the rest go to <col>_other')
+    parser.add_argument('--onehot-sparse', action='store_true',
+                        help='One-hot: keep the dummy columns sparse in memory (densified for Parquet/Feather)')
     parser.add_argument('--outlier-cols', type=str, default=None,
                         help='Columns to apply outlier removal to, comma-separated')
+    parser.add_argument('--stream', action='store_true',
+                        help='Read and write the file in chunks instead of loading it into memory')
+    parser.add_argument('--chunksize', type=int, default=100_000,
+                        help='Rows per chunk in --stream mode (default: 100000). Exact medians, modes and '
+                             'quartiles spill distinct values to temp files past 32 MB per column')
+    parser.add_argument('--approximate', action='store_true',
+                        help='In --stream mode, estimate medians, IQR quartiles and distinct counts with '
+                             'fixed-size sketches instead of exact value counts')
+    parser.add_argument('--sketch-size', type=int, default=None,
+                        help='KLL quantile sketch size k for --approximate (default: 200, ~1.3%% rank error)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only clean rows appended to a growing CSV since the last run and append them to '
+                             'the output (state in <output>.state; streams with --chunksize)')
+    parser.add_argument('--state', help='Directory for the --incremental state (default: <output>.state)')
+    parser.add_argument('--fit-plan', help='Save the fitted cleaning statistics to this JSON plan')
+    parser.add_argument('--apply-plan',
+                        help='Clean with a saved JSON plan instead of fitting (cleaning options come from the plan)')
+    parser.add_argument('--input-format', choices=['csv', 'parquet', 'feather', 'arrow'],
+                        help='Input format (default: inferred from the extension; .gz/.zst CSV supported)')
+    parser.add_argument('--output-format', choices=['csv', 'parquet', 'feather', 'arrow'],
+                        help='Output format (default: inferred from the extension)')
+    parser.add_argument('--columns', type=str,
+                        help='Comma-separated list of columns to load (others are never read)')
+    parser.add_argument('--schema', metavar='FILE',
+                        help='JSON schema of the expected columns and dtypes: checked before loading, then used '
+                             'to read only those columns in those dtypes')
+    parser.add_argument('--optimize-dtypes', action='store_true',
+                        help='Load with the narrowest numeric dtypes and category for low-cardinality text')
+    parser.add_argument('--arrow-strings', action='store_true',
+                        help='With dtype optimization, store other text columns as Arrow strings (needs pyarrow)')
+    parser.add_argument('--metrics-json', help='Save per-stage timing and memory metrics to this JSON file')
+    parser.add_argument('--trace-memory', action='store_true',
+                        help='Also record the tracemalloc peak of each stage (slower)')
+    parser.add_argument('--profile-stages', metavar='DIR',
+                        help='Write one cProfile file per stage (<stage>.prof) to this directory')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Clean files in parallel with this many processes (batch runs)')
+    parser.add_argument('--in-place', action='store_true',
+                        help='Fill, scale and filter numeric columns inside their own arrays to cut peak memory')
+    parser.add_argument('--memmap', metavar='DIR',
+                        help='Keep float columns in a memory-mapped file in DIR (implies --in-place; in-memory runs)')
+    parser.add_argument('--threads', type=int, default=None,
+                        help='Run the per-column work of each cleaning stage on this many threads')
+    parser.add_argument('--template', metavar='NAME',
+                        help='Take the cleaning steps from this templates.json preset (overrides the step options)')
+    parser.add_argument('--explain', action='store_true',
+                        help='Print the optimized cleaning plan and exit without cleaning')
+    parser.add_argument('--serve', action='store_true',
+                        help='Run a local cleaning service with --workers warm processes (no --input needed)')
+    parser.add_argument('--submit', action='store_true',
+                        help='Hand the run to a running --serve service and follow its progress')
+    parser.add_argument('--service', metavar='ADDR', default=None,
+                        help='Service address: HOST:PORT on this machine or a Unix socket path '
+                             '(default: 127.0.0.1:8765)')
+    parser.add_argument('--queue-size', type=int, default=None,
+                        help='With --serve, jobs waiting beyond the running ones before submits are refused '
+                             '(default: 32)')
 
     args = parser.parse_args()
     logger = setup_logger(args.log)
 
+    # 🛰 Service: keep warm workers and take jobs from --submit and the GUI
+    if args.serve:
+        from cleaner.service import ADDRESS, QUEUE_SIZE, parse_address, run_service
+
+        if args.workers is not None and args.workers < 1:
+            parser.error("--workers must be at least 1")
+        if args.queue_size is not None and args.queue_size < 0:
+            parser.error("--queue-size cannot be negative")
+        try:
+            run_service(parse_address(args.service or ADDRESS), args.workers,
+                        QUEUE_SIZE if args.queue_size is None else args.queue_size, logger)
+        except (OSError, ValueError) as e:
+            parser.error(f"Cannot start the service: {e}")
+        return
+
+    if not args.input:
+        parser.error("--input is required unless using --serve")
+    batch = (args.workers is not None or len(args.input) > 1
+             or any(os.path.isdir(path) or glob.has_magic(path) for path in args.input))
+
     # ✅ Bypass output requirement for --profile
     if args.profile:
-        df = pd.read_csv(args.input)
-        logger.info(f"Dataset shape: {df.shape}")
-        logger.info("\nColumn types:\n" + str(df.dtypes))
-        logger.info("\nNull values per column:\n" + str(df.isnull().sum()))
-
-        numeric_cols = df.select_dtypes(include=np.number)
-        stats = numeric_cols.describe().transpose()
-        logger.info("\nNumeric column summary:\n" + str(stats))
-
-        print("📊 Dataset Profile:")
-        print(f"Shape: {df.shape}")
-        print("\nColumn types:")
-        print(df.dtypes)
-        print("\nNull values:")
-        print(df.isnull().sum())
-        print("\nStats (numeric columns):")
-        print(stats)
+        # Imported where needed so that --help, argument errors and --submit don't wait for pandas
+        from cleaner.profile import profile_file, profile_lines, save_profile  # Streaming dataset profile
+        from cleaner.sketches import QUANTILE_K
+        from cleaner.stages import split_cols
+
+        if batch:
+            parser.error("--profile works on a single input file")
+        if args.sample_rows is not None and args.sample_rows < 1:
+            parser.error("--sample-rows must be at least 1")
+        profile = profile_file(args.input[0], args.input_format, split_cols(args.columns), args.chunksize,
+                               args.sample_rows, args.sketch_size or QUANTILE_K, args.threads)
+        lines = profile_lines(profile)
+        logger.info("\n".join(lines[1:]))
+        print("\n".join(lines))
+        if args.profile_json:
+            save_profile(profile, args.profile_json)
+            logger.info(f"Saved profile to {args.profile_json}")
         return  # ✅ exit here after profiling
 
-    # ❗ If not profiling, then output is required
-    if not args.output:
-        parser.error("--output is required unless using --profile")
+    if args.fit_plan and args.apply_plan:
+        parser.error("--fit-plan and --apply-plan cannot be used together")
+    if args.threads is not None and args.threads < 1:
+        parser.error("--threads must be at least 1")
+    if (args.casefold or args.unicode_normalize) and not (args.strip_whitespace or args.template):
+        parser.error("--casefold and --unicode-normalize are part of --strip-whitespace")
 
-    # 🧼 Now run the actual data cleaner
-    clean_data(
-        input_path=args.input,
-        output_path=args.output,
+    options = dict(
         fill_method=args.fill_missing,
         normalize_method=args.normalize,
         outlier_method=args.remove_outliers,
@@ -69,13 +166,158 @@ def main():
         duplicate_cols=args.duplicate_cols,
         strip_whitespace=args.strip_whitespace,
         validate_cols=args.validate_cols,
-        report_path=args.report,
-        logger=logger,
         normalize_cols=args.normalize_cols,
         encode_cols=args.encode_cols,
-        outlier_cols=args.outlier_cols
+        outlier_cols=args.outlier_cols,
+        max_categories=args.max_categories,
+        onehot_sparse=args.onehot_sparse,
+        casefold=args.casefold,
+        unicode_form=args.unicode_normalize,
+        chunksize=args.chunksize if args.stream or args.incremental else None,
+        approximate=args.approximate,
+        sketch_k=args.sketch_size,
+        apply_plan=args.apply_plan,
+        input_format=args.input_format,
+        output_format=args.output_format,
+        columns=args.columns,
+        duplicates_path=args.duplicates_output,
+        dedup_memory_mb=args.dedup_memory,
+        optimize_dtypes=args.optimize_dtypes,
+        arrow_strings=args.arrow_strings,
+        trace_memory=args.trace_memory,
+        incremental=args.incremental,
+        threads=args.threads,
+        in_place=args.in_place,
+        memmap_dir=args.memmap,
+        schema_path=args.schema,
     )
 
+    # 📋 Template: its steps replace the step options given on the command line
+    listed = None
+    if args.template:
+        from cleaner.pipeline import options_from_template
+        from cleaner.utils import load_templates
+
+        templates = load_templates()
+        if args.template not in templates:
+            parser.error(f"Unknown template {args.template!r}; available: {', '.join(templates)}")
+        try:
+            options.update(options_from_template(templates[args.template]))
+        except ValueError as e:
+            parser.error(f"Template {args.template!r}: {e}")
+        listed = [step.get('step') for step in templates[args.template].get('steps', [])]
+
+    if batch and not args.explain:
+        if args.fit_plan:
+            parser.error("--fit-plan needs a single input file")
+        if args.duplicates_output or args.metrics_json or args.profile_stages or args.state or args.bundle:
+            parser.error("--duplicates-output, --metrics-json, --profile-stages, --state and --bundle "
+                         "need a single input file")
+    elif not args.output and not args.explain:
+        # ❗ If not profiling, then output is required
+        parser.error("--output is required unless using --profile")
+    if args.bundle:
+        from cleaner.bundle import check_bundle_path
+
+        try:
+            check_bundle_path(args.bundle)
+        except ValueError as e:
+            parser.error(f"--bundle: {e}")
+
+    # 📨 Submit: the service cleans, this process only follows the jobs
+    if args.submit:
+        from cleaner.service import (ADDRESS, QueueFull, ServiceError, expand_remote, job_line, parse_address,
+                                     submit_job, wait_jobs)
+
+        if args.explain:
+            parser.error("--explain runs locally; drop --submit")
+        address = parse_address(args.service or ADDRESS)
+        start = time.perf_counter()
+        try:
+            if batch:
+                inputs, names = expand_remote(address, args.input, names=True)
+                jobs = [dict(options, input_path=path, output_dir=args.output or 'data', name=name)
+                        for path, name in zip(inputs, names)]
+            else:
+                jobs = [dict(options, input_path=args.input[0], output_path=args.output, report_path=args.report,
+                             log_path=args.log, fit_plan=args.fit_plan, metrics_path=args.metrics_json,
+                             profile_dir=args.profile_stages, state_path=args.state, bundle_path=args.bundle)]
+            job_ids = [submit_job(address, job)['id'] for job in jobs]
+            records = wait_jobs(address, job_ids, on_update=lambda record: print(job_line(record), flush=True))
+        except (QueueFull, ServiceError) as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        failed = sum(1 for record in records if record['error'])
+        print(f"{len(records) - failed}/{len(records)} files cleaned in {time.perf_counter() - start:.2f}s")
+        if failed:
+            sys.exit(1)
+        return
+
+    from cleaner.batch import batch_names, expand_inputs, run_batch, format_summary  # Multi-file runs
+    from cleaner.core import clean_data  # Main data-cleaning logic
+    from cleaner.formats import base_name
+    from cleaner.pipeline import explain_file  # Step graph and planner
+    from cleaner.plan import OPTIONS, CleaningPlan
+    from cleaner.preflight import PreflightError, load_schema
+    from cleaner.stages import split_cols
+
+    if args.schema:
+        try:
+            load_schema(args.schema)
+        except (OSError, ValueError) as e:
+            parser.error(f"Cannot use --schema: {e}")
+
+    # 🧭 Explain: show the optimized plan for the (first) input and stop
+    if args.explain:
+        if args.apply_plan:
+            plan = CleaningPlan.load(args.apply_plan)
+        else:
+            plan = CleaningPlan(**{key: options[key] for key in OPTIONS})
+        path = expand_inputs(args.input)[0] if batch else args.input[0]
+        print('\n'.join(explain_file(plan, path, args.input_format, split_cols(args.columns), listed,
+                                     chunked=args.stream)))
+        return
+
+    # 📂 Batch run: one output, report and log per file, named like the GUI does
+    if batch:
+        inputs = expand_inputs(args.input)
+        renamed = [(path, name) for path, name in zip(inputs, batch_names(inputs)) if name != base_name(path)]
+        if renamed:
+            notice = "\n".join(["⚠️ Some inputs share a file name; their outputs are named after their folder:"]
+                               + [f"  {path} → {name}" for path, name in renamed])
+            logger.warning(notice)
+            print(notice)
+        start = time.perf_counter()
+        results = run_batch(inputs, options, output_dir=args.output or 'data', workers=args.workers or 1)
+        summary = format_summary(results, time.perf_counter() - start)
+        logger.info("\nBatch summary:\n" + summary)
+        print(summary)
+        if any(result['error'] for result in results):
+            sys.exit(1)
+        return
+
+    # 🧼 Now run the actual data cleaner
+    try:
+        clean_data(
+            input_path=args.input[0],
+            output_path=args.output,
+            report_path=args.report,
+            logger=logger,
+            fit_plan=args.fit_plan,
+            metrics_path=args.metrics_json,
+            profile_dir=args.profile_stages,
+            state_path=args.state,
+            bundle_path=args.bundle,
+            **options
+        )
+    except PreflightError as e:
+        # 🛫 Rejected before loading: list every failed check
+        logger.error(str(e))
+        print(f"❌ {os.path.basename(e.path)} failed pre-flight checks:")
+        for problem in e.problems:
+            print(f"  - {problem['message']}")
+        sys.exit(1)
+
 
 # Ensure this runs only when executed directly (not imported)
 if __name__ == '__main__':
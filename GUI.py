@@ -1,33 +1,119 @@
 import streamlit as st
-import pandas as pd
 import os
 import logging
-import matplotlib.pyplot as plt
-import seaborn as sns
-
+from cleaner.bundle import create_bundle
+from cleaner.cache import CACHE_DISK_MB, CACHE_MEMORY_MB, ResultCache, cache_key, content_hash
 from cleaner.core import clean_data
-from cleaner.utils import profile_summary, generate_visuals, create_zip
+from cleaner.formats import base_name as data_base_name, read_table
+from cleaner.service import QueueFull, ServiceError, job_status, parse_address, submit_job
+from cleaner.utils import profile_summary, generate_visuals
+from cleaner.visuals import (box_summary, correlation, draw_boxplot, draw_counts, draw_heatmap, draw_histogram,
+                             figure_png, histogram, top_counts)
 
 st.set_page_config(page_title="Data Cleaning Tool", layout="wide")
 st.title("🧼 Cleaning-Data-Tool-CLI (Streamlit GUI)")
-st.markdown("Upload a CSV, explore it visually, clean it flexibly, and download results.")
+st.markdown("Upload a CSV, Parquet or Feather file, explore it visually, clean it flexibly, and download results.")
+
+
+# One cache per server process, shared by every session and kept across reruns.
+# Budgets and location come from CLEANER_CACHE_MB, CLEANER_CACHE_DISK_MB and CLEANER_CACHE_DIR.
+@st.cache_resource
+def result_cache():
+    return ResultCache(os.environ.get("CLEANER_CACHE_DIR", os.path.join("data", "cache")),
+                       memory_mb=float(os.environ.get("CLEANER_CACHE_MB", CACHE_MEMORY_MB)),
+                       disk_mb=float(os.environ.get("CLEANER_CACHE_DISK_MB", CACHE_DISK_MB)))
+
+
+def run_cleaning(input_path, output_path, report_path, log_path, zip_path, logger_name, options):
+    """Clean once, bundling the files as they are written, and keep everything the result tabs show."""
+    os.makedirs("logs", exist_ok=True)
+    os.makedirs("reports", exist_ok=True)
+
+    logger = logging.getLogger(logger_name)
+    logger.setLevel(logging.INFO)
+    handler = logging.FileHandler(log_path, mode="w", encoding="utf-8")
+    handler.setFormatter(logging.Formatter('%(asctime)s | %(levelname)s | %(message)s'))
+    if logger.hasHandlers():
+        logger.handlers.clear()
+    logger.addHandler(handler)
+    try:
+        plan, cleaned_df = clean_data(input_path=input_path, output_path=output_path, report_path=report_path,
+                                      bundle_path=zip_path, logger=logger, return_data=True, **options)
+    finally:
+        handler.close()
+    return collect_result(cleaned_df, plan.last_run["shapes"][0], output_path, report_path, log_path)
+
+
+def collect_result(cleaned_df, original_shape, output_path, report_path, log_path):
+    """Keep everything the result tabs show; the bundle stays on disk and is refreshed when downloaded."""
+    files = {}
+    for name, path in (("output", output_path), ("report", report_path), ("log", log_path)):
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                files[name] = f.read()
+    return {"cleaned_df": cleaned_df, "original_shape": original_shape, "files": files}
+
+
+# With CLEANER_SERVICE (HOST:PORT or a socket path of `CLI.py --serve`) cleaning runs in the
+# service's warm workers; the page polls the job instead of blocking the session.
+SERVICE = parse_address(os.environ["CLEANER_SERVICE"]) if os.environ.get("CLEANER_SERVICE") else None
+
+
+@st.fragment(run_every=0.5)
+def job_progress():
+    """Progress of the submitted job, refreshed on its own; reruns the page once the job has finished."""
+    job = st.session_state.get("job")
+    if not job:
+        return
+    try:
+        record = job_status(SERVICE, job["id"])
+    except ServiceError as e:
+        record = {"state": "failed", "error": str(e)}
+    if record["state"] in ("queued", "running"):
+        st.info(f"⏳ Cleaning {record['state']}" + (f": {record['progress']}" if record.get("progress") else "..."))
+        return
+    st.session_state["finished_job"] = dict(job, error=record["error"], result=record.get("result"))
+    del st.session_state["job"]
+    st.rerun()
+
+
+def chart(cache, result_key, view, columns, draw):
+    """PNG of one chart of a cleaned dataset, drawn once from its aggregates (see ``cleaner.visuals``)."""
+    return cache.fetch(cache_key("chart", result_key, view, columns), lambda: figure_png(draw()))
+
+
+def restore_files(result, paths):
+    """A cached result's output, report and log written back, so the files on disk match what is shown."""
+    for name, path in paths.items():
+        if name in result["files"]:
+            with open(path, "wb") as f:
+                f.write(result["files"][name])
+
 
 # Upload
-uploaded_file = st.file_uploader("📁 Upload your CSV file", type=["csv"])
+uploaded_file = st.file_uploader("📁 Upload your data file", type=["csv", "gz", "zst", "parquet", "feather", "arrow"])
 
 if uploaded_file:
+    cache = result_cache()
+    data = uploaded_file.getvalue()
+    file_hash = content_hash(data)
+
     os.makedirs("data", exist_ok=True)
     input_path = os.path.join("data", uploaded_file.name)
-    with open(input_path, "wb") as f:
-        f.write(uploaded_file.getbuffer())
+    # Streamlit reruns the script on every interaction: rewrite the upload only when it changed
+    if st.session_state.get("input_written") != (input_path, file_hash) or not os.path.exists(input_path):
+        with open(input_path, "wb") as f:
+            f.write(data)
+        st.session_state["input_written"] = (input_path, file_hash)
 
-    base_name = os.path.splitext(uploaded_file.name)[0]
+    base_name = data_base_name(uploaded_file.name)
     output_path = f"data/{base_name}_cleaned.csv"
     report_path = f"reports/{base_name}_report.md"
     log_path = f"logs/{base_name}.log"
     zip_path = f"data/{base_name}_bundle.zip"
 
-    df = pd.read_csv(input_path)
+    # Parsed once per file content (and name, which decides the format)
+    df = cache.fetch(cache_key("input", file_hash, uploaded_file.name), lambda: read_table(input_path))
     st.write("📊 Preview of Uploaded Data", df.head())
     st.info(f"🔢 Rows: {df.shape[0]} | Columns: {df.shape[1]}")
 
@@ -62,50 +148,70 @@ if uploaded_file:
     # Run cleaning
     if submit:
         st.subheader("🔄 Cleaning in Progress...")
-        os.makedirs("logs", exist_ok=True)
-        os.makedirs("reports", exist_ok=True)
-
-        logger = logging.getLogger(base_name)
-        logger.setLevel(logging.INFO)
-        handler = logging.FileHandler(log_path, mode="w", encoding="utf-8")
-        handler.setFormatter(logging.Formatter('%(asctime)s | %(levelname)s | %(message)s'))
-        if logger.hasHandlers():
-            logger.handlers.clear()
-        logger.addHandler(handler)
-
-        try:
-            clean_data(
-                input_path=input_path,
-                output_path=output_path,
-                fill_method=fill_method.lower() if fill_method != "None" else None,
-                normalize_method=normalize_method.lower() if normalize_method != "None" else None,
-                outlier_method=outlier_method.lower() if outlier_method != "None" else None,
-                encode_method=encoding_method.lower() if encoding_method != "None" else None,
-                drop_duplicates=drop_dupes,
-                duplicate_cols=",".join(duplicate_cols) if duplicate_cols else None,
-                strip_whitespace=strip_ws,
-                validate_cols=validate,
-                report_path=report_path,
-                logger=logger,
-                normalize_cols=",".join(normalize_cols) if normalize_cols else None,
-                encode_cols=",".join(encode_cols) if encode_cols else None,
-                outlier_cols=",".join(outlier_cols) if outlier_cols else None,
-            )
-
-            cleaned_df = pd.read_csv(output_path)
-            st.session_state["cleaned_df"] = cleaned_df
-            st.session_state["original_shape"] = df.shape
+        options = dict(
+            fill_method=fill_method.lower() if fill_method != "None" else None,
+            normalize_method=normalize_method.lower() if normalize_method != "None" else None,
+            outlier_method=outlier_method.lower() if outlier_method != "None" else None,
+            encode_method=encoding_method.lower() if encoding_method != "None" else None,
+            drop_duplicates=drop_dupes,
+            duplicate_cols=",".join(duplicate_cols) if duplicate_cols else None,
+            strip_whitespace=strip_ws,
+            validate_cols=validate,
+            normalize_cols=",".join(normalize_cols) if normalize_cols else None,
+            encode_cols=",".join(encode_cols) if encode_cols else None,
+            outlier_cols=",".join(outlier_cols) if outlier_cols else None,
+        )
+        # Same file content and configuration -> same result, served from the cache
+        key = cache_key("clean", file_hash, uploaded_file.name, options)
+        cached = key in cache
+
+        if SERVICE and not cached:
+            try:
+                record = submit_job(SERVICE, dict(options, input_path=input_path, output_path=output_path,
+                                                  report_path=report_path, log_path=log_path,
+                                                  bundle_path=zip_path), wait=0)
+                st.session_state["job"] = {"id": record["id"], "key": key}
+            except (QueueFull, ServiceError) as e:
+                st.error(f"❌ Cleaning service: {e}")
+        else:
+            try:
+                result = cache.fetch(key, lambda: run_cleaning(input_path, output_path, report_path, log_path,
+                                                               zip_path, base_name, options))
+                if cached:
+                    restore_files(result, {"output": output_path, "report": report_path, "log": log_path})
+                st.session_state["result"] = result
+                st.session_state["result_key"] = key
+
+                cleaned_df = result["cleaned_df"]
+                st.success("✅ Data cleaned successfully!" + (" (cached result)" if cached else ""))
+                st.info(f"📉 Rows reduced: {df.shape[0]} → {cleaned_df.shape[0]} | Columns: {cleaned_df.shape[1]}")
 
+            except Exception as e:
+                st.error(f"❌ Cleaning failed due to: {e}")
+
+    # Cleaning in the service: follow the job, then load its output as a local run would have returned it
+    if "job" in st.session_state:
+        job_progress()
+    finished = st.session_state.pop("finished_job", None)
+    if finished:
+        if finished["error"]:
+            st.error(f"❌ Cleaning failed due to: {finished['error']}")
+        else:
+            original_shape = (finished["result"]["rows_in"], df.shape[1])
+            result = cache.fetch(finished["key"], lambda: collect_result(read_table(output_path), original_shape,
+                                                                         output_path, report_path, log_path))
+            st.session_state["result"] = result
+            st.session_state["result_key"] = finished["key"]
+            cleaned_df = result["cleaned_df"]
             st.success("✅ Data cleaned successfully!")
             st.info(f"📉 Rows reduced: {df.shape[0]} → {cleaned_df.shape[0]} | Columns: {cleaned_df.shape[1]}")
 
-        except Exception as e:
-            st.error(f"❌ Cleaning failed due to: {e}")
-
     # Show results and visuals
-    if "cleaned_df" in st.session_state:
-        cleaned_df = st.session_state["cleaned_df"]
-        orig_shape = st.session_state["original_shape"]
+    if "result" in st.session_state:
+        result = st.session_state["result"]
+        files = result["files"]
+        cleaned_df = result["cleaned_df"]
+        orig_shape = result["original_shape"]
         removed_rows = orig_shape[0] - cleaned_df.shape[0]
         row_drop_pct = (removed_rows / orig_shape[0]) * 100 if orig_shape[0] else 0
 
@@ -115,39 +221,32 @@ if uploaded_file:
         with tab1:
             st.dataframe(cleaned_df.head())
             st.metric("Rows Removed", f"{removed_rows} ({row_drop_pct:.2f}%)")
-            with open(output_path, "rb") as f:
-                st.download_button("📥 Download Cleaned CSV", f, file_name=os.path.basename(output_path), mime="text/csv")
+            st.download_button("📥 Download Cleaned CSV", files["output"], file_name=os.path.basename(output_path),
+                               mime="text/csv")
 
         with tab2:
             st.markdown("### 📈 Select Visual Type")
             viz_type = st.selectbox("Choose a visualization", ["Boxplot", "Histogram", "Correlation Heatmap", "Categorical Barplot"])
+            result_key = st.session_state["result_key"]
+            numeric_cols = cleaned_df.select_dtypes(include="number").columns
 
             if viz_type == "Boxplot":
-                numeric_cols = cleaned_df.select_dtypes(include="number").columns
                 if len(numeric_cols) > 0:
-                    fig, ax = plt.subplots(figsize=(10, 5))
-                    sns.boxplot(data=cleaned_df[numeric_cols], ax=ax)
-                    ax.set_title("Boxplot of Numeric Columns")
-                    ax.set_xticklabels(ax.get_xticklabels(), rotation=45, ha="right")
-                    st.pyplot(fig)
+                    st.image(chart(cache, result_key, "box", list(numeric_cols),
+                                   lambda: draw_boxplot([box_summary(cleaned_df[col]) for col in numeric_cols])))
                 else:
                     st.info("No numeric columns available for boxplot.")
 
             elif viz_type == "Histogram":
-                numeric_cols = cleaned_df.select_dtypes(include="number").columns
                 selected = st.multiselect("Select numeric columns", numeric_cols)
                 for col in selected:
-                    fig, ax = plt.subplots()
-                    sns.histplot(cleaned_df[col], kde=True, ax=ax)
-                    ax.set_title(f"Histogram of {col}")
-                    st.pyplot(fig)
+                    st.image(chart(cache, result_key, "histogram", col,
+                                   lambda col=col: draw_histogram(histogram(cleaned_df[col]))))
 
             elif viz_type == "Correlation Heatmap":
-                numeric_cols = cleaned_df.select_dtypes(include="number").columns
                 if len(numeric_cols) >= 2:
-                    fig, ax = plt.subplots(figsize=(8, 6))
-                    sns.heatmap(cleaned_df[numeric_cols].corr(), annot=True, cmap="coolwarm", ax=ax)
-                    st.pyplot(fig)
+                    st.image(chart(cache, result_key, "heatmap", list(numeric_cols),
+                                   lambda: draw_heatmap(correlation(cleaned_df, numeric_cols))))
                 else:
                     st.info("Not enough numeric columns to generate heatmap.")
 
@@ -155,27 +254,30 @@ if uploaded_file:
                 cat_cols = cleaned_df.select_dtypes(include=["object", "category"]).columns
                 selected = st.multiselect("Select categorical columns", cat_cols)
                 for col in selected:
-                    fig, ax = plt.subplots()
-                    cleaned_df[col].value_counts().plot(kind="bar", ax=ax)
-                    ax.set_title(f"Value Counts for {col}")
-                    st.pyplot(fig)
+                    st.image(chart(cache, result_key, "counts", col,
+                                   lambda col=col: draw_counts(top_counts(cleaned_df[col]), col)))
 
         with tab3:
-            if os.path.exists(report_path):
-                with open(report_path, "r", encoding="utf-8") as f:
-                    st.subheader("🧾 Cleaning Report")
-                    st.markdown(f.read())
+            if "report" in files:
+                st.subheader("🧾 Cleaning Report")
+                st.markdown(files["report"].decode("utf-8"))
             else:
                 st.warning("⚠️ Report not found.")
 
-            if os.path.exists(log_path):
-                with open(log_path, "r", encoding="utf-8") as f:
-                    st.subheader("📚 Cleaning Log")
-                    st.text(f.read())
+            if "log" in files:
+                st.subheader("📚 Cleaning Log")
+                st.text(files["log"].decode("utf-8"))
             else:
                 st.warning("⚠️ Log not found.")
 
         with tab4:
-            create_zip(output_path, report_path, log_path, zip_path)
+            # Rebuilt only when a file changed since it was bundled (a restored cached result, say)
+            bar = st.progress(0.0, text="📦 Checking the bundle...")
+            rebuilt = create_bundle(zip_path, [output_path, report_path, log_path],
+                                    progress=lambda done, total, name: bar.progress(
+                                        min(done / total, 1.0) if total else 0.0, text=f"📦 Bundling {name}..."))
+            bar.empty()
+            st.caption(f"`{zip_path}` " + ("rebuilt." if rebuilt else "is up to date."))
             with open(zip_path, "rb") as f:
-                st.download_button("📦 Download ZIP Bundle", f, file_name=os.path.basename(zip_path), mime="application/zip")
+                st.download_button("📦 Download ZIP Bundle", f, file_name=os.path.basename(zip_path),
+                                   mime="application/zip")
@@ -0,0 +1,76 @@
+"""
+Time writing the cleaned output and bundling it, old way and new.
+
+    python -m benchmarks.bundle
+    python -m benchmarks.bundle --rows 5m --output bundle.json
+
+The old way writes the CSV, then copies it into an uncompressed ZIP. The
+new ways write a deflated ZIP member while the CSV is written, or copy the
+CSV into a ``.tar.zst`` compressed on all cores. Also timed: the check that
+skips a bundle whose files are unchanged. Best of ``--repeat`` runs; sizes
+are in MB.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import zipfile
+
+from benchmarks.run_benchmarks import parse_size
+from benchmarks.synthetic import make_dataset
+from cleaner.bundle import Bundle, create_bundle
+from cleaner.formats import write_table
+
+
+def old_bundle(df, output, bundle):
+    df.to_csv(output, index=False)
+    with zipfile.ZipFile(bundle, 'w') as archive:
+        archive.write(output)
+
+
+def new_bundle(df, output, bundle):
+    with Bundle(bundle) as archive:
+        write_table(df, output, bundle=archive)
+
+
+def best(func, repeat):
+    seconds = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        seconds = elapsed if seconds is None else min(seconds, elapsed)
+    return seconds
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark writing the output together with its bundle.")
+    parser.add_argument('--rows', default='1m', help='Rows of the synthetic dataset (default: 1m)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per case; the best is kept')
+    parser.add_argument('--output', default=None, help='Write results to this JSON file')
+    args = parser.parse_args(argv)
+
+    df = make_dataset(parse_size(args.rows))
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        output = os.path.join(workdir, 'cleaned.csv')
+        cases = [('csv only', lambda: df.to_csv(output, index=False), None),
+                 ('csv + stored zip (old)', lambda: old_bundle(df, output, f"{output}.old.zip"), 'old.zip'),
+                 ('csv + streamed deflate zip', lambda: new_bundle(df, output, f"{output}.zip"), 'zip'),
+                 ('csv + tar.zst', lambda: new_bundle(df, output, f"{output}.tar.zst"), 'tar.zst'),
+                 ('unchanged zip (skipped)', lambda: create_bundle(f"{output}.zip", [output]), 'zip')]
+        for name, func, extension in cases:
+            seconds = best(func, args.repeat)
+            size = os.path.getsize(f"{output}.{extension}") / 2**20 if extension else os.path.getsize(output) / 2**20
+            results.append({'case': name, 'rows': len(df), 'seconds': round(seconds, 4), 'mb': round(size, 1)})
+            print(f"{name:<28} {seconds:>8.3f}s  {size:>8.1f} MB", flush=True)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved results to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
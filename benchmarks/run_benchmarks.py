@@ -0,0 +1,152 @@
+"""
+Benchmark clean_data on synthetic data.
+
+    python -m benchmarks.run_benchmarks --sizes 10k,1m --output bench.json
+    python -m benchmarks.run_benchmarks --sizes 10k,1m --baseline bench.json --threshold 0.2
+
+Every combination of fill method, outlier method, encoding and normalization
+is timed at each size (best of ``--repeat`` runs). Results are written as
+JSON; with ``--baseline`` the run fails (exit code 1) if any combination got
+slower than the baseline by more than ``--threshold``.
+"""
+import argparse
+import itertools
+import json
+import logging
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import make_dataset
+from cleaner.core import clean_data
+from cleaner.formats import OUTPUT_EXTENSIONS, write_table
+
+FILL_METHODS = ('mean', 'median', 'mode')
+OUTLIER_METHODS = ('iqr', 'zscore')
+ENCODE_METHODS = ('label', 'onehot')
+NORMALIZE_METHODS = ('minmax', 'zscore')
+
+# Differences below this many seconds are treated as noise, whatever the ratio.
+NOISE_SECONDS = 0.05
+
+
+def parse_size(text):
+    """'10k' -> 10000, '1m' -> 1000000, '2500' -> 2500."""
+    text = text.strip().lower()
+    scale = {'k': 1_000, 'm': 1_000_000}.get(text[-1:], 1)
+    return int(float(text.rstrip('km')) * scale)
+
+
+def combinations():
+    for fill, outliers, encode, normalize in itertools.product(FILL_METHODS, OUTLIER_METHODS,
+                                                               ENCODE_METHODS, NORMALIZE_METHODS):
+        yield {'fill_method': fill, 'outlier_method': outliers, 'encode_method': encode,
+               'normalize_method': normalize}
+
+
+def combo_name(options):
+    return ','.join(f"{key.split('_')[0]}={value}" for key, value in options.items())
+
+
+def dataset_path(workdir, rows, fmt, **params):
+    """Write the synthetic dataset once per size and parameters; later runs reuse the file."""
+    suffix = '-'.join(f"{key}{value}" for key, value in sorted(params.items()))
+    path = os.path.join(workdir, f"synthetic_{rows}_{suffix}{OUTPUT_EXTENSIONS[fmt]}")
+    if not os.path.exists(path):
+        write_table(make_dataset(rows, **params), path)
+    return path
+
+
+def run_one(input_path, output_path, options, repeat, logger):
+    """Best wall time of ``repeat`` runs, with the per-stage seconds of that run."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        plan = clean_data(input_path, output_path, drop_duplicates=True, duplicate_cols=None,
+                          strip_whitespace=True, validate_cols=True, report_path=None, logger=logger,
+                          **options)
+        seconds = time.perf_counter() - start
+        if best is None or seconds < best[0]:
+            stages = {record['stage']: round(record['seconds'], 6) for record in plan.last_run['metrics']['stages']}
+            best = (seconds, stages)
+    return {'seconds': round(best[0], 6), 'stages': best[1]}
+
+
+def compare(results, baseline, threshold, noise=NOISE_SECONDS):
+    """
+    Combinations slower than the baseline by more than ``threshold`` (0.2 =
+    20%) and by more than ``noise`` seconds, as (key, base, new) tuples.
+    """
+    base = {(entry['rows'], entry['combo']): entry['seconds'] for entry in baseline['results']}
+    regressions = []
+    for entry in results['results']:
+        key = (entry['rows'], entry['combo'])
+        if key in base and entry['seconds'] > base[key] * (1 + threshold) and entry['seconds'] - base[key] > noise:
+            regressions.append((key, base[key], entry['seconds']))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark clean_data on synthetic data.")
+    parser.add_argument('--sizes', default='10k,1m,10m', help='Comma-separated row counts (default: 10k,1m,10m)')
+    parser.add_argument('--repeat', type=int, default=1, help='Runs per combination; the best is kept')
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv', help='Input/output format')
+    parser.add_argument('--workdir', default=os.path.join('data', 'benchmarks'),
+                        help='Where generated datasets and outputs go (datasets are reused)')
+    parser.add_argument('--output', default=None, help='Write results to this JSON file')
+    parser.add_argument('--baseline', default=None, help='Compare against a previous results JSON')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Allowed slowdown versus the baseline (default: 0.2 = 20%%)')
+    parser.add_argument('--numeric-cols', type=int, default=5)
+    parser.add_argument('--categorical-cols', type=int, default=2)
+    parser.add_argument('--null-fraction', type=float, default=0.05)
+    parser.add_argument('--outlier-fraction', type=float, default=0.01)
+    parser.add_argument('--duplicate-rate', type=float, default=0.02)
+    parser.add_argument('--cardinality', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.workdir, exist_ok=True)
+    logger = logging.getLogger('benchmark')
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+    params = dict(numeric_cols=args.numeric_cols, categorical_cols=args.categorical_cols,
+                  null_fraction=args.null_fraction, outlier_fraction=args.outlier_fraction,
+                  duplicate_rate=args.duplicate_rate, cardinality=args.cardinality, seed=args.seed)
+
+    results = {
+        'meta': {'date': datetime.now().isoformat(timespec='seconds'), 'python': platform.python_version(),
+                 'pandas': pd.__version__, 'numpy': np.__version__, 'platform': platform.platform(),
+                 'format': args.format, 'repeat': args.repeat, 'dataset': params},
+        'results': [],
+    }
+    for rows in map(parse_size, args.sizes.split(',')):
+        input_path = dataset_path(args.workdir, rows, args.format, **params)
+        output_path = os.path.join(args.workdir, f"output{OUTPUT_EXTENSIONS[args.format]}")
+        for options in combinations():
+            timing = run_one(input_path, output_path, options, args.repeat, logger)
+            results['results'].append({'rows': rows, 'combo': combo_name(options), **timing})
+            print(f"{rows:>10} {combo_name(options):<60} {timing['seconds']:>9.3f}s", flush=True)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved results to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for (rows, combo), base, new in regressions:
+            print(f"REGRESSION {rows} rows, {combo}: {base:.3f}s -> {new:.3f}s (+{(new / base - 1) * 100:.0f}%)")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%} of the baseline")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""
+Time how long the CLI takes to start.
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --output startup.json --max-seconds 1.0
+
+Each command runs in a fresh interpreter (best of ``--repeat`` runs):
+``CLI.py --help``, ``import cleaner.core`` and a small fill + dedup run, next
+to a bare interpreter for reference. With ``--service`` the run is also timed
+through ``--submit`` to a running ``CLI.py --serve``. The slowest imports of ``cleaner.core``
+(from ``python -X importtime``) are listed to show what a run pays for
+before reading any data. With ``--max-seconds`` the run fails (exit code 1)
+if a command is slower than that.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLI = os.path.join(ROOT, 'CLI.py')
+
+
+def commands(workdir, service=None):
+    """The timed commands by name; the clean run needs ``prepare`` first."""
+    data = os.path.join(workdir, 'startup_input.csv')
+    clean = [sys.executable, CLI, '--input', data, '--output', os.path.join(workdir, 'startup_output.csv'),
+             '--fill-missing', 'mean', '--drop-duplicates', '--log', os.path.join(workdir, 'startup.log')]
+    timed = {
+        'python': [sys.executable, '-c', 'pass'],
+        'help': [sys.executable, CLI, '--help'],
+        'import': [sys.executable, '-c', 'import cleaner.core'],
+        'clean': clean,
+    }
+    if service:
+        timed['submit'] = clean + ['--submit', '--service', service]
+    return timed
+
+
+def prepare(workdir):
+    from benchmarks.synthetic import make_dataset
+
+    path = os.path.join(workdir, 'startup_input.csv')
+    if not os.path.exists(path):
+        make_dataset(1_000).to_csv(path, index=False)
+
+
+def time_command(cmd, repeat):
+    """Best wall time of ``repeat`` runs of ``cmd``, run from the repository root."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(cmd, cwd=ROOT, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+
+def import_times(cmd):
+    """``{module: (self_seconds, cumulative_seconds)}`` for every module ``cmd`` imports."""
+    cmd = [cmd[0], '-X', 'importtime'] + cmd[1:]
+    result = subprocess.run(cmd, cwd=ROOT, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = (int(self_us) / 1e6, int(cumulative_us) / 1e6)
+    return modules
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time CLI startup and the slowest imports.")
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per command; the best is kept')
+    parser.add_argument('--workdir', default=os.path.join('data', 'benchmarks'),
+                        help='Where the small input file and outputs go')
+    parser.add_argument('--top', type=int, default=10, help='How many of the slowest imports to list')
+    parser.add_argument('--output', default=None, help='Write results to this JSON file')
+    parser.add_argument('--max-seconds', type=float, default=None,
+                        help='Fail if any command takes longer than this')
+    parser.add_argument('--service', metavar='ADDR', default=None,
+                        help='Also time the clean run through --submit to the service at ADDR')
+    args = parser.parse_args(argv)
+
+    workdir = os.path.abspath(args.workdir)
+    os.makedirs(workdir, exist_ok=True)
+    prepare(workdir)
+    timed = commands(workdir, args.service)
+
+    results = {
+        'meta': {'date': datetime.now().isoformat(timespec='seconds'), 'python': platform.python_version(),
+                 'platform': platform.platform(), 'repeat': args.repeat},
+        'commands': {},
+        'slowest_imports': [],
+    }
+    for name, cmd in timed.items():
+        seconds = time_command(cmd, args.repeat)
+        results['commands'][name] = round(seconds, 4)
+        print(f"{name:<8} {seconds:>7.3f}s  {' '.join(os.path.basename(part) for part in cmd[1:])}", flush=True)
+
+    modules = import_times(timed['import'])
+    slowest = sorted(modules.items(), key=lambda item: item[1][0], reverse=True)[:args.top]
+    print("\nSlowest imports of cleaner.core (self / cumulative):")
+    for name, (own, cumulative) in slowest:
+        results['slowest_imports'].append({'module': name, 'self_seconds': own, 'cumulative_seconds': cumulative})
+        print(f"  {name:<50} {own:>7.3f}s {cumulative:>7.3f}s")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved results to {args.output}")
+
+    if args.max_seconds is not None:
+        slow = {name: seconds for name, seconds in results['commands'].items() if seconds > args.max_seconds}
+        for name, seconds in slow.items():
+            print(f"TOO SLOW {name}: {seconds:.3f}s > {args.max_seconds:.3f}s")
+        if slow:
+            sys.exit(1)
+        print(f"All commands started within {args.max_seconds:.3f}s")
+
+
+if __name__ == '__main__':
+    main()
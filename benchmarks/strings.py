@@ -0,0 +1,81 @@
+"""
+Time the whitespace step against the old ``astype(str).str.strip()`` path.
+
+    python -m benchmarks.strings
+    python -m benchmarks.strings --rows 5m --output strings.json
+
+Text columns with few and with only distinct values are cleaned as object,
+category and Arrow string columns (best of ``--repeat`` runs), stripping
+only and with case folding plus NFKC normalization.
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.run_benchmarks import parse_size
+from cleaner.stages import strip_columns
+
+
+def text_column(rows, cardinality, null_fraction=0.05, seed=0):
+    """Labels with stray spaces, tabs and full-width characters; ``null_fraction`` of them missing."""
+    rng = np.random.default_rng(seed)
+    labels = np.array([f"  Ｌevel {i}\t" if i % 2 else f"level {i} " for i in range(cardinality)], dtype=object)
+    values = labels[rng.integers(0, cardinality, rows)] if cardinality < rows else labels[rng.permutation(rows)]
+    values[rng.random(rows) < null_fraction] = None
+    return pd.Series(values)
+
+
+def legacy(series, casefold=False, unicode_form=None):
+    """The old path: every row cast with ``astype(str)`` (nulls become 'nan') and cleaned in Python."""
+    text = series.astype(str)
+    if casefold:
+        text = text.str.casefold()
+    if unicode_form:
+        text = text.str.normalize(unicode_form)
+    return text.str.strip()
+
+
+def best(func, repeat):
+    seconds = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        seconds = elapsed if seconds is None else min(seconds, elapsed)
+    return seconds
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the whitespace and text normalization step.")
+    parser.add_argument('--rows', default='1m', help='Rows per column (default: 1m)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per case; the best is kept')
+    parser.add_argument('--output', default=None, help='Write results to this JSON file')
+    args = parser.parse_args(argv)
+
+    rows = parse_size(args.rows)
+    results = []
+    for cardinality in (1_000, rows):
+        column = text_column(rows, cardinality)
+        for dtype in ('object', 'category', 'string[pyarrow]'):
+            series = column.astype(dtype)
+            for casefold, unicode_form in ((False, None), (True, 'NFKC')):
+                old = best(lambda: legacy(series, casefold, unicode_form), args.repeat)
+                new = best(lambda: strip_columns(pd.DataFrame({'text': series}), casefold=casefold,
+                                                 unicode_form=unicode_form), args.repeat)
+                mode = 'strip+casefold+NFKC' if casefold else 'strip'
+                results.append({'rows': rows, 'distinct': cardinality, 'dtype': dtype, 'mode': mode,
+                                'legacy_seconds': round(old, 4), 'seconds': round(new, 4)})
+                print(f"{cardinality:>9} distinct {dtype:<16} {mode:<20} legacy {old:>7.3f}s  now {new:>7.3f}s  "
+                      f"({old / new:.1f}x)", flush=True)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved results to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
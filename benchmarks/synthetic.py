@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+
+
+def make_dataset(rows, numeric_cols=5, categorical_cols=2, null_fraction=0.05, outlier_fraction=0.01,
+                 duplicate_rate=0.02, cardinality=8, seed=0):
+    """
+    Deterministic messy dataset for benchmarks: the same arguments always give
+    the same frame.
+
+    - numeric columns ``num_<i>`` are normal with a per-column mean and
+      scale; ``outlier_fraction`` of their values are moved ±10 standard
+      deviations away;
+    - categorical columns ``cat_<i>`` draw from ``cardinality`` labels, some
+      with stray whitespace, so stripping and encoding have work to do;
+    - ``null_fraction`` of all cells are missing;
+    - ``duplicate_rate`` of the rows are exact copies of other rows.
+    """
+    rng = np.random.default_rng(seed)
+    unique_rows = rows - int(rows * duplicate_rate)
+    data = {}
+    for i in range(numeric_cols):
+        mean, scale = rng.uniform(-100, 100), rng.uniform(1, 50)
+        values = rng.normal(mean, scale, unique_rows).round(3)
+        outliers = rng.random(unique_rows) < outlier_fraction
+        values[outliers] += rng.choice([-10, 10], outliers.sum()) * scale
+        values[rng.random(unique_rows) < null_fraction] = np.nan
+        data[f'num_{i}'] = values
+    for i in range(categorical_cols):
+        labels = np.array([f" level_{j}" if j % 3 == 1 else f"level_{j}" for j in range(cardinality)], dtype=object)
+        values = labels[rng.integers(0, cardinality, unique_rows)]
+        values[rng.random(unique_rows) < null_fraction] = None
+        data[f'cat_{i}'] = values
+    df = pd.DataFrame(data)
+
+    copies = df.iloc[rng.integers(0, unique_rows, rows - unique_rows)] if unique_rows else df.iloc[:0]
+    df = pd.concat([df, copies], ignore_index=True)
+    return df.iloc[rng.permutation(rows)].reset_index(drop=True)
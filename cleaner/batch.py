@@ -0,0 +1,145 @@
+import glob
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from cleaner.core import clean_data
+from cleaner.formats import base_name, infer_format, is_data_file, OUTPUT_EXTENSIONS
+from cleaner.logger import setup_logger
+from cleaner.preflight import PreflightError
+
+
+def expand_inputs(patterns):
+    """
+    Resolve input arguments to a list of files, without duplicates. Each
+    pattern may be a file, a directory (all data files inside it, sorted) or a
+    glob such as ``data/*.csv``.
+    """
+    files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            files += sorted(path for path in glob.glob(os.path.join(pattern, '*')) if is_data_file(path))
+        elif glob.has_magic(pattern):
+            files += sorted(glob.glob(pattern))
+        else:
+            files.append(pattern)
+    return list(dict.fromkeys(files))
+
+
+def batch_names(inputs):
+    """
+    Output base names for ``inputs``, in order and all different. Inputs that
+    share a base name are prefixed with their folder (``a/t.csv`` and
+    ``b/t.csv`` become ``a_t`` and ``b_t``), plus a counter if that is not
+    enough, so no two runs write the same output, report or log.
+    """
+    names = [base_name(path) for path in inputs]
+    counts = Counter(names)
+    names = [f"{os.path.basename(os.path.dirname(os.path.abspath(path)))}_{name}" if counts[name] > 1 else name
+             for path, name in zip(inputs, names)]
+    counts = Counter(names)
+    taken = {name for name in names if counts[name] == 1}
+    unique = []
+    for name in names:
+        candidate, number = name, 1
+        if counts[name] > 1:
+            while candidate in taken:
+                number += 1
+                candidate = f"{name}_{number}"
+            taken.add(candidate)
+        unique.append(candidate)
+    return unique
+
+
+def batch_paths(input_path, output_dir='data', output_format=None, name=None):
+    """Output, report and log paths for one input, named like the GUI does (or after ``name``)."""
+    name = name or base_name(input_path)
+    extension = OUTPUT_EXTENSIONS[infer_format('', output_format)]
+    return {
+        'output_path': os.path.join(output_dir, f"{name}_cleaned{extension}"),
+        'report_path': os.path.join('reports', f"{name}_report.md"),
+        'log_path': os.path.join('logs', f"{name}.log"),
+    }
+
+
+def clean_file(input_path, output_path, report_path, log_path, options, progress=None):
+    """
+    Clean one file with its own logger; never raises. Returns a result dict
+    with the row counts and timing, or the error message if cleaning failed
+    (plus the failed checks as ``problems`` if the file failed pre-flight).
+    ``progress``, a logging handler, also receives the run's log records.
+    """
+    result = {'input': input_path, 'output': output_path, 'rows_in': None, 'rows_out': None,
+              'seconds': 0.0, 'error': None, 'problems': None}
+    start = time.perf_counter()
+    logger = None
+    try:
+        os.makedirs(os.path.dirname(log_path) or '.', exist_ok=True)
+        logger = setup_logger(log_path, name=f"clean_logger[{os.path.abspath(input_path)}]")
+        if progress:
+            logger.addHandler(progress)
+        plan = clean_data(input_path=input_path, output_path=output_path, report_path=report_path,
+                          logger=logger, **options)
+        shapes = plan.last_run['shapes']
+        result['rows_in'], result['rows_out'] = shapes[0][0], shapes[1][0]
+    except PreflightError as e:
+        result['error'], result['problems'] = f"{type(e).__name__}: {e}", e.problems
+        if logger:
+            logger.error(f"Cleaning rejected for {input_path}: {e}")
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+        if logger:
+            logger.exception(f"Cleaning failed for {input_path}")
+    finally:
+        if logger:
+            for handler in list(logger.handlers):
+                handler.close()
+                logger.removeHandler(handler)
+        result['seconds'] = time.perf_counter() - start
+    return result
+
+
+def run_batch(inputs, options, output_dir='data', workers=1):
+    """
+    Clean every input file, in parallel processes when ``workers`` > 1.
+    A failing file is recorded in its result and does not stop the others.
+    Results come back in input order; inputs sharing a name get distinct
+    outputs (see ``batch_names``).
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    jobs = [(path, batch_paths(path, output_dir, options.get('output_format'), name))
+            for path, name in zip(inputs, batch_names(inputs))]
+    if workers <= 1:
+        return [clean_file(path, options=options, **paths) for path, paths in jobs]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(clean_file, path, options=options, **paths) for path, paths in jobs]
+        results = []
+        for (path, paths), future in zip(jobs, futures):
+            try:
+                results.append(future.result())
+            except Exception as e:  # e.g. a worker process died
+                results.append({'input': path, 'output': paths['output_path'], 'rows_in': None,
+                                'rows_out': None, 'seconds': 0.0, 'error': f"{type(e).__name__}: {e}",
+                                'problems': None})
+        return results
+
+
+def format_summary(results, elapsed):
+    """
+    Plain-text table of per-file timing and row counts, by file name (the
+    path where names repeat); ``elapsed`` is the wall time.
+    """
+    lines = [f"{'File':<40} {'Rows in':>10} {'Rows out':>10} {'Seconds':>8}  Status"]
+    names = Counter(os.path.basename(result['input']) for result in results)
+    for result in results:
+        name = os.path.basename(result['input'])
+        rows_in = '' if result['rows_in'] is None else result['rows_in']
+        rows_out = '' if result['rows_out'] is None else result['rows_out']
+        status = f"failed ({result['error']})" if result['error'] else 'ok'
+        lines.append(f"{result['input'] if names[name] > 1 else name:<40} {rows_in:>10} {rows_out:>10} "
+                     f"{result['seconds']:>8.2f}  {status}")
+    failed = sum(1 for result in results if result['error'])
+    lines.append(f"{len(results) - failed}/{len(results)} files cleaned in {elapsed:.2f}s")
+    return '\n'.join(lines)
@@ -0,0 +1,326 @@
+import hashlib
+import importlib.util
+import io
+import json
+import os
+import queue
+import struct
+import tarfile
+import threading
+import time
+import zipfile
+
+# zstandard is only needed for .tar.zst bundles and is imported where it is used.
+
+BLOCK = 1 << 20
+# Deflate level of ZIP members: level 1 is several times faster than the
+# default 6 on CSV text and only slightly larger.
+ZIP_LEVEL = 1
+ZSTD_LEVEL = 3
+# Progress callbacks fire at most once per this many bytes (and at the end of each member).
+PROGRESS_BYTES = 8 << 20
+# Members that are compressed already are stored in ZIP bundles, not deflated again.
+COMPRESSED_EXTENSIONS = ('.parquet', '.pq', '.feather', '.arrow', '.ipc', '.gz', '.bz2', '.xz', '.zst', '.zstd')
+# The manifest of a .tar.zst bundle trails the zstd stream in a skippable frame
+# (ignored by zstd readers): magic, size, JSON, JSON length, tag.
+SKIPPABLE_MAGIC = 0x184D2A50
+MANIFEST_TAG = b'CDTm'
+
+
+def bundle_format(path):
+    """'zip' for ``.zip`` bundles, 'zstd' for ``.tar.zst``."""
+    name = path.lower()
+    if name.endswith('.zip'):
+        return 'zip'
+    if name.endswith(('.tar.zst', '.tzst')):
+        return 'zstd'
+    raise ValueError(f"Unknown bundle format {os.path.basename(path)} (expected .zip or .tar.zst)")
+
+
+def check_bundle_path(path):
+    """Raise ValueError unless a bundle can be written to ``path`` (known format, zstandard for .tar.zst)."""
+    if bundle_format(path) == 'zstd' and importlib.util.find_spec('zstandard') is None:
+        raise ValueError(f"{os.path.basename(path)} needs the zstandard package (pip install zstandard)")
+
+
+def _arcname(path):
+    # the path as given (data/x_cleaned.csv), or just the file name outside the working directory
+    relative = os.path.relpath(path)
+    return (os.path.basename(path) if relative.startswith(os.pardir) else relative).replace(os.sep, '/')
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(BLOCK), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class _Tee(io.RawIOBase):
+    """
+    Writes every block to all ``targets`` and hashes it on a background
+    thread, so compressing a ZIP member overlaps formatting the next block
+    (zlib and hashlib release the GIL). Closing waits for the thread, closes
+    the targets and calls ``on_close``; ``abort`` only stops the thread.
+    """
+
+    def __init__(self, targets, on_write, on_close):
+        self._targets = targets
+        self._on_write = on_write
+        self._on_close = on_close
+        self.sha256 = hashlib.sha256()
+        self._blocks = queue.Queue(maxsize=4)
+        self._error = None
+        self._thread = threading.Thread(target=self._drain, daemon=True)
+        self._thread.start()
+
+    def _drain(self):
+        while (data := self._blocks.get()) is not None:
+            if self._error is None:
+                try:
+                    for target in self._targets:
+                        target.write(data)
+                    self.sha256.update(data)
+                except BaseException as e:
+                    self._error = e
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        if self._error is not None:
+            raise self._error
+        self._blocks.put(bytes(data))  # the caller reuses its buffer
+        self._on_write(len(data))
+        return len(data)
+
+    def abort(self):
+        if self._thread.is_alive():
+            self._blocks.put(None)
+            self._thread.join()
+
+    def close(self):
+        if not self.closed:
+            self.abort()
+            for target in self._targets:
+                target.close()
+            if self._error is not None:
+                raise self._error
+            self._on_close(self)
+        super().close()
+
+
+class _Reader(io.RawIOBase):
+    """A file read through for tar members, hashing it and reporting progress."""
+
+    def __init__(self, f, on_read):
+        self._file = f
+        self._on_read = on_read
+        self.sha256 = hashlib.sha256()
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        data = self._file.read(size)
+        self.sha256.update(data)
+        self._on_read(len(data))
+        return data
+
+
+class Bundle:
+    """
+    One archive of a run's files (cleaned data, report, log), written to
+    ``<path>.part`` and moved into place by ``close``, so a bundle on disk is
+    always complete; ``discard`` drops it instead.
+
+    ``.zip`` bundles deflate each member (already compressed formats are
+    stored) and ``open_csv`` writes a CSV file and its member in the same
+    pass. ``.tar.zst`` bundles are one zstd stream compressed on all cores
+    (needs ``zstandard``); tar headers need the member size first, so CSV
+    files are copied in once written. The archive keeps a manifest of each
+    member's source path, size, mtime and SHA-256 (see ``bundle_is_current``).
+    ``progress(done, total, name)`` reports the bytes written so far; ``total``
+    is None unless set, as it is unknown while output is streamed.
+    """
+
+    def __init__(self, path, progress=None):
+        self.path = path
+        self.kind = bundle_format(path)
+        self.progress = progress
+        self.total = None
+        self.done = 0
+        self.members = {}
+        self._reported = 0
+        self._streams = []
+        self._part = f"{path}.part"
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        if self.kind == 'zip':
+            self._archive = zipfile.ZipFile(self._part, 'w', zipfile.ZIP_DEFLATED, compresslevel=ZIP_LEVEL)
+        else:
+            import zstandard
+
+            self._file = open(self._part, 'wb')
+            self._stream = zstandard.ZstdCompressor(level=ZSTD_LEVEL, threads=-1).stream_writer(self._file,
+                                                                                               closefd=False)
+            self._archive = tarfile.open(fileobj=self._stream, mode='w|')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, kind, error, traceback):
+        if kind is None:
+            self.close()
+        else:
+            self.discard()
+
+    def _advance(self, size, name, end=False):
+        self.done += size
+        if self.progress and (end or self.done - self._reported >= PROGRESS_BYTES):
+            self._reported = self.done
+            self.progress(self.done, self.total, name)
+
+    def _record(self, name, path, sha256):
+        stat = os.stat(path)
+        self.members[name] = {'path': os.path.abspath(path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                              'sha256': sha256}
+        self._advance(0, name, end=True)
+
+    def open_csv(self, path):
+        """
+        Text handle that writes the CSV file ``path``; in ZIP bundles every
+        block also goes to its member. The member is complete once the handle
+        is closed.
+        """
+        name = _arcname(path)
+        out = open(path, 'wb')
+        if self.kind == 'zip':
+            member = self._archive.open(name, 'w', force_zip64=True)
+            tee = _Tee((out, member), lambda size: self._advance(size, name),
+                       lambda tee: self._record(name, path, tee.sha256.hexdigest()))
+        else:
+            tee = _Tee((out,), lambda size: None, lambda tee: self.add_file(path, name))
+        self._streams.append(tee)
+        return io.TextIOWrapper(io.BufferedWriter(tee, BLOCK), encoding='utf-8', newline='')
+
+    def add_file(self, path, name=None):
+        """Copy a finished file into the bundle."""
+        name = name or _arcname(path)
+        with open(path, 'rb') as f:
+            reader = _Reader(f, lambda size: self._advance(size, name))
+            if self.kind == 'zip':
+                stored = path.lower().endswith(COMPRESSED_EXTENSIONS)
+                if stored:
+                    info = zipfile.ZipInfo(name, time.localtime(os.path.getmtime(path))[:6])
+                    info.compress_type = zipfile.ZIP_STORED
+                with self._archive.open(info if stored else name, 'w', force_zip64=True) as member:
+                    for block in iter(lambda: reader.read(BLOCK), b''):
+                        member.write(block)
+            else:
+                self._archive.addfile(self._archive.gettarinfo(path, name), reader)
+        self._record(name, path, reader.sha256.hexdigest())
+
+    def close(self):
+        manifest = json.dumps({'members': self.members}).encode('utf-8')
+        if self.kind == 'zip':
+            self._archive.comment = manifest
+            self._archive.close()
+        else:
+            self._archive.close()
+            self._stream.close()
+            self._file.write(_manifest_frame(manifest))
+            self._file.close()
+        os.replace(self._part, self.path)
+
+    def discard(self):
+        for tee in self._streams:
+            tee.abort()
+        for handle in (self._archive, getattr(self, '_stream', None), getattr(self, '_file', None)):
+            try:
+                if handle is not None:
+                    handle.close()
+            except Exception:
+                pass
+        if os.path.exists(self._part):
+            os.remove(self._part)
+
+
+def _manifest_frame(manifest):
+    payload = manifest + struct.pack('<I', len(manifest)) + MANIFEST_TAG
+    return struct.pack('<II', SKIPPABLE_MAGIC, len(payload)) + payload
+
+
+def read_manifest(path):
+    """The members recorded in a bundle, or None if it is missing or has no manifest."""
+    try:
+        if bundle_format(path) == 'zip':
+            with zipfile.ZipFile(path) as archive:
+                return json.loads(archive.comment)['members']
+        with open(path, 'rb') as f:
+            f.seek(-8, os.SEEK_END)
+            size, tag = struct.unpack('<I4s', f.read(8))
+            if tag != MANIFEST_TAG:
+                return None
+            f.seek(-8 - size, os.SEEK_END)
+            return json.loads(f.read(size))['members']
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+        return None
+
+
+def _write_manifest(path, members):
+    # rewrite only the manifest: the ZIP comment, or the trailing frame of a .tar.zst
+    manifest = json.dumps({'members': members}).encode('utf-8')
+    if bundle_format(path) == 'zip':
+        with zipfile.ZipFile(path, 'a') as archive:
+            archive.comment = manifest
+        return
+    with open(path, 'r+b') as f:
+        f.seek(-8, os.SEEK_END)
+        size = struct.unpack('<I', f.read(4))[0]
+        f.truncate(f.seek(-16 - size, os.SEEK_END))
+        f.write(_manifest_frame(manifest))
+
+
+def bundle_is_current(bundle_path, paths):
+    """
+    Whether the bundle holds exactly ``paths`` as they are now. A file whose
+    size and mtime match the manifest counts as unchanged without reading
+    it; one that was only touched (same size, new mtime) is hashed, and if
+    the content is the same the new mtime is saved to the manifest.
+    """
+    members = read_manifest(bundle_path)
+    if members is None:
+        return False
+    recorded = {member['path']: member for member in members.values()}
+    if set(recorded) != {os.path.abspath(path) for path in paths}:
+        return False
+    touched = []
+    for path in paths:
+        member, stat = recorded[os.path.abspath(path)], os.stat(path)
+        if stat.st_size != member['size']:
+            return False
+        if stat.st_mtime_ns != member['mtime_ns']:
+            if file_hash(path) != member['sha256']:
+                return False
+            touched.append((member, stat.st_mtime_ns))
+    if touched:
+        for member, mtime_ns in touched:
+            member['mtime_ns'] = mtime_ns
+        _write_manifest(bundle_path, members)
+    return True
+
+
+def create_bundle(bundle_path, paths, progress=None):
+    """
+    Bundle the existing files among ``paths``, unless the bundle already
+    holds them unchanged. Returns True if the bundle was written.
+    """
+    paths = [path for path in paths if path and os.path.exists(path)]
+    if bundle_is_current(bundle_path, paths):
+        return False
+    with Bundle(bundle_path, progress) as bundle:
+        bundle.total = sum(os.path.getsize(path) for path in paths)
+        for path in paths:
+            bundle.add_file(path)
+    return True
@@ -0,0 +1,136 @@
+import hashlib
+import json
+import os
+import pickle
+import sys
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+CACHE_MEMORY_MB = 512
+CACHE_DISK_MB = 2048
+
+_MISSING = object()
+
+
+def content_hash(data):
+    """SHA-256 of ``data`` (bytes): the identity of an uploaded file, whatever its name."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def cache_key(*parts):
+    """Stable key for JSON-like ``parts`` (file hashes, option dicts, names)."""
+    text = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def estimate_size(value):
+    """Approximate bytes held by ``value``; DataFrames are measured deeply."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, dict):
+        return sum(estimate_size(item) for item in value.values()) + sys.getsizeof(value)
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_size(item) for item in value) + sys.getsizeof(value)
+    return sys.getsizeof(value)
+
+
+class ResultCache:
+    """
+    Least-recently-used cache of computed results in two tiers.
+
+    Entries live in memory up to ``memory_mb``. Past that the least recently
+    used ones move to pickle files in ``directory`` (if given), which holds
+    up to ``disk_mb`` and deletes its oldest files past that. A disk hit
+    moves the entry back into memory. Keys should be content addresses
+    (``cache_key``), so a changed input or option simply misses. Safe to
+    share between threads.
+    """
+
+    def __init__(self, directory=None, memory_mb=CACHE_MEMORY_MB, disk_mb=CACHE_DISK_MB):
+        self.directory = directory
+        self.memory_limit = int(memory_mb * 2**20)
+        self.disk_limit = int(disk_mb * 2**20)
+        self.memory_bytes = 0
+        self.disk_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (value, size), least recently used first
+        self._files = OrderedDict()  # key -> file size, oldest first
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            # files left by an earlier process, oldest first
+            paths = [os.path.join(directory, name) for name in os.listdir(directory) if name.endswith('.pkl')]
+            for path in sorted(paths, key=os.path.getmtime):
+                key = os.path.basename(path)[:-len('.pkl')]
+                self._files[key] = os.path.getsize(path)
+                self.disk_bytes += self._files[key]
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries or key in self._files
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            if key not in self._files:
+                self.misses += 1
+                return default
+            with open(self._path(key), 'rb') as f:
+                value = pickle.load(f)
+            self._remove_file(key)
+            self.hits += 1
+            self._store(key, value, estimate_size(value))
+            return value
+
+    def put(self, key, value, size=None):
+        with self._lock:
+            if key in self._entries:
+                self.memory_bytes -= self._entries.pop(key)[1]
+            self._store(key, value, estimate_size(value) if size is None else size)
+
+    def fetch(self, key, compute):
+        """The cached value for ``key``, computed with ``compute()`` and stored on a miss."""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def _store(self, key, value, size):
+        self._entries[key] = (value, size)
+        self.memory_bytes += size
+        while self.memory_bytes > self.memory_limit and self._entries:
+            old_key, (old_value, old_size) = self._entries.popitem(last=False)
+            self.memory_bytes -= old_size
+            self._spill(old_key, old_value)
+
+    def _spill(self, key, value):
+        if not self.directory:
+            return
+        with open(self._path(key), 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        self._files[key] = os.path.getsize(self._path(key))
+        self.disk_bytes += self._files[key]
+        while self.disk_bytes > self.disk_limit and self._files:
+            self._remove_file(next(iter(self._files)))
+
+    def _remove_file(self, key):
+        self.disk_bytes -= self._files.pop(key)
+        os.remove(self._path(key))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.memory_bytes = 0
+            while self._files:
+                self._remove_file(next(iter(self._files)))
+
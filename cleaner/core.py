@@ -1,198 +1,224 @@
-import pandas as pd
-import numpy as np
 import os
-from datetime import datetime
-from sklearn.preprocessing import LabelEncoder
+
+from cleaner.bundle import Bundle
+from cleaner.dtypes import read_lean
+from cleaner.formats import read_table, write_table
+from cleaner.incremental import clean_data_incremental
+from cleaner.logger import log_files
+from cleaner.plan import CleaningPlan
+from cleaner.metrics import StageMetrics
+from cleaner.numeric import memmap_numeric
+from cleaner.preflight import load_schema, preflight, schema_dtypes
+from cleaner.report import (report_header, report_memory, report_stages, report_validation, report_in_place,
+                            report_final_shape, report_performance, write_report)
+from cleaner.sketches import QUANTILE_K
+from cleaner.stages import split_cols, find_column_issues
+from cleaner.stats import ColumnStats
+from cleaner.stream import clean_data_chunked
+
 
 def clean_data(input_path, output_path, fill_method, normalize_method, outlier_method,
                encode_method, drop_duplicates, duplicate_cols, strip_whitespace,
-               validate_cols, report_path, logger, normalize_cols=None, encode_cols=None, outlier_cols=None):
-
-
-    # --- Load Data ---
-    df = pd.read_csv(input_path)
-    original_shape = df.shape
-    base_name = os.path.splitext(os.path.basename(input_path))[0]
-    auto_categoricals = df.select_dtypes(include=['object', 'category']).columns.tolist()
-    auto_categoricals += [
-        col for col in df.select_dtypes(include='number').columns
-        if df[col].nunique() < 10
-    ]
-    auto_categoricals = list(set(auto_categoricals))
-
-    auto_numerics = [
-        col for col in df.select_dtypes(include='number').columns
-        if col not in auto_categoricals
-    ]
-
-    encode_targets = [col.strip() for col in encode_cols.split(',')] if encode_cols else auto_categoricals
-    normalize_targets = [col.strip() for col in normalize_cols.split(',')] if normalize_cols else auto_numerics
-
-    report_lines = []
-    report_lines.append("# 📊 Data Cleaning Report")
-    report_lines.append(f"- **Run time:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    report_lines.append(f"- **Input file:** `{input_path}`")
-    report_lines.append(f"- **Output file:** `{output_path}`\n")
-
-    report_lines.append("## 📐 Initial Dataset")
-    report_lines.append(f"- Rows: {original_shape[0]}")
-    report_lines.append(f"- Columns: {original_shape[1]}\n")
-
-    logger.info(f"Loaded data with shape: {original_shape}")
-
-    # --- Strip Whitespace ---
-    if strip_whitespace:
-        stripped = []
-        for col in df.select_dtypes(include=['object', 'category']):
-            df[col] = df[col].astype(str).str.strip()
-            stripped.append(col)
-            logger.info(f"Stripped whitespace from column: {col}")
-        if stripped:
-            report_lines.append("## 🔠 Whitespace Cleanup")
-            report_lines.append(f"- Stripped whitespace from: `{', '.join(stripped)}`\n")
-
-    # --- Fill Missing Values ---
-    if fill_method:
-        report_lines.append("## 🔧 Missing Value Filling")
-        report_lines.append(f"- Method: `{fill_method}`")
-        for col in df.select_dtypes(include=np.number).columns:
-            if df[col].isnull().sum() > 0:
-                if fill_method == 'mean':
-                    val = df[col].mean()
-                elif fill_method == 'median':
-                    val = df[col].median()
-                elif fill_method == 'mode':
-                    val = df[col].mode()[0]
-                df[col] = df[col].fillna(val)
-                logger.info(f"Filled missing values in '{col}' with {val}")
-                report_lines.append(f"  - `{col}` → filled with `{val}`")
-        report_lines.append("")
-
-    # --- Remove Duplicates ---
-    if drop_duplicates:
-        before = df.shape[0]
-        if duplicate_cols:
-            subset_cols = [col.strip() for col in duplicate_cols.split(',')]
-            df = df.drop_duplicates(subset=subset_cols)
-            logger.info(f"Removed duplicates using columns: {subset_cols}")
-            report_lines.append("## 🧹 Duplicate Removal")
-            report_lines.append(f"- Based on columns: `{', '.join(subset_cols)}`")
+               validate_cols, report_path, logger, normalize_cols=None, encode_cols=None, outlier_cols=None,
+               chunksize=None, fit_plan=None, apply_plan=None, input_format=None, output_format=None,
+               columns=None, duplicates_path=None, dedup_memory_mb=None, optimize_dtypes=False,
+               arrow_strings=False, metrics_path=None, trace_memory=False, profile_dir=None,
+               max_categories=None, onehot_sparse=False, casefold=False, unicode_form=None,
+               approximate=False, sketch_k=None, incremental=False, state_path=None, threads=None,
+               in_place=False, memmap_dir=None, schema_path=None, bundle_path=None, return_data=False):
+    """
+    Clean a data file and write the result to ``output_path``.
+
+    Formats (CSV, compressed CSV, Parquet, Feather/Arrow IPC) are inferred from
+    the file extensions unless ``input_format``/``output_format`` are given.
+    ``columns`` (comma-separated) limits which input columns are loaded.
+    ``duplicates_path`` receives the rows dropped as duplicates.
+    ``optimize_dtypes`` loads with narrow numeric dtypes and ``category`` for
+    low-cardinality text (``arrow_strings`` also stores other text as Arrow
+    strings) and reports the memory saved per column.
+    ``max_categories`` caps one-hot columns per feature (rarer levels share an
+    ``<col>_other`` column); ``onehot_sparse`` keeps one-hot columns sparse.
+    ``casefold`` and ``unicode_form`` ('NFC', 'NFKC', 'NFD' or 'NFKD') also
+    fold case and normalize text in the whitespace step; nulls stay null.
+    ``threads`` spreads the per-column work of each stage (statistics,
+    fill, encoding, outlier tests, scaling, validation) over that many
+    threads; results are merged in column order, so output, report and log
+    are the same as with one thread.
+    ``in_place`` fills, scales and compacts numeric columns inside their
+    own arrays instead of allocating new ones (see ``cleaner.numeric``);
+    ``memmap_dir`` also moves the float columns of an in-memory run to a
+    memory-mapped file there. The report compares the copies made with the
+    regular path.
+
+    Before anything is loaded, pre-flight checks read the header and the
+    first rows (see ``cleaner.preflight``) and raise ``PreflightError``
+    when a named column is missing or a requested column cannot be used.
+    ``schema_path`` names a JSON schema whose columns and dtypes are also
+    checked and then given to the reader, so only those columns are loaded,
+    already in their final dtypes (``columns`` still wins if given).
+
+    ``bundle_path`` (``.zip`` or ``.tar.zst``) also packs the output, the
+    report and the logger's log files into one compressed archive; CSV
+    output goes into a ZIP bundle while it is written (see ``cleaner.bundle``).
+
+    Every stage is timed for the report's Performance section; ``metrics_path``
+    also saves the numbers as JSON, ``trace_memory`` adds tracemalloc peaks and
+    ``profile_dir`` receives one cProfile file per stage.
+
+    With ``chunksize`` the file is streamed in chunks of that many rows
+    instead of being loaded at once (see ``cleaner.stream``); duplicates are
+    then found by row fingerprint, with the fingerprints spilled to disk past
+    ``dedup_memory_mb``. ``approximate`` computes quantiles and distinct
+    counts there with mergeable sketches (``sketch_k`` sets the quantile
+    sketch size) instead of exact value counts.
+    ``incremental`` cleans only the rows appended to a CSV input since the
+    last run and appends them to the output, with the offsets, statistics
+    and dedup hashes kept in ``state_path`` (see ``cleaner.incremental``).
+    ``fit_plan`` saves the fitted statistics to a JSON plan; ``apply_plan``
+    loads one and only transforms, in which case the plan's own cleaning
+    options replace the method arguments.
+
+    Returns the ``CleaningPlan``; with ``return_data`` returns ``(plan,
+    cleaned DataFrame)`` instead, so callers need not read the output back
+    (the frame is ``None`` in chunked runs).
+    """
+    if apply_plan:
+        plan = CleaningPlan.load(apply_plan)
+    else:
+        plan = CleaningPlan(fill_method=fill_method, normalize_method=normalize_method,
+                            outlier_method=outlier_method, encode_method=encode_method,
+                            drop_duplicates=drop_duplicates, duplicate_cols=duplicate_cols,
+                            strip_whitespace=strip_whitespace, normalize_cols=normalize_cols,
+                            encode_cols=encode_cols, outlier_cols=outlier_cols,
+                            max_categories=max_categories, onehot_sparse=onehot_sparse,
+                            casefold=casefold, unicode_form=unicode_form)
+    if dedup_memory_mb:
+        plan.dedup_memory_mb = dedup_memory_mb
+    if threads:
+        plan.threads = threads
+    plan.in_place = in_place or bool(memmap_dir)
+
+    usecols = split_cols(columns)
+    schema = load_schema(schema_path) if schema_path else None
+    dtypes = schema_dtypes(schema) if schema else None
+    if schema and not usecols:
+        usecols = list(schema)
+    optimize_dtypes = optimize_dtypes or arrow_strings
+    metrics = StageMetrics(trace_memory=trace_memory, profile_dir=profile_dir)
+    df = None
+    if memmap_dir and (incremental or chunksize):
+        logger.warning("Memory-mapped numeric columns only apply to in-memory runs; "
+                       "memory already follows the chunk size")
+    try:
+        # --- Pre-flight: reject the file before it is loaded ---
+        with metrics.stage('preflight') as run:
+            plan.preflight = preflight(plan, input_path, input_format, usecols, schema)
+            run['rows_out'] = plan.preflight['rows']
+        logger.info(f"Pre-flight checks passed in {plan.preflight['seconds'] * 1000:.1f} ms "
+                    f"({plan.preflight['rows']} rows sampled)")
+        if dtypes and (incremental or chunksize):
+            logger.warning("Schema dtypes only apply to in-memory runs; streamed runs read the schema "
+                           "columns with the dtypes of the file")
+        if bundle_path:
+            plan.bundle = Bundle(bundle_path)
+
+        if incremental:
+            if optimize_dtypes:
+                logger.warning("Dtype optimization is skipped in incremental mode; "
+                               "memory already follows the chunk size")
+            clean_data_incremental(plan, input_path, output_path, validate_cols, report_path, logger,
+                                   chunksize or 100_000, state_path, input_format=input_format,
+                                   output_format=output_format, columns=usecols, duplicates_path=duplicates_path,
+                                   metrics=metrics, sketch_k=(sketch_k or QUANTILE_K) if approximate else None)
+        elif chunksize:
+            if optimize_dtypes:
+                logger.warning("Dtype optimization is skipped in chunked mode; "
+                               "memory already follows the chunk size")
+            clean_data_chunked(plan, input_path, output_path, validate_cols, report_path, logger, chunksize,
+                               input_format=input_format, output_format=output_format, columns=usecols,
+                               duplicates_path=duplicates_path, metrics=metrics,
+                               sketch_k=(sketch_k or QUANTILE_K) if approximate else None)
         else:
-            df = df.drop_duplicates()
-            logger.info("Removed full row duplicates")
-            report_lines.append("## 🧹 Duplicate Removal")
-            report_lines.append("- Based on full rows")
-        removed = before - df.shape[0]
-        report_lines.append(f"- Duplicates removed: `{removed}`\n")
-
-    if outlier_method:
-        report_lines.append("## 🧪 Outlier Removal")
-        report_lines.append(f"- Method: `{outlier_method}`")
-
-        outlier_targets = [col.strip() for col in outlier_cols.split(',')] if outlier_cols else auto_numerics
-        outlier_mask = pd.Series(False, index=df.index)
-
-        for col in outlier_targets:
-            if col not in df.columns:
-                logger.warning(f"Outlier column '{col}' not found in DataFrame.")
-                continue
-
-            if outlier_method == 'iqr':
-                Q1 = df[col].quantile(0.25)
-                Q3 = df[col].quantile(0.75)
-                IQR = Q3 - Q1
-                lower = Q1 - 1.5 * IQR
-                upper = Q3 + 1.5 * IQR
-                col_mask = ~df[col].between(lower, upper)
-            elif outlier_method == 'zscore':
-                std = df[col].std()
-                if std == 0 or np.isnan(std):
-                    logger.warning(f"Skipped outlier detection for column '{col}' due to zero or NaN std.")
-                    continue
-                z_scores = (df[col] - df[col].mean()) / std
-                col_mask = z_scores.abs() > 3
-            else:
-                logger.warning(f"Unknown outlier method: {outlier_method}")
-                continue
-
-            outlier_mask |= col_mask.fillna(False)
-            removed = col_mask.sum()
-            logger.info(f"Marked {removed} outliers from '{col}'")
-            report_lines.append(f"  - `{col}` → `{removed}` outliers marked")
-
-        total_removed = outlier_mask.sum()
-        df = df[~outlier_mask]
-        logger.info(f"Total outliers removed: {total_removed}")
-        report_lines.append(f"- **Total outlier rows removed:** `{total_removed}`\n")
-
-        # --- Encode Categoricals ---
-    if encode_method:
-        report_lines.append("## 🔣 Categorical Encoding")
-        report_lines.append(f"- Method: `{encode_method}`")
-
-        for col in encode_targets:
-            if encode_method == 'label':
-                le = LabelEncoder()
-                df[col] = le.fit_transform(df[col].astype(str))
-                logger.info(f"Label encoded column '{col}'")
-                report_lines.append(f"  - `{col}` encoded (label)")
-
-            elif encode_method == 'onehot':
-                onehot = pd.get_dummies(df[col], prefix=col)
-                df = pd.concat([df.drop(columns=[col]), onehot], axis=1)
-                logger.info(f"Applied one-hot encoding to: {col}")
-                report_lines.append(f"  - `{col}` encoded (one-hot)")
-    # --- Normalize ---
-    if normalize_method:
-        report_lines.append("## 📊 Normalization")
-        report_lines.append(f"- Method: `{normalize_method}`")
-
-        for col in normalize_targets:
-            if col not in df.columns:
-                continue
-            if normalize_method == 'zscore':
-                mean = df[col].mean()
-                std = df[col].std()
-                df[col] = (df[col] - mean) / std
-                logger.info(f"Z-score normalized '{col}' (mean={mean}, std={std})")
-                report_lines.append(f"  - `{col}` normalized (z-score)")
-
-            elif normalize_method == 'minmax':
-                min_val = df[col].min()
-                max_val = df[col].max()
-                df[col] = (df[col] - min_val) / (max_val - min_val)
-                logger.info(f"Min-max scaled '{col}' (min={min_val}, max={max_val})")
-                report_lines.append(f"  - `{col}` normalized (min-max)")
-        report_lines.append("")
-
-    # --- Validate Columns ---
-    if validate_cols:
-        report_lines.append("## ⚠️ Column Validation Warnings")
-        for col in df.columns:
-            if df[col].nunique(dropna=False) == 1:
-                logger.warning(f"Column '{col}' is constant")
-                report_lines.append(f"- `{col}` is constant")
-            if df[col].isnull().mean() == 1.0:
-                logger.warning(f"Column '{col}' is entirely null")
-                report_lines.append(f"- `{col}` is entirely null")
-            if df[col].dtype == 'object' and df[col].nunique() / len(df) > 0.5:
-                logger.warning(f"Column '{col}' has high cardinality")
-                report_lines.append(f"- `{col}` has high cardinality")
-        report_lines.append("")
-
-    # --- Save Output CSV ---
-    df.to_csv(output_path, index=False)
-    logger.info(f"Saved cleaned data to {output_path}")
-
-    # --- Final Dataset Shape ---
-    report_lines.append("## 📉 Final Dataset Shape")
-    report_lines.append(f"- Rows: {df.shape[0]}")
-    report_lines.append(f"- Columns: {df.shape[1]}")
-
-    # --- Write Markdown Report ---
-    if report_path:
-        os.makedirs(os.path.dirname(report_path), exist_ok=True)
-        with open(report_path, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(report_lines))
-        logger.info(f"Saved report to {report_path}")
-
+            if approximate:
+                logger.warning("Approximate statistics only apply to chunked runs; "
+                               "in-memory statistics are exact")
+            # --- Load Data ---
+            memory = None
+            with metrics.stage('load') as run:
+                if optimize_dtypes:
+                    df, memory = read_lean(input_path, input_format, columns=usecols, arrow_strings=arrow_strings,
+                                           dtype=dtypes)
+                else:
+                    df = read_table(input_path, input_format, columns=usecols, dtype=dtypes)
+                run['rows_out'] = len(df)
+            original_shape = df.shape
+            mapped = 0
+            if memmap_dir:
+                with metrics.stage('memmap', len(df)):
+                    df, mapped = memmap_numeric(df, memmap_dir)
+
+            report_lines = []
+            report_header(report_lines, input_path, output_path, original_shape, logger)
+            if memory:
+                report_memory(report_lines, memory, logger)
+
+            # --- Clean: strip, fill, dedup, outliers, encode, normalize ---
+            # One statistics cache for the whole run; stages invalidate what they change.
+            stats = ColumnStats(df, plan.threads)
+            with plan.collect_duplicates(duplicates_path, df.columns):
+                if apply_plan:
+                    df = plan.transform(df, logger, stats=stats, metrics=metrics)
+                else:
+                    df = plan.fit_transform(df, logger, stats=stats, metrics=metrics)
+            report_stages(report_lines, plan, logger)
+
+            # --- Validate Columns ---
+            if validate_cols:
+                with metrics.stage('validate', len(df)):
+                    issues = find_column_issues(df, stats, plan.threads)
+                report_validation(report_lines, issues, logger)
+
+            # --- Save Output ---
+            with metrics.stage('write', len(df)):
+                write_table(df, output_path, output_format, bundle=plan.bundle)
+            logger.info(f"Saved cleaned data to {output_path}")
+
+            # --- Final Dataset Shape ---
+            report_final_shape(report_lines, df.shape)
+            plan.last_run['shapes'] = (original_shape, df.shape)
+
+            # --- Performance ---
+            if plan.in_place:
+                report_in_place(report_lines, plan.last_run['in_place'], metrics.to_dict(), logger, mapped)
+            report_performance(report_lines, metrics.to_dict(), logger)
+
+            # --- Write Markdown Report ---
+            write_report(report_lines, report_path, logger)
+
+        plan.last_run['metrics'] = metrics.to_dict()
+        if metrics_path:
+            metrics.save(metrics_path, input=input_path, output=output_path,
+                         mode='incremental' if incremental else 'chunked' if chunksize else 'in-memory')
+            logger.info(f"Saved metrics to {metrics_path}")
+    except BaseException:
+        if plan.bundle:
+            plan.bundle.discard()
+        raise
+    finally:
+        bundle, plan.bundle = plan.bundle, None
+        if plan.seen is not None:
+            plan.seen.close()  # drop the row hashes and any spill files
+        metrics.close()
+
+    if fit_plan:
+        plan.save(fit_plan)
+        logger.info(f"Saved cleaning plan to {fit_plan}")
+
+    # --- Bundle: report and log join the output (logged first, so the bundled log is complete) ---
+    if bundle:
+        logger.info(f"Bundling the output, report and log into {bundle_path}")
+        with bundle:
+            for path in [report_path] + log_files(logger):
+                if path and os.path.exists(path):
+                    bundle.add_file(path)
+    return (plan, df) if return_data else plan
@@ -0,0 +1,146 @@
+import os
+import shutil
+import tempfile
+import weakref
+
+import numpy as np
+
+COUNTS_MEMORY_MB = 32  # per column: counted values kept in memory before spilling to disk
+BLOCK = 1 << 20  # values per block when merging with or scanning the spilled run
+
+
+def _merge(values, counts):
+    """Sorted distinct values and their summed counts."""
+    order = np.argsort(values, kind='stable')
+    values, counts = values[order], counts[order]
+    if not len(values):
+        return values, counts
+    starts = np.flatnonzero(np.concatenate(([True], values[1:] != values[:-1])))
+    return values[starts], np.add.reduceat(counts, starts)
+
+
+class ValueCounts:
+    """
+    Exact counts of a numeric column's values, added chunk by chunk, for
+    exact medians, quantiles and modes.
+
+    Each chunk becomes a sorted run of its distinct values (float64) and
+    their counts (int64), 16 bytes per value. Runs are merged as they grow,
+    so an update costs about O(chunk log chunk) instead of O(distinct
+    values). Once they take more than ``memory_mb`` they are merged into one
+    sorted run on disk, block by block, under ``spill_dir`` or ``$TMPDIR``,
+    and read back through memory maps. Memory then follows the chunk size,
+    not the number of distinct values. ``close`` deletes the files.
+    """
+
+    def __init__(self, memory_mb=None, spill_dir=None):
+        self.memory_limit = int((memory_mb or COUNTS_MEMORY_MB) * 2**20)
+        self.spill_dir = spill_dir
+        self.total = 0
+        self.spills = 0
+        self._runs = []  # sorted in-memory (values, counts), largest first
+        self._disk = None  # memory-mapped (values, counts) of the spilled run
+        self._tmpdir = None
+        self._cleanup = None
+
+    @property
+    def memory_bytes(self):
+        return sum(values.nbytes + counts.nbytes for values, counts in self._runs)
+
+    def add(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        if not len(values):
+            return self
+        distinct, counts = np.unique(values, return_counts=True)
+        self.total += len(values)
+        self._runs.append((distinct, counts.astype(np.int64)))
+        # keep run sizes decreasing, so there are O(log n) runs to merge
+        while len(self._runs) > 1 and len(self._runs[-2][0]) <= 2 * len(self._runs[-1][0]):
+            (a, a_counts), (b, b_counts) = self._runs[-2], self._runs.pop()
+            self._runs[-1] = _merge(np.concatenate([a, b]), np.concatenate([a_counts, b_counts]))
+        if self.memory_bytes > self.memory_limit:
+            self._spill()
+        return self
+
+    def _merged_runs(self):
+        if len(self._runs) == 1:
+            return self._runs[0]
+        return _merge(np.concatenate([values for values, _ in self._runs]),
+                      np.concatenate([counts for _, counts in self._runs]))
+
+    def _spill(self):
+        values, counts = self._merged_runs()
+        self._runs = []
+        if self._tmpdir is None:
+            self._tmpdir = tempfile.mkdtemp(prefix='counts-', dir=self.spill_dir)
+            self._cleanup = weakref.finalize(self, shutil.rmtree, self._tmpdir, ignore_errors=True)
+        path = os.path.join(self._tmpdir, f"run{self.spills:05d}")
+        with open(f"{path}.values", 'wb') as values_file, open(f"{path}.counts", 'wb') as counts_file:
+            for block_values, block_counts in self._merge_with_disk(values, counts):
+                values_file.write(block_values.tobytes())
+                counts_file.write(block_counts.tobytes())
+        old, self._disk = self._disk, (np.memmap(f"{path}.values", dtype=np.float64, mode='r'),
+                                       np.memmap(f"{path}.counts", dtype=np.int64, mode='r'))
+        if old is not None:
+            for run in old:
+                os.remove(run.filename)
+        self.spills += 1
+
+    def _merge_with_disk(self, values, counts):
+        # the spilled run and a sorted in-memory run, merged block by block in value order
+        if self._disk is None:
+            yield values, counts
+            return
+        disk_values, disk_counts = self._disk
+        start = 0
+        for i in range(0, len(disk_values), BLOCK):
+            block = np.asarray(disk_values[i:i + BLOCK])
+            last = i + BLOCK >= len(disk_values)
+            end = len(values) if last else int(np.searchsorted(values, block[-1], side='right'))
+            yield _merge(np.concatenate([block, values[start:end]]),
+                         np.concatenate([np.asarray(disk_counts[i:i + BLOCK]), counts[start:end]]))
+            start = end
+
+    def _blocks(self):
+        """Every counted value once, in sorted order, as (values, counts) blocks."""
+        if self._disk is None:
+            if self._runs:
+                self._runs = [self._merged_runs()]
+                yield self._runs[0]
+            return
+        if self._runs:
+            self._spill()
+        disk_values, disk_counts = self._disk
+        for i in range(0, len(disk_values), BLOCK):
+            yield np.asarray(disk_values[i:i + BLOCK]), np.asarray(disk_counts[i:i + BLOCK])
+
+    def __len__(self):
+        """Distinct values counted."""
+        return sum(len(values) for values, _ in self._blocks())
+
+    def kth(self, k):
+        """The ``k``-th smallest value counted (from 0)."""
+        seen = 0
+        for values, counts in self._blocks():
+            cum = np.cumsum(counts) + seen
+            if cum[-1] > k:
+                return float(values[np.searchsorted(cum, k, side='right')])
+            seen = int(cum[-1])
+        raise IndexError(k)
+
+    def mode(self):
+        """The most frequent value, the smallest one on ties."""
+        best, best_count = None, 0
+        for values, counts in self._blocks():
+            i = int(np.argmax(counts))
+            if counts[i] > best_count:
+                best, best_count = float(values[i]), int(counts[i])
+        return best
+
+    def close(self):
+        """Forget every count and delete the spill files."""
+        self._runs = []
+        self._disk = None
+        if self._cleanup is not None:
+            self._cleanup()
+            self._cleanup = self._tmpdir = None
@@ -0,0 +1,131 @@
+import os
+import shutil
+import tempfile
+import weakref
+
+import numpy as np
+import pandas as pd
+
+DEDUP_MEMORY_MB = 256  # row hashes kept in memory before spilling to disk
+SPILL_PARTITIONS = 16
+
+
+def row_hashes(df, subset_cols=None):
+    """64-bit fingerprint of every row (of ``subset_cols`` only, if given), vectorized."""
+    return pd.util.hash_pandas_object(df[subset_cols] if subset_cols else df, index=False).to_numpy()
+
+
+def _in_sorted(run, values):
+    """Membership of ``values`` in the sorted array ``run`` by binary search."""
+    if not len(run):
+        return np.zeros(len(values), dtype=bool)
+    pos = np.searchsorted(run, values).clip(max=len(run) - 1)
+    return run[pos] == values
+
+
+class RowHashSet:
+    """
+    Row fingerprints seen so far, for duplicate removal across chunks.
+
+    Hashes are kept as sorted ``uint64`` runs (8 bytes per distinct row)
+    that are merged as they grow. Once they take more than ``memory_mb``
+    they are spilled to ``partitions`` files on disk, split by hash, and
+    looked up there through memory maps, so only the pages that binary
+    search touches are read. Spill files live in a temporary directory
+    (under ``spill_dir`` or ``$TMPDIR``) removed by ``close``.
+
+    ``dump`` saves the hashes added so far as one sorted run file and
+    ``attach`` looks hashes up in such files again, memory-mapped, so a
+    later run can continue where an earlier one stopped.
+    """
+
+    def __init__(self, memory_mb=DEDUP_MEMORY_MB, spill_dir=None, partitions=SPILL_PARTITIONS):
+        self.memory_limit = int(memory_mb * 2**20)
+        self.spill_dir = spill_dir
+        self.partitions = partitions
+        self.size = 0
+        self.spills = 0
+        self._runs = []  # sorted in-memory arrays, largest first
+        self._spilled = [[] for _ in range(partitions)]  # memory-mapped sorted runs per partition
+        self._attached = []  # memory-mapped run files of earlier runs
+        self._tmpdir = None
+        self._cleanup = None
+
+    def __len__(self):
+        return self.size
+
+    def _contains(self, hashes):
+        found = np.zeros(len(hashes), dtype=bool)
+        for run in self._runs + self._attached:
+            found |= _in_sorted(run, hashes)
+        if self.spills:
+            part = hashes % np.uint64(self.partitions)
+            for p in np.unique(part).tolist():
+                rows = np.flatnonzero(part == p)
+                for run in self._spilled[p]:
+                    found[rows] |= _in_sorted(run, hashes[rows])
+        return found
+
+    def add(self, hashes):
+        """
+        Record ``hashes`` and return a boolean mask of the duplicates among
+        them: hashes seen in an earlier call or earlier in this one.
+        """
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        dupes = np.ones(len(hashes), dtype=bool)
+        dupes[np.unique(hashes, return_index=True)[1]] = False
+        dupes |= self._contains(hashes)
+        new = np.sort(hashes[~dupes])
+        if len(new):
+            self.size += len(new)
+            self._runs.append(new)
+            # keep run sizes decreasing, so there are O(log n) runs to search
+            while len(self._runs) > 1 and len(self._runs[-2]) <= 2 * len(self._runs[-1]):
+                last = self._runs.pop()
+                self._runs[-1] = np.sort(np.concatenate([self._runs[-1], last]), kind='stable')
+            if sum(run.nbytes for run in self._runs) > self.memory_limit:
+                self._spill()
+        return dupes
+
+    def _spill(self):
+        if self._tmpdir is None:
+            self._tmpdir = tempfile.mkdtemp(prefix='dedup-', dir=self.spill_dir)
+            self._cleanup = weakref.finalize(self, shutil.rmtree, self._tmpdir, ignore_errors=True)
+        merged = np.sort(np.concatenate(self._runs), kind='stable')
+        self._runs = []
+        part = merged % np.uint64(self.partitions)
+        for p in range(self.partitions):
+            run = merged[part == p]  # a subsequence of a sorted array stays sorted
+            if len(run):
+                path = os.path.join(self._tmpdir, f"part{p:03d}-{self.spills:05d}.u64")
+                run.tofile(path)
+                self._spilled[p].append(np.memmap(path, dtype=np.uint64, mode='r'))
+        self.spills += 1
+
+    def attach(self, path):
+        """Treat the hashes in the run file ``path`` (written by ``dump``) as seen."""
+        run = np.memmap(path, dtype=np.uint64, mode='r')
+        self._attached.append(run)
+        self.size += len(run)
+
+    def dump(self, path):
+        """
+        Write the hashes added since the set was created (not attached ones)
+        to ``path``, sorted, and return how many there were. Nothing is
+        written if there were none.
+        """
+        runs = self._runs + [run for part in self._spilled for run in part]
+        if not runs:
+            return 0
+        merged = np.sort(np.concatenate(runs))
+        merged.tofile(path)
+        return len(merged)
+
+    def close(self):
+        """Forget every hash and delete the spill files."""
+        self._runs = []
+        self._spilled = [[] for _ in range(self.partitions)]
+        self._attached = []
+        if self._cleanup is not None:
+            self._cleanup()
+            self._cleanup = self._tmpdir = None
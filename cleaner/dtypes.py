@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+
+from cleaner.formats import infer_format, iter_chunks, read_table, _compression
+from cleaner.stages import CATEGORICAL_CARDINALITY, is_text
+
+SAMPLE_ROWS = 100_000
+
+
+def sample_table(path, fmt=None, columns=None, rows=SAMPLE_ROWS):
+    """The first ``rows`` rows of a file, read with the default dtypes."""
+    if infer_format(path, fmt) == 'csv':
+        return pd.read_csv(path, nrows=rows, usecols=columns, compression=_compression(path))
+    return next(iter_chunks(path, rows, fmt, columns), pd.DataFrame(columns=columns or []))
+
+
+def text_dtypes(sample, arrow_strings=False):
+    """
+    Reader dtypes for the text columns of ``sample``: ``category`` when they
+    have fewer than 10 distinct values (the auto-categorical rule of
+    ``detect_columns``), otherwise Arrow-backed strings if ``arrow_strings``.
+    Only text dtypes are decided from the sample; they hold any value, so a
+    sample that is not representative costs memory, never correctness.
+    """
+    dtypes = {}
+    for col in sample.columns:
+        if not is_text(sample[col]):
+            continue
+        if sample[col].nunique() < CATEGORICAL_CARDINALITY:
+            dtypes[col] = 'category'
+        elif arrow_strings:
+            dtypes[col] = 'string[pyarrow]'
+    return dtypes
+
+
+def downcast_numeric(series):
+    """
+    Narrowest dtype that holds every value of ``series`` exactly: the
+    smallest integer type covering its range, and float32 for floats only
+    when the round trip is lossless.
+    """
+    if series.dtype.kind == 'i':
+        return pd.to_numeric(series, downcast='integer')
+    if series.dtype == 'float64':
+        narrow = series.astype('float32')
+        if np.array_equal(narrow.to_numpy(dtype=np.float64), series.to_numpy(), equal_nan=True):
+            return narrow
+    return series
+
+
+def read_lean(path, fmt=None, columns=None, sample_rows=SAMPLE_ROWS, arrow_strings=False, dtype=None):
+    """
+    Read a file with memory-lean dtypes. Text dtypes from a sample are passed
+    to the reader; numeric columns are narrowed after loading, because the
+    CSV parser silently wraps integers that overflow a dtype picked from a
+    sample. ``dtype`` (e.g. from a schema file) fixes the dtype of its
+    columns instead. Returns the frame and ``{col: (dtype, bytes)}``
+    before/after per column, where "before" is estimated from the sample at
+    default dtypes.
+    """
+    sample = sample_table(path, fmt, columns, sample_rows)
+    fixed = dtype or {}
+    df = read_table(path, fmt, columns=columns, dtype={**text_dtypes(sample, arrow_strings), **fixed})
+    for col in df.select_dtypes(include='number').columns:
+        if col not in fixed:
+            df[col] = downcast_numeric(df[col])
+
+    sample_bytes = sample.memory_usage(deep=True, index=False)
+    after_bytes = df.memory_usage(deep=True, index=False)
+    memory = {}
+    for col in df.columns:
+        before = sample_bytes[col] / len(sample) * len(df) if len(sample) else 0
+        memory[col] = ((str(sample[col].dtype), int(before)), (str(df[col].dtype), int(after_bytes[col])))
+    return df, memory
@@ -0,0 +1,253 @@
+import io
+import os
+
+import pandas as pd
+
+# pyarrow is only needed for Parquet/Feather and is imported where it is used.
+
+FORMATS = ('csv', 'parquet', 'feather')
+FORMAT_ALIASES = {'arrow': 'feather', 'ipc': 'feather'}
+FORMAT_EXTENSIONS = {'.csv': 'csv', '.txt': 'csv', '.parquet': 'parquet', '.pq': 'parquet',
+                     '.feather': 'feather', '.arrow': 'feather', '.ipc': 'feather'}
+COMPRESSION_EXTENSIONS = {'.gz': 'gzip', '.bz2': 'bz2', '.xz': 'xz', '.zst': 'zstd', '.zstd': 'zstd'}
+OUTPUT_EXTENSIONS = {'csv': '.csv', 'parquet': '.parquet', 'feather': '.feather'}
+
+
+def _split_ext(path):
+    """Return (stem, format extension, compression extension), e.g. ('a', '.csv', '.gz')."""
+    root, ext = os.path.splitext(os.path.basename(path))
+    compression_ext = ''
+    if ext.lower() in COMPRESSION_EXTENSIONS:
+        compression_ext = ext
+        root, ext = os.path.splitext(root)
+    return root, ext, compression_ext
+
+
+def base_name(path):
+    """File name without format and compression extensions."""
+    root, ext, _ = _split_ext(path)
+    return root if ext.lower() in FORMAT_EXTENSIONS else root + ext
+
+
+def is_data_file(path):
+    return _split_ext(path)[1].lower() in FORMAT_EXTENSIONS
+
+
+def infer_format(path, fmt=None):
+    """Explicit ``fmt`` wins; otherwise go by extension, defaulting to CSV."""
+    if fmt:
+        fmt = FORMAT_ALIASES.get(fmt, fmt)
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown format '{fmt}' (expected one of {', '.join(FORMATS)})")
+        return fmt
+    return FORMAT_EXTENSIONS.get(_split_ext(path)[1].lower(), 'csv')
+
+
+def _compression(path):
+    return COMPRESSION_EXTENSIONS.get(_split_ext(path)[2].lower())
+
+
+def is_plain_csv(path, fmt=None):
+    """Uncompressed CSV: the only format whose rows sit at byte offsets."""
+    return infer_format(path, fmt) == 'csv' and not _compression(path)
+
+
+def _match_dtypes(chunk, dtype):
+    # Arrow chunks come back int64 or float64 depending on whether that chunk
+    # has nulls; cast to the file-wide dtype so every chunk looks the same.
+    casts = {col: target for col, target in dtype.items()
+             if col in chunk.columns and chunk[col].dtype != target
+             and (target in ('int64', 'float64') or chunk[col].dtype == 'bool')}
+    return chunk.astype(casts) if casts else chunk
+
+
+def read_columns(path, fmt=None):
+    """Column names of a file, from its header line or schema; no rows are read."""
+    fmt = infer_format(path, fmt)
+    if fmt == 'csv':
+        return pd.read_csv(path, nrows=0, compression=_compression(path)).columns.tolist()
+    import pyarrow.ipc
+    import pyarrow.parquet
+
+    if fmt == 'parquet':
+        return pyarrow.parquet.read_schema(path).names
+    return pyarrow.ipc.open_file(path).schema.names
+
+
+def read_table(path, fmt=None, columns=None, dtype=None):
+    """
+    Read a whole file. ``columns`` projects on read, so unused columns are
+    never loaded; ``dtype`` maps columns to the dtypes they are read as
+    (Parquet and Feather columns are cast after reading).
+    """
+    fmt = infer_format(path, fmt)
+    if fmt == 'parquet':
+        df = pd.read_parquet(path, columns=columns)
+    elif fmt == 'feather':
+        df = pd.read_feather(path, columns=columns)
+    else:
+        df = pd.read_csv(path, usecols=columns, dtype=dtype, compression=_compression(path))
+    if dtype and fmt != 'csv':
+        df = df.astype({col: target for col, target in dtype.items() if col in df and df[col].dtype != target})
+    return df[columns] if columns else df
+
+
+class ByteRange(io.RawIOBase):
+    """
+    Bytes ``[start, end)`` of a plain CSV file as a readable stream, after
+    the file's header line when ``start`` is past it, so ``pd.read_csv``
+    sees a complete table.
+    """
+
+    def __init__(self, path, start, end):
+        self._file = open(path, 'rb')
+        header = self._file.readline()
+        self._prefix = header if start >= len(header) else b''
+        self._file.seek(start)
+        self._left = end - start
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self._prefix:
+            n = min(len(buffer), len(self._prefix))
+            buffer[:n] = self._prefix[:n]
+            self._prefix = self._prefix[n:]
+            return n
+        n = self._file.readinto(memoryview(buffer)[:min(len(buffer), self._left)])
+        self._left -= n
+        return n
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+def iter_chunks(path, chunksize, fmt=None, columns=None, dtype=None, byte_range=None):
+    """
+    Yield DataFrames of at most ``chunksize`` rows, reading only ``columns``.
+    ``byte_range`` (start, end) reads only those bytes of a plain CSV file,
+    which must start and end on line boundaries.
+    """
+    if byte_range is not None and not is_plain_csv(path, fmt):
+        raise ValueError(f"Byte ranges need a plain CSV file, not {os.path.basename(path)}")
+    fmt = infer_format(path, fmt)
+    if fmt == 'csv':
+        source = io.BufferedReader(ByteRange(path, *byte_range)) if byte_range is not None else path
+        try:
+            for chunk in pd.read_csv(source, chunksize=chunksize, usecols=columns, dtype=dtype,
+                                     compression=None if byte_range is not None else _compression(path)):
+                yield chunk[columns] if columns else chunk
+        finally:
+            if byte_range is not None:
+                source.close()
+        return
+
+    import pyarrow.ipc
+    import pyarrow.parquet
+
+    if fmt == 'parquet':
+        batches = pyarrow.parquet.ParquetFile(path).iter_batches(batch_size=chunksize, columns=columns)
+    else:
+        reader = pyarrow.ipc.open_file(path)
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+    for batch in batches:
+        if columns and fmt == 'feather':
+            batch = batch.select(columns)
+        for offset in range(0, batch.num_rows, chunksize):
+            chunk = batch.slice(offset, chunksize).to_pandas()
+            yield _match_dtypes(chunk, dtype) if dtype else chunk
+
+
+def densify(df):
+    """Sparse columns (sparse one-hot output) as dense ones; Arrow cannot store pandas sparse data."""
+    sparse = [col for col, dtype in df.dtypes.items() if isinstance(dtype, pd.SparseDtype)]
+    if not sparse:
+        return df
+    return df.astype({col: df[col].dtype.subtype for col in sparse})
+
+
+def write_table(df, path, fmt=None, bundle=None):
+    """
+    Write a whole frame. With ``bundle`` (a ``cleaner.bundle.Bundle``) the
+    file also goes into the bundle: plain CSV while it is written, other
+    formats once finished.
+    """
+    fmt = infer_format(path, fmt)
+    if bundle is not None and is_plain_csv(path, fmt):
+        with bundle.open_csv(path) as f:
+            df.to_csv(f, index=False)
+        return
+    if fmt == 'parquet':
+        densify(df).to_parquet(path, index=False)
+    elif fmt == 'feather':
+        densify(df).reset_index(drop=True).to_feather(path)
+    else:
+        df.to_csv(path, index=False, compression=_compression(path))
+    if bundle is not None:
+        bundle.add_file(path)
+
+
+class TableWriter:
+    """
+    Append DataFrame chunks to one output file. CSV chunks are appended
+    (compressed CSV becomes a multi-member gzip/zstd stream, which readers
+    treat as one file); Parquet and Feather chunks go through one pyarrow
+    writer using the schema of the first chunk. ``append=True`` adds rows
+    to an existing CSV file without writing the header again. With
+    ``bundle`` the file also goes into that ``cleaner.bundle.Bundle``, as
+    in ``write_table`` (appended files are copied whole once closed).
+    """
+
+    def __init__(self, path, fmt=None, append=False, bundle=None):
+        self.path = path
+        self.fmt = infer_format(path, fmt)
+        if append and self.fmt != 'csv':
+            raise ValueError(f"Only CSV output can be appended to, not {os.path.basename(path)}")
+        self.rows = 0
+        self.bundle = bundle
+        self._writer = None
+        self._schema = None
+        self._started = append
+        streamed = bundle is not None and not append and is_plain_csv(path, self.fmt)
+        self._handle = bundle.open_csv(path) if streamed else None
+
+    def write(self, chunk):
+        if self._handle is not None:
+            chunk.to_csv(self._handle, header=not self._started, index=False)
+        elif self.fmt == 'csv':
+            chunk.to_csv(self.path, mode='a' if self._started else 'w', header=not self._started,
+                         index=False, compression=_compression(self.path))
+        else:
+            import pyarrow
+
+            table = pyarrow.Table.from_pandas(densify(chunk), preserve_index=False)
+            if self._writer is None:
+                import pyarrow.ipc
+                import pyarrow.parquet
+
+                self._schema = table.schema
+                if self.fmt == 'parquet':
+                    self._writer = pyarrow.parquet.ParquetWriter(self.path, self._schema)
+                else:
+                    self._writer = pyarrow.ipc.new_file(self.path, self._schema)
+            self._writer.write_table(table.cast(self._schema))
+        self._started = True
+        self.rows += len(chunk)
+
+    def close(self, columns=()):
+        """Finish the file; with no chunks written, write an empty table with ``columns``."""
+        if self._handle is not None:
+            if not self._started:
+                pd.DataFrame(columns=list(columns)).to_csv(self._handle, index=False)
+            self._handle.close()
+            self._handle = None
+            return
+        if not self._started:
+            write_table(pd.DataFrame(columns=list(columns)), self.path, self.fmt)
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self.bundle is not None:
+            self.bundle.add_file(self.path)
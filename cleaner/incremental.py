@@ -0,0 +1,211 @@
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+
+import numpy as np
+
+from cleaner.formats import infer_format, is_plain_csv, iter_chunks, TableWriter
+from cleaner.metrics import StageMetrics
+from cleaner.report import (report_header, report_incremental, report_stages, report_final_shape,
+                            report_performance, write_report)
+from cleaner.stream import clean_data_chunked
+
+STATE_VERSION = 1
+CHECK_BYTES = 2**16  # checksummed at the start of the input and before the resume offset
+MAX_HASH_RUNS = 8  # dedup hash files kept before they are merged into one
+
+
+def state_dir(output_path):
+    return output_path + '.state'
+
+
+def complete_length(path):
+    """Bytes of ``path`` up to its last newline: the rows a writer has finished."""
+    with open(path, 'rb') as f:
+        end = f.seek(0, os.SEEK_END)
+        while end > 0:
+            block = min(end, CHECK_BYTES)
+            f.seek(end - block)
+            newline = f.read(block).rfind(b'\n')
+            if newline >= 0:
+                return end - block + newline + 1
+            end -= block
+    return 0
+
+
+def _checksum(path, start, end):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        return hashlib.sha256(f.read(end - start)).hexdigest()
+
+
+def fingerprint(path, end):
+    """Checksums of the first and the last ``CHECK_BYTES`` of the first ``end`` bytes."""
+    return {'head': _checksum(path, 0, min(end, CHECK_BYTES)),
+            'tail': _checksum(path, max(0, end - CHECK_BYTES), end)}
+
+
+def load_state(directory):
+    path = os.path.join(directory, 'state.json')
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_state(directory, state):
+    # written to a temporary file first, so a crash never leaves half a state
+    path = os.path.join(directory, 'state.json')
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2, default=lambda value: value.item())
+    os.replace(path + '.tmp', path)
+
+
+def run_settings(plan, input_path, columns, output_format, sketch_k):
+    """What a saved state is only valid for: the input, the plan as given and the output layout."""
+    settings = {'input': os.path.abspath(input_path), 'plan': plan.to_dict(), 'columns': columns,
+                'output_format': output_format, 'sketch_k': sketch_k}
+    return json.loads(json.dumps(settings, default=lambda value: value.item()))
+
+
+def rebuild_reason(state, settings, input_path, output_path, end):
+    """Why the output has to be rebuilt from scratch, or None if new rows can be appended."""
+    if state is None:
+        return 'no saved state'
+    if state.get('version') != STATE_VERSION:
+        return 'state written by another version'
+    if state['settings'] != settings:
+        return 'cleaning options changed'
+    if end < state['offset']:
+        return 'input file shrank'
+    if fingerprint(input_path, state['offset']) != state['fingerprint']:
+        return 'input changed before the last processed row'
+    if not os.path.exists(output_path) or os.path.getsize(output_path) != state['output_bytes']:
+        return 'output file changed'
+    return None
+
+
+def _save_hashes(plan, directory, state):
+    """Add the row hashes of this run as one more run file, merging the files past ``MAX_HASH_RUNS``."""
+    if not plan.drop_duplicates:
+        return
+    name = f"hashes-{state['next_run']:05d}.u64"
+    if plan.seen.dump(os.path.join(directory, name)):
+        state['hash_runs'].append(name)
+        state['next_run'] += 1
+    plan.seen.close()
+    if len(state['hash_runs']) > MAX_HASH_RUNS:
+        old = state['hash_runs']
+        merged = np.sort(np.concatenate([np.fromfile(os.path.join(directory, run), dtype=np.uint64)
+                                         for run in old]))
+        name = f"hashes-{state['next_run']:05d}.u64"
+        merged.tofile(os.path.join(directory, name))
+        state['hash_runs'] = [name]
+        state['next_run'] += 1
+        save_state(directory, state)
+        for run in old:
+            os.remove(os.path.join(directory, run))
+
+
+def clean_data_incremental(plan, input_path, output_path, validate_cols, report_path, logger,
+                           chunksize=100_000, state_path=None, input_format=None, output_format=None,
+                           columns=None, duplicates_path=None, metrics=None, sketch_k=None):
+    """
+    Clean a CSV file that only grows by appending the rows added since the
+    last run to ``output_path``.
+
+    The state directory (``state_path``, default ``<output>.state``) keeps
+    the byte offset and row count processed so far, the fitted statistics,
+    the file-wide dtypes and the dedup row hashes (sorted ``uint64`` run
+    files, memory-mapped on the next run). A run reads only the bytes past
+    the offset, so its cost follows the size of the new data. A trailing
+    line without a newline is left for the next run.
+
+    The first run, and any run after the options, the output or the input
+    before the offset changed (checked through its length and checksums of
+    its first and last ``CHECK_BYTES``), is a full chunked build that
+    refits the statistics. New rows are cleaned with the statistics of the
+    last full build, as with ``--apply-plan``, so rows already written stay
+    valid. Column validation runs on full builds only.
+    """
+    if not is_plain_csv(input_path, input_format) or infer_format(output_path, output_format) != 'csv':
+        raise ValueError("Incremental runs need an uncompressed CSV input and a CSV output")
+    metrics = metrics or StageMetrics()
+    directory = state_path or state_dir(output_path)
+    end = complete_length(input_path)
+    settings = run_settings(plan, input_path, columns, output_format, sketch_k)
+    state = load_state(directory)
+    reason = rebuild_reason(state, settings, input_path, output_path, end)
+
+    if reason is None:
+        try:
+            return _append(plan, state, directory, input_path, output_path, report_path, logger, chunksize,
+                           end, validate_cols, input_format, output_format, columns, duplicates_path, metrics)
+        except ValueError as e:
+            # a value that doesn't fit the saved dtypes (text in a numeric column,
+            # a null in an integer one): the types a full read infers have changed
+            os.truncate(output_path, state['output_bytes'])
+            plan.params = settings['plan']['params']
+            reason = f"new rows change the column types ({e})"
+
+    logger.info(f"Full rebuild of {output_path}: {reason}")
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory)
+    clean_data_chunked(plan, input_path, output_path, validate_cols, report_path, logger, chunksize,
+                       input_format=input_format, output_format=output_format, columns=columns,
+                       duplicates_path=duplicates_path, metrics=metrics, sketch_k=sketch_k,
+                       byte_range=(0, end))
+    (rows, _), (output_rows, _) = plan.last_run['shapes']
+    state = {'version': STATE_VERSION, 'settings': settings, 'built': datetime.now().isoformat(timespec='seconds'),
+             'offset': end, 'fingerprint': fingerprint(input_path, end), 'rows': rows,
+             'output_rows': output_rows, 'output_bytes': os.path.getsize(output_path),
+             'dtypes': plan.last_run['dtypes'], 'params': plan.params, 'hash_runs': [], 'next_run': 0}
+    _save_hashes(plan, directory, state)
+    save_state(directory, state)
+    logger.info(f"Saved incremental state to {directory}")
+    return plan
+
+
+def _append(plan, state, directory, input_path, output_path, report_path, logger, chunksize, end,
+            validate_cols, input_format, output_format, columns, duplicates_path, metrics):
+    start = state['offset']
+    plan.params = state['params']
+    plan.reset_run()
+    for run in state['hash_runs']:
+        plan.seen.attach(os.path.join(directory, run))
+    if validate_cols:
+        logger.warning("Column validation is skipped when rows are only appended; it runs on full builds")
+
+    dtypes = state['dtypes']
+    rows = 0
+    output_columns = list(dtypes)
+    writer = TableWriter(output_path, output_format, append=True, bundle=plan.bundle)
+    with plan.collect_duplicates(duplicates_path, list(dtypes)):
+        chunks = metrics.iterate('read', iter_chunks(input_path, chunksize, input_format, columns, dtypes,
+                                                     (start, end)))
+        for chunk in chunks:
+            rows += len(chunk)
+            chunk = plan.transform(chunk, logger, chunked=True, metrics=metrics)
+            output_columns = chunk.columns.tolist()
+            with metrics.stage('write', len(chunk)):
+                writer.write(chunk)
+    writer.close()
+
+    state.update(offset=end, fingerprint=fingerprint(input_path, end), rows=state['rows'] + rows,
+                 output_rows=state['output_rows'] + writer.rows, output_bytes=os.path.getsize(output_path))
+    _save_hashes(plan, directory, state)
+    save_state(directory, state)
+
+    report_lines = []
+    report_header(report_lines, input_path, output_path, (rows, len(dtypes)), logger)
+    report_incremental(report_lines, start, end, rows, writer.rows, state, logger)
+    report_stages(report_lines, plan, logger)
+    logger.info(f"Appended {writer.rows} cleaned rows to {output_path}")
+    report_final_shape(report_lines, (writer.rows, len(output_columns)))
+    plan.last_run['shapes'] = ((rows, len(dtypes)), (writer.rows, len(output_columns)))
+    plan.last_run['dtypes'] = dtypes
+    report_performance(report_lines, metrics.to_dict(), logger)
+    write_report(report_lines, report_path, logger)
+    return plan
@@ -1,12 +1,13 @@
 import logging
 
 
-def setup_logger(log_path):
+def setup_logger(log_path, name='clean_logger'):
     """
     Create a logger that writes INFO-level logs to a file.
     Useful for tracking what operations the script performed.
+    Pass a distinct ``name`` when several files are logged from one process.
     """
-    logger = logging.getLogger('clean_logger')  # Unique logger name
+    logger = logging.getLogger(name)  # Unique logger name
     logger.setLevel(logging.INFO)  # Log all info and above (no debug)
 
     handler = logging.FileHandler(log_path)  # Log to file
@@ -15,3 +16,13 @@ def setup_logger(log_path):
 
     logger.addHandler(handler)
     return logger
+
+
+def log_files(logger):
+    """Paths of the files ``logger`` writes to, flushed so they hold everything logged so far."""
+    paths = []
+    for handler in logger.handlers:
+        if isinstance(handler, logging.FileHandler):
+            handler.flush()
+            paths.append(handler.baseFilename)
+    return paths
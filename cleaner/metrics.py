@@ -0,0 +1,140 @@
+import cProfile
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+MB = 2**20
+
+
+def current_rss():
+    """Resident set size of this process in bytes, or None where it cannot be read."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def peak_rss():
+    """Highest resident set size of this process so far, in bytes, or None."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset
+        except (ImportError, AttributeError):
+            return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024  # bytes on macOS, KiB elsewhere
+
+
+def _mb(size):
+    return None if size is None else round(size / MB, 2)
+
+
+class StageMetrics:
+    """
+    Wall time, CPU time, rows and memory for each stage of one run.
+
+    Stages with the same name accumulate, so chunked runs report each stage
+    once, summed over chunks. RSS is read after each stage; the process peak
+    RSS only shows which stage raised the high-water mark. With
+    ``trace_memory`` tracemalloc also records the peak of Python allocations
+    within each stage (slower). With ``profile_dir`` every stage gets its own
+    cProfile, written there as ``<stage>.prof`` by ``close``.
+    """
+
+    def __init__(self, trace_memory=False, profile_dir=None):
+        self.trace_memory = trace_memory
+        self.profile_dir = profile_dir
+        self.stages = {}
+        self._profiles = {}
+        self._started_tracing = False
+        self._start = time.perf_counter()
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        """
+        Measure the block as stage ``name``. ``rows`` is the row count going
+        in; the block sets ``rows_out`` on the yielded dict, and ``calls`` to 0
+        when it turned out to do no work.
+        """
+        record = self.stages.setdefault(name, {'stage': name, 'calls': 0, 'seconds': 0.0,
+                                               'cpu_seconds': 0.0, 'rows_in': None, 'rows_out': None,
+                                               'rss_mb': None, 'peak_rss_mb': None, 'traced_peak_mb': None})
+        run = {'rows_out': rows, 'calls': 1}
+        profile = self._profiles.setdefault(name, cProfile.Profile()) if self.profile_dir else None
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        wall, cpu = time.perf_counter(), time.process_time()
+        if profile:
+            profile.enable()
+        try:
+            yield run
+        finally:
+            if profile:
+                profile.disable()
+            record['calls'] += run['calls']
+            record['seconds'] += time.perf_counter() - wall
+            record['cpu_seconds'] += time.process_time() - cpu
+            for key, count in (('rows_in', rows), ('rows_out', run['rows_out'])):
+                if count is not None:
+                    record[key] = (record[key] or 0) + count
+            record['rss_mb'] = _mb(current_rss())
+            record['peak_rss_mb'] = _mb(peak_rss())
+            if self.trace_memory:
+                traced = _mb(tracemalloc.get_traced_memory()[1])
+                record['traced_peak_mb'] = max(record['traced_peak_mb'] or 0, traced)
+
+    def iterate(self, name, iterable):
+        """Yield from ``iterable``, measuring the time spent producing each item as stage ``name``."""
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name) as run:
+                item = next(iterator, StopIteration)
+                if item is StopIteration:
+                    run['calls'] = 0
+                else:
+                    run['rows_out'] = len(item)
+            if item is StopIteration:
+                return
+            yield item
+
+    def to_dict(self):
+        stages = [dict(record, seconds=round(record['seconds'], 6),
+                       cpu_seconds=round(record['cpu_seconds'], 6)) for record in self.stages.values()]
+        return {'total_seconds': round(time.perf_counter() - self._start, 6),
+                'peak_rss_mb': _mb(peak_rss()), 'stages': stages}
+
+    def save(self, path, **info):
+        """Write the metrics, plus ``info`` (input, output, mode...), as JSON."""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({**info, **self.to_dict()}, f, indent=2)
+
+    def close(self):
+        """Stop tracing and write the per-stage profiles."""
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        if self.profile_dir:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            for name, profile in self._profiles.items():
+                profile.dump_stats(os.path.join(self.profile_dir, f"{name}.prof"))
+
+
+def measure(metrics, name, rows=None):
+    """``metrics.stage(...)`` when metrics are collected, otherwise a no-op block."""
+    return metrics.stage(name, rows) if metrics is not None else nullcontext({'rows_out': None, 'calls': 1})
@@ -0,0 +1,97 @@
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+MB = 2**20
+
+
+def float_view(df, col):
+    """
+    The writable float64 array behind column ``col``, or None when pandas
+    cannot lend one (another dtype, a read-only buffer, copy-on-write mode).
+    Writing into it changes the frame without allocating a new column.
+    """
+    series = df[col]
+    if series.dtype != np.float64:
+        return None
+    values = series.to_numpy()
+    return values if values.flags.writeable else None
+
+
+def _frame(df, arrays, index):
+    # a new frame around the given column arrays, without copying them
+    frame = pd.DataFrame(dict(enumerate(arrays)), index=index, copy=False)
+    frame.columns = df.columns
+    return frame
+
+
+def memmap_numeric(df, directory=None):
+    """
+    Move the float64 columns of ``df`` into one memory-mapped file in
+    ``directory`` (default: the temp directory), laid out column by column.
+    The file is unlinked at once and disappears with the last view of it;
+    the OS pages it out under memory pressure instead of swapping. Returns
+    the new frame, whose float columns are views into the map, and the
+    mapped bytes.
+    """
+    positions = [i for i, dtype in enumerate(df.dtypes) if dtype == np.float64]
+    if not positions or not len(df):
+        return df, 0
+    with tempfile.TemporaryFile(dir=directory) as f:
+        buffer = np.memmap(f, dtype=np.float64, mode='w+', shape=(len(positions), len(df)))
+    arrays = [df.iloc[:, i].array for i in range(df.shape[1])]
+    for j, i in enumerate(positions):
+        buffer[j] = arrays[i]
+        arrays[i] = buffer[j]
+    return _frame(df, arrays, df.index), buffer.nbytes
+
+
+def compact_rows(df, keep):
+    """
+    ``df.take(np.flatnonzero(keep))`` without copying the frame: the kept
+    rows of each NumPy-backed column move to the front of its own array,
+    which is then truncated (a view); other columns are taken one at a
+    time. Extra memory is one column, instead of the kept frame.
+    """
+    rows = np.flatnonzero(keep)
+    arrays = []
+    for i in range(df.shape[1]):
+        series = df.iloc[:, i]
+        values = series.to_numpy() if isinstance(series.dtype, np.dtype) else None
+        if values is not None and values.flags.writeable:
+            values[:len(rows)] = values[rows]
+            arrays.append(values[:len(rows)])
+        else:
+            arrays.append(series.array.take(rows))
+    return _frame(df, arrays, df.index.take(rows))
+
+
+def stage_copies(stage, df, cols, rows):
+    """
+    Bytes of the largest temporary copy ``stage`` makes of ``cols`` with
+    ``rows`` rows, as (in place, regular path). The regular path fills one
+    new column at a time, tests outliers and scales over a matrix of all
+    target columns (scaling also assigns new columns) and compacts by
+    copying the kept frame. In place, float64 columns are written through
+    (a null mask for fill) and everything else costs one column.
+    """
+    cols = [col for col in cols if col in df.columns]
+    copied = [col for col in cols if float_view(df, col) is None]
+    column = rows * 8
+    if stage == 'fill':
+        return (column if copied else rows), (column if cols else 0)
+    if stage == 'outliers':
+        return (column if cols else 0), column * len(cols)
+    if stage == 'normalize':
+        return 2 * column * len(copied), 2 * column * len(cols)
+    # compaction: arrays only, the strings object columns point to are shared
+    usage = df.memory_usage(deep=False)
+    scale = rows / len(df) if len(df) else 0
+    return int(usage.iloc[1:].max() * scale) if len(usage) > 1 else 0, int(usage.sum() * scale)
+
+
+def record_copies(run, stage, copies):
+    """Keep the largest copies of ``stage`` seen so far in ``run['in_place']``, in MB."""
+    seen = run['in_place']['copies'].get(stage, (0, 0))
+    run['in_place']['copies'][stage] = tuple(max(old, round(size / MB, 2)) for old, size in zip(seen, copies))
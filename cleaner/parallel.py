@@ -0,0 +1,26 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+def map_columns(func, items, threads=None):
+    """
+    ``[func(item) for item in items]`` on up to ``threads`` worker threads.
+    Results come back in the order of ``items`` whichever thread finishes
+    first, so callers merge them (and log) exactly as a serial loop would.
+    Threads only pay off where the work releases the GIL: NumPy kernels,
+    Arrow compute and pandas' numeric paths.
+    """
+    items = list(items)
+    if not threads or threads < 2 or len(items) < 2:
+        return [func(item) for item in items]
+    with ThreadPoolExecutor(min(threads, len(items))) as pool:
+        return list(pool.map(func, items))
+
+
+def column_blocks(cols, threads=None):
+    """``cols`` cut into at most ``threads`` contiguous blocks of near-equal size."""
+    cols = list(cols)
+    if not threads or threads < 2 or len(cols) < 2:
+        return [cols]
+    return [cols[block[0]:block[-1] + 1] for block in np.array_split(np.arange(len(cols)), threads) if len(block)]
@@ -0,0 +1,202 @@
+from cleaner.dtypes import sample_table
+from cleaner.stages import UNICODE_FORMS, detect_columns, split_cols
+
+# Pipeline order of the steps: the order their statistics are fitted in.
+# Steps can be listed in any order (e.g. under "steps" in templates.json);
+# they always run in this one, so rows are filtered before encoding.
+STAGES = ('strip', 'fill', 'dedup', 'outliers', 'encode', 'normalize')
+
+# Steps that drop rows; the others map column values row by row.
+ROW_FILTERS = ('dedup', 'outliers')
+
+# Keys of each step and the CleaningPlan option they set.
+STEP_OPTIONS = {
+    'strip': {'casefold': 'casefold', 'unicode': 'unicode_form'},
+    'fill': {'method': 'fill_method'},
+    'dedup': {'columns': 'duplicate_cols'},
+    'outliers': {'method': 'outlier_method', 'columns': 'outlier_cols'},
+    'encode': {'method': 'encode_method', 'columns': 'encode_cols', 'max_categories': 'max_categories',
+               'sparse': 'onehot_sparse'},
+    'normalize': {'method': 'normalize_method', 'columns': 'normalize_cols'},
+}
+
+# Steps switched on by a flag rather than by a method.
+STEP_FLAGS = {'strip': 'strip_whitespace', 'dedup': 'drop_duplicates'}
+
+# Flat template keys used by the GUI presets.
+TEMPLATE_KEYS = {'fill_method': 'fill_method', 'outlier_method': 'outlier_method',
+                 'normalize_method': 'normalize_method', 'encoding_method': 'encode_method'}
+
+
+def plan_steps(plan):
+    """The enabled steps of a ``CleaningPlan`` as declarative step dicts, in pipeline order."""
+    steps = []
+    for stage in STAGES:
+        if not plan.enabled(stage):
+            continue
+        step = {'step': stage}
+        for key, option in STEP_OPTIONS[stage].items():
+            value = getattr(plan, option)
+            if key == 'columns':
+                value = split_cols(value)
+            if value:
+                step[key] = value
+        steps.append(step)
+    return steps
+
+
+def options_from_steps(steps):
+    """
+    ``CleaningPlan`` options for a list of steps; steps that are not listed
+    are switched off. Raises ``ValueError`` for unknown steps or keys.
+    """
+    options = {option: None for keys in STEP_OPTIONS.values() for option in keys.values()}
+    options.update({option: False for option in STEP_FLAGS.values()})
+    options['onehot_sparse'] = False
+    options['casefold'] = False
+    for step in steps:
+        stage = step.get('step')
+        if stage not in STEP_OPTIONS:
+            raise ValueError(f"Unknown cleaning step {stage!r}; expected one of {', '.join(STAGES)}")
+        unknown = set(step) - set(STEP_OPTIONS[stage]) - {'step'}
+        if unknown:
+            raise ValueError(f"Unknown option(s) for step '{stage}': {', '.join(sorted(unknown))}")
+        if stage == 'strip' and step.get('unicode') not in (None, *UNICODE_FORMS):
+            raise ValueError(f"Step 'strip' needs a unicode form among {', '.join(UNICODE_FORMS)}")
+        if stage in STEP_FLAGS:
+            options[STEP_FLAGS[stage]] = True
+        elif not step.get('method'):
+            raise ValueError(f"Step '{stage}' needs a method")
+        for key, option in STEP_OPTIONS[stage].items():
+            if key in step:
+                value = step[key]
+                options[option] = ','.join(value) if key == 'columns' and not isinstance(value, str) else value
+    return options
+
+
+def options_from_template(template):
+    """``CleaningPlan`` options for a ``templates.json`` entry: a ``"steps"`` list or flat GUI keys."""
+    if 'steps' in template:
+        return options_from_steps(template['steps'])
+    options = options_from_steps([])
+    options.update({option: template[key] for key, option in TEMPLATE_KEYS.items() if key in template})
+    return options
+
+
+def optimize(steps, stop=None):
+    """
+    Group ``steps`` for execution: pipeline order, steps from ``stop`` on left
+    out, consecutive steps of the same kind in one group. Returns a list of
+    (kind, [stage, ...]). Row filters ('filter') in one group combine their
+    masks and materialize the frame once; elementwise steps ('map') rewrite
+    columns in place.
+    """
+    stages = [stage for stage in STAGES if any(step['step'] == stage for step in steps)]
+    if stop is not None:
+        stages = stages[:len([stage for stage in stages if STAGES.index(stage) < STAGES.index(stop)])]
+    groups = []
+    for stage in stages:
+        kind = 'filter' if stage in ROW_FILTERS else 'map'
+        if groups and groups[-1][0] == kind:
+            groups[-1][1].append(stage)
+        else:
+            groups.append((kind, [stage]))
+    return groups
+
+
+def required_columns(plan, columns, stop, targets, fitted=None):
+    """
+    Columns a statistics pass has to read: the summarized ``targets`` plus
+    whatever the steps before ``stop`` look at. Full-row dedup needs every
+    column; strip and fill only rewrite the columns they read. ``fitted``
+    gives the outlier and encoding columns when the plan has no parameters
+    yet (default: ``plan.params``).
+    """
+    if plan.drop_duplicates and not plan.subset_cols:
+        return columns
+    fitted = plan.params if fitted is None else fitted
+    needed = set(targets)
+    if plan.drop_duplicates:
+        needed.update(plan.subset_cols)
+    if plan.outlier_method and STAGES.index(stop) > STAGES.index('outliers'):
+        needed.update(fitted['outliers'])
+    if plan.encode_method and STAGES.index(stop) > STAGES.index('encode'):
+        needed.update(fitted['encode'])
+    return [col for col in columns if col in needed]
+
+
+def shared_normalize_pass(plan, columns, targets):
+    """
+    Whether a streaming run collects the normalization statistics in the
+    encoding pass: only if normalization targets no column that encoding
+    rewrites or creates.
+    """
+    return not plan.encode_method or not any(
+        col in targets['encode'] or col not in columns for col in targets['normalize'])
+
+
+def _describe_step(plan, stage, columns, targets):
+    if stage == 'strip':
+        extra = ['casefold'] * bool(plan.casefold) + [plan.unicode_form] * bool(plan.unicode_form)
+        return f"strip ({', '.join(extra)}): text columns" if extra else 'strip: text columns'
+    if stage == 'fill':
+        return f"fill ({plan.fill_method}): numeric columns"
+    if stage == 'dedup':
+        return f"dedup: {', '.join(plan.subset_cols) if plan.subset_cols else f'all {len(columns)} columns'}"
+    method = {'outliers': plan.outlier_method, 'encode': plan.encode_method,
+              'normalize': plan.normalize_method}[stage]
+    cols = [col for col in targets[stage] if col in columns]
+    return f"{stage} ({method}): {', '.join(cols) if cols else 'no columns'}"
+
+
+def explain(plan, columns, targets, listed=None, chunked=False):
+    """
+    The optimized plan as text lines. ``targets`` are the resolved column
+    lists (``CleaningPlan.targets``); ``listed`` is the step order as given,
+    to point out reordering; ``chunked`` adds the columns each statistics
+    pass of a streaming run reads.
+    """
+    steps = plan_steps(plan)
+    lines = ["🧭 Optimized cleaning plan"]
+    if not steps:
+        lines.append("  (no cleaning steps: the input is copied to the output)")
+    for number, (kind, stages) in enumerate(optimize(steps), 1):
+        if kind == 'filter':
+            how = 'row filters, one combined mask' if len(stages) > 1 else 'row filter'
+            how += ', materialized once'
+        else:
+            how = 'elementwise, in place' if len(stages) > 1 else 'elementwise'
+        lines.append(f"  {number}. {' + '.join(stages)}  [{how}]")
+        for stage in stages:
+            lines.append(f"       - {_describe_step(plan, stage, columns, targets)}")
+    if listed and [stage for stage in listed if stage in STAGES] != [step['step'] for step in steps]:
+        lines.append(f"  Reordered from {' → '.join(listed)}: steps run in pipeline order, "
+                     "so rows are filtered before encoding")
+    if chunked and not plan.is_fitted:
+        fitted = {'outliers': [col for col in targets['outliers'] if col in columns], 'encode': targets['encode']}
+        shared = plan.normalize_method and shared_normalize_pass(plan, columns, targets)
+        passes = [('outliers', targets['outliers']) if plan.outlier_method else None,
+                  ('encode' + (' + normalize' if shared else ''),
+                   targets['encode'] + (targets['normalize'] if shared else [])) if plan.encode_method else None,
+                  ('normalize', targets['normalize']) if plan.normalize_method and not shared else None]
+        lines.append("  Statistics passes (--stream):")
+        lines.append(f"    - layout: all {len(columns)} columns")
+        for name, scanned in filter(None, passes):
+            read = required_columns(plan, columns, name.split()[0], scanned, fitted)
+            lines.append(f"    - {name}: reads {len(read)} of {len(columns)} columns")
+    lines.append("  Output is written once, after the last step")
+    return lines
+
+
+def explain_file(plan, path, fmt=None, columns=None, listed=None, chunked=False):
+    """
+    ``explain`` for one input file. Columns are resolved from the file's
+    first rows, or taken from the parameters of a fitted plan; no data is
+    cleaned.
+    """
+    sample = sample_table(path, fmt, columns)
+    if plan.is_fitted and plan.fitted_stages():
+        targets = {stage: list(plan.params.get(stage, ())) for stage in ('outliers', 'encode', 'normalize')}
+    else:
+        targets = plan.targets(*detect_columns(sample))
+    return explain(plan, list(sample.columns), targets, listed, chunked)
@@ -0,0 +1,281 @@
+import json
+from contextlib import contextmanager
+
+import numpy as np
+
+from cleaner.pipeline import STAGES, optimize, plan_steps
+from cleaner.stages import (split_cols, detect_columns, strip_columns, fit_fill, apply_fill,
+                            duplicate_mask, fit_outliers, outlier_mask, fit_encoding,
+                            apply_encoding, fit_normalization, apply_normalization)
+from cleaner.dedup import DEDUP_MEMORY_MB, RowHashSet
+from cleaner.formats import TableWriter
+from cleaner.metrics import measure
+from cleaner.numeric import compact_rows, record_copies, stage_copies
+from cleaner.stats import ColumnStats
+
+OPTIONS = ('fill_method', 'normalize_method', 'outlier_method', 'encode_method', 'drop_duplicates',
+           'duplicate_cols', 'strip_whitespace', 'normalize_cols', 'encode_cols', 'outlier_cols',
+           'max_categories', 'onehot_sparse', 'casefold', 'unicode_form')
+
+
+class CleaningPlan:
+    """
+    Cleaning options plus the statistics fitted for them (fill values,
+    outlier bounds, encoding vocabularies and scaling parameters).
+
+    ``fit`` learns the statistics from one DataFrame; ``transform`` applies
+    them unchanged to any other, so encodings stay consistent across files.
+    Plans round-trip through JSON with ``save``/``load``.
+    """
+
+    def __init__(self, fill_method=None, normalize_method=None, outlier_method=None,
+                 encode_method=None, drop_duplicates=False, duplicate_cols=None,
+                 strip_whitespace=False, normalize_cols=None, encode_cols=None,
+                 outlier_cols=None, max_categories=None, onehot_sparse=False, casefold=False,
+                 unicode_form=None, params=None):
+        self.fill_method = fill_method
+        self.normalize_method = normalize_method
+        self.outlier_method = outlier_method
+        self.encode_method = encode_method
+        self.drop_duplicates = drop_duplicates
+        self.duplicate_cols = duplicate_cols
+        self.strip_whitespace = strip_whitespace
+        self.normalize_cols = normalize_cols
+        self.encode_cols = encode_cols
+        self.outlier_cols = outlier_cols
+        self.max_categories = max_categories
+        self.onehot_sparse = onehot_sparse
+        self.casefold = casefold
+        self.unicode_form = unicode_form
+        self.params = params or {}
+        # Run settings, not saved with the plan: the memory budget of the
+        # cross-chunk duplicate hashes, the worker threads per-column work is
+        # spread over, whether numeric columns are rewritten in place, the
+        # pre-flight result of the input, an optional writer for dropped rows
+        # and an optional bundle the output is also written to.
+        self.dedup_memory_mb = DEDUP_MEMORY_MB
+        self.threads = 1
+        self.in_place = False
+        self.preflight = None
+        self.duplicates = None
+        self.bundle = None
+        self.seen = None
+        self.reset_run()
+
+    @property
+    def subset_cols(self):
+        return split_cols(self.duplicate_cols)
+
+    @property
+    def is_fitted(self):
+        return all(stage in self.params for stage in self.fitted_stages())
+
+    def enabled(self, stage):
+        return {
+            'strip': self.strip_whitespace,
+            'fill': self.fill_method,
+            'dedup': self.drop_duplicates,
+            'outliers': self.outlier_method,
+            'encode': self.encode_method,
+            'normalize': self.normalize_method,
+        }[stage]
+
+    def fitted_stages(self):
+        return [stage for stage in STAGES if stage != 'strip' and stage != 'dedup' and self.enabled(stage)]
+
+    def targets(self, auto_categoricals, auto_numerics):
+        """Resolve the column lists for outliers, encoding and normalization."""
+        return {
+            'outliers': split_cols(self.outlier_cols) or auto_numerics,
+            'encode': split_cols(self.encode_cols) or auto_categoricals,
+            'normalize': split_cols(self.normalize_cols) or auto_numerics,
+        }
+
+    def reset_run(self):
+        """Clear the counters of the last run and the duplicate hashes seen so far."""
+        self.last_run = {'stripped': [], 'filled': [], 'duplicates_removed': 0, 'dedup_spills': 0,
+                         'duplicates_path': None, 'outlier_counts': {}, 'outliers_removed': 0,
+                         'shapes': None,  # (input shape, output shape), set by clean_data
+                         'dtypes': None,  # file-wide column dtypes of a chunked run
+                         'in_place': {'copies': {}} if self.in_place else None,  # stage -> (MB, regular MB)
+                         'metrics': None}  # StageMetrics.to_dict(), set by clean_data
+        if self.seen is not None:
+            self.seen.close()
+        self.seen = RowHashSet(self.dedup_memory_mb)
+
+    @contextmanager
+    def collect_duplicates(self, path, columns):
+        """
+        Write the rows dropped as duplicates while the block runs to ``path``
+        (any output format); ``columns`` is the header if none are dropped.
+        """
+        if not (path and self.drop_duplicates):
+            yield
+            return
+        self.duplicates = TableWriter(path)
+        try:
+            yield
+        finally:
+            self.duplicates.close(columns)
+            self.duplicates = None
+        self.last_run['duplicates_path'] = path
+
+    # --- Fitting ---
+    def fit(self, df, logger):
+        self.fit_transform(df.copy(), logger)
+        return self
+
+    def fit_transform(self, df, logger, stats=None, metrics=None):
+        """
+        Fit every enabled stage on ``df`` in pipeline order and return the
+        cleaned frame. ``stats`` (a ``ColumnStats`` of ``df``) is shared by the
+        stages and left pointing at the cleaned frame; ``metrics`` (a
+        ``StageMetrics``) times each stage, fitting included.
+        """
+        self.params = {}
+        self.reset_run()
+        if stats is None:
+            stats = ColumnStats(df, self.threads)
+        with measure(metrics, 'detect', len(df)):
+            targets = self.targets(*detect_columns(df, stats, self.threads))
+        return self._run(df, logger, targets=targets, stats=stats, metrics=metrics)
+
+    def fit_stage(self, stage, df, logger, targets, stats=None):
+        """Fit one stage on the frame as it reaches that stage."""
+        if stage == 'fill':
+            self.params['fill'] = fit_fill(df, self.fill_method, stats, self.threads)
+        elif stage == 'outliers':
+            self.params['outliers'] = fit_outliers(df, self.outlier_method, targets['outliers'], logger, stats)
+        elif stage == 'encode':
+            self.params['encode'], self.params['encode_other'] = fit_encoding(
+                df, self.encode_method, targets['encode'], self.max_categories, self.threads)
+        elif stage == 'normalize':
+            self.params['normalize'] = fit_normalization(df, self.normalize_method, targets['normalize'], stats)
+
+    # --- Transforming ---
+    def transform(self, df, logger, stop=None, chunked=False, stats=None, metrics=None):
+        """
+        Apply the fitted stages that come before ``stop`` (all by default).
+        With ``chunked=True`` duplicates are tracked across calls until
+        ``reset_run`` is called, so a file can be transformed chunk by chunk.
+        ``stats`` and ``metrics`` work as in ``fit_transform``.
+        """
+        if not chunked:
+            self.reset_run()
+        return self._run(df, logger, stop=stop, chunked=chunked, stats=stats, metrics=metrics)
+
+    def steps(self):
+        """The enabled stages as declarative steps (see ``cleaner.pipeline``)."""
+        return plan_steps(self)
+
+    def _run(self, df, logger, targets=None, stop=None, chunked=False, stats=None, metrics=None):
+        """
+        Run the enabled stages before ``stop`` in the groups chosen by
+        ``optimize``. With ``targets`` every stage is fitted first, on the
+        rows that reach it.
+        """
+        for kind, stages in optimize(self.steps(), stop):
+            if kind == 'filter':
+                df = self.filter_rows(stages, df, logger, targets, chunked, stats, metrics)
+                continue
+            for stage in stages:
+                with measure(metrics, stage, len(df)) as run:
+                    if targets is not None:
+                        self.fit_stage(stage, df, logger, targets, stats)
+                    df = self.apply_stage(stage, df, logger, stats)
+                    run['rows_out'] = len(df)
+        return df
+
+    def filter_rows(self, stages, df, logger, targets=None, chunked=False, stats=None, metrics=None):
+        """
+        Apply consecutive row filters with one combined mask, so the frame is
+        copied once, by the last of them, and only if rows were dropped.
+        Outlier bounds are fitted (with ``targets``) on the rows that survive
+        dedup, copying only the outlier columns. With ``in_place`` outliers
+        are tested a column at a time and the kept rows are compacted within
+        each column instead of copying the frame.
+        """
+        run = self.last_run
+        keep = np.ones(len(df), dtype=bool)
+        for stage in stages:
+            with measure(metrics, stage, int(keep.sum())) as timing:
+                if stage == 'dedup':
+                    dupes = duplicate_mask(df, self.subset_cols, seen=self.seen if chunked else None)
+                    keep &= ~dupes
+                    run['duplicates_removed'] += int(dupes.sum())
+                    run['dedup_spills'] = self.seen.spills
+                    if self.duplicates is not None and dupes.any():
+                        self.duplicates.write(df.take(np.flatnonzero(dupes)))
+                elif stage == 'outliers':
+                    rows = None if keep.all() else keep
+                    if targets is not None:
+                        kept, kept_stats = df, stats
+                        if rows is not None:
+                            cols = [col for col in dict.fromkeys(targets['outliers']) if col in df.columns]
+                            kept = df[cols].take(np.flatnonzero(rows))
+                            kept_stats = ColumnStats(kept, self.threads)
+                        self.fit_stage('outliers', kept, logger, targets, kept_stats)
+                    flagged, counts = outlier_mask(df, self.outlier_method, self.params['outliers'], rows,
+                                                   self.threads, per_column=self.in_place)
+                    if self.in_place:
+                        record_copies(run, 'outliers', stage_copies('outliers', df, self.params['outliers'],
+                                                                    int(keep.sum())))
+                    keep &= ~flagged
+                    for col, removed in counts.items():
+                        run['outlier_counts'][col] = run['outlier_counts'].get(col, 0) + removed
+                    run['outliers_removed'] += int(flagged.sum())
+                if stage == stages[-1] and not keep.all():
+                    # take() returns an independent frame, so later stages can assign columns
+                    if self.in_place:
+                        record_copies(run, 'compact', stage_copies('compact', df, df.columns, int(keep.sum())))
+                        df = compact_rows(df, keep)
+                    else:
+                        df = df.take(np.flatnonzero(keep))
+                    if stats is not None:
+                        stats.update(df)
+                timing['rows_out'] = int(keep.sum())
+        return df
+
+    def apply_stage(self, stage, df, logger, stats=None):
+        """Apply one elementwise stage; ``stats`` forgets only the columns the stage changed."""
+        run = self.last_run
+        changed = []
+        if stage == 'strip':
+            df, run['stripped'] = strip_columns(df, self.threads, self.casefold, self.unicode_form)
+            changed = run['stripped']
+        elif stage == 'fill':
+            if self.in_place:
+                record_copies(run, 'fill', stage_copies('fill', df, self.params['fill'], len(df)))
+            df, changed = apply_fill(df, self.params['fill'], stats, self.threads, self.in_place)
+            run['filled'] += [col for col in changed if col not in run['filled']]
+        elif stage == 'encode':
+            df = apply_encoding(df, self.encode_method, self.params['encode'], logger,
+                                self.params.get('encode_other', ()), self.onehot_sparse, self.threads)
+            changed = list(self.params['encode'])
+        elif stage == 'normalize':
+            if self.in_place:
+                record_copies(run, 'normalize', stage_copies('normalize', df, self.params['normalize'], len(df)))
+            df = apply_normalization(df, self.normalize_method, self.params['normalize'], self.threads,
+                                     self.in_place)
+            changed = list(self.params['normalize'])
+        if stats is not None:
+            stats.update(df, changed)
+        return df
+
+    # --- Persistence ---
+    def to_dict(self):
+        return {'options': {name: getattr(self, name) for name in OPTIONS}, 'params': self.params}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(params=data.get('params'), **data['options'])
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            # numpy scalars (np.int64 fill values, vocabularies) -> plain Python numbers
+            json.dump(self.to_dict(), f, indent=2, default=lambda value: value.item())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
@@ -0,0 +1,193 @@
+import json
+import os
+import time
+
+import pandas as pd
+
+from cleaner.formats import iter_chunks, read_columns
+from cleaner.stages import split_cols
+
+# The checks read the header, then at most PREFLIGHT_ROWS rows in chunks of
+# PREFLIGHT_CHUNK, keeping a few counters per column instead of the rows.
+PREFLIGHT_ROWS = 10_000
+PREFLIGHT_CHUNK = 2_000
+
+
+class PreflightError(ValueError):
+    """
+    The input cannot be cleaned as requested. ``problems`` lists what is
+    wrong as dicts with the ``column`` (None for the file), the ``check``
+    that failed and a ``message``.
+    """
+
+    def __init__(self, path, problems):
+        self.path = path
+        self.problems = problems
+        super().__init__(f"{os.path.basename(path)} failed {len(problems)} pre-flight check(s): "
+                         + '; '.join(problem['message'] for problem in problems))
+
+    def to_dict(self):
+        return {'input': self.path, 'problems': self.problems}
+
+
+def load_schema(path):
+    """
+    Read a JSON schema file: ``{"columns": {name: spec}}`` where ``spec`` is
+    a dtype (``"float32"``, ``"category"``, ``"string[pyarrow]"``...),
+    ``null`` for any dtype, or ``{"dtype": ..., "nullable": false}``.
+    Returns ``{name: {'dtype': dtype or None, 'nullable': bool}}``.
+    """
+    with open(path, encoding='utf-8') as f:
+        columns = json.load(f).get('columns')
+    if not isinstance(columns, dict) or not columns:
+        raise ValueError(f"Schema {path} needs a non-empty \"columns\" object")
+    schema = {}
+    for col, spec in columns.items():
+        spec = spec if isinstance(spec, dict) else {'dtype': spec}
+        dtype = spec.get('dtype')
+        if dtype is not None:
+            try:
+                pd.api.types.pandas_dtype(dtype)
+            except TypeError:
+                raise ValueError(f"Schema {path}: unknown dtype {dtype!r} for column {col!r}") from None
+        schema[col] = {'dtype': dtype, 'nullable': spec.get('nullable', True)}
+    return schema
+
+
+def schema_dtypes(schema):
+    """Reader dtypes of the schema columns that name one."""
+    return {col: spec['dtype'] for col, spec in schema.items() if spec['dtype'] is not None}
+
+
+def _problem(column, check, message):
+    return {'column': column, 'check': check, 'message': message}
+
+
+def _requested(plan):
+    """``(column, option)`` for every column the plan's options name, with the option that names it."""
+    options = [('duplicate_cols', 'drop_duplicates'), ('outlier_cols', 'outlier_method'),
+               ('encode_cols', 'encode_method'), ('normalize_cols', 'normalize_method')]
+    requested = []
+    for option, method in options:
+        if getattr(plan, method):
+            requested += [(col, option) for col in split_cols(getattr(plan, option)) or ()]
+    return requested
+
+
+def _created(plan, col, loaded):
+    # one-hot columns are named <col>_<level> and only exist once encoding ran
+    if plan.encode_method != 'onehot':
+        return False
+    encoded = split_cols(plan.encode_cols) or loaded
+    return any(col.startswith(f"{source}_") for source in encoded)
+
+
+def _numeric_targets(plan, requested):
+    """
+    Requested columns that must already be numeric when they are read:
+    outlier columns, and normalization columns that encoding (which runs
+    first) does not turn into numbers.
+    """
+    encoded = split_cols(plan.encode_cols)
+    targets = {}
+    for col, option in requested:
+        if option == 'normalize_cols' and plan.encode_method and (not encoded or col in encoded):
+            continue
+        if option in ('outlier_cols', 'normalize_cols'):
+            targets[col] = option
+    return targets
+
+
+def _example(series):
+    values = series.dropna()
+    bad = values[pd.to_numeric(values, errors='coerce').isna()]
+    return f" (e.g. {bad.iloc[0]!r})" if len(bad) else ''
+
+
+def preflight(plan, path, fmt=None, columns=None, schema=None, rows=PREFLIGHT_ROWS):
+    """
+    Check that ``path`` can be cleaned with ``plan`` before it is loaded.
+    The header must hold the ``columns`` to load, the schema columns and
+    every column the plan's options name; then the first ``rows`` rows must
+    fit the schema dtypes, have no nulls where the schema forbids them and
+    be numeric where outlier removal or normalization is requested.
+    Raises ``PreflightError`` listing every problem found. Returns the loaded
+    columns, the rows checked, the seconds taken and the columns that are
+    constant or entirely null in those rows as ``warnings``.
+    """
+    start = time.perf_counter()
+    schema = schema or {}
+    try:
+        header = read_columns(path, fmt)
+    except Exception as e:
+        raise PreflightError(path, [_problem(None, 'readable', f"cannot read the header: {e}")]) from e
+
+    # --- Header: every named column exists ---
+    missing = {}
+    for source, names in (('schema', schema), ('--columns', columns or ())):
+        for col in names:
+            if col not in header:
+                missing.setdefault(col, source)
+    problems = [_problem(col, 'missing', f"column '{col}' ({source}) is not in the file")
+                for col, source in missing.items()]
+    loaded = list(columns or header)
+    requested = _requested(plan)
+    problems += [_problem(col, 'missing', f"column '{col}' (--{option.replace('_', '-')}) is not in the file")
+                 for col, option in requested if col not in loaded and not _created(plan, col, loaded)]
+    if problems:
+        raise PreflightError(path, problems)
+
+    # --- Sample: dtypes, nulls and constant columns, chunk by chunk ---
+    numeric = {col: option for col, option in _numeric_targets(plan, requested).items()
+               if not (col in schema and schema[col]['dtype']
+                       and pd.api.types.is_numeric_dtype(pd.api.types.pandas_dtype(schema[col]['dtype'])))}
+    counts = {col: {'nulls': 0, 'values': 0, 'first': None, 'varied': False} for col in loaded}
+    failed = set()
+    scanned = 0
+    try:
+        for chunk in iter_chunks(path, PREFLIGHT_CHUNK, fmt, loaded):
+            chunk = chunk.iloc[:rows - scanned]
+            scanned += len(chunk)
+            for col in loaded:
+                series = chunk[col]
+                values = series.dropna()
+                count = counts[col]
+                count['nulls'] += len(series) - len(values)
+                if len(values):
+                    if not count['values']:
+                        count['first'] = values.iloc[0]
+                    count['varied'] = count['varied'] or bool((values != count['first']).any())
+                    count['values'] += len(values)
+                if col in failed:
+                    continue
+                spec = schema.get(col)
+                if spec and spec['dtype']:
+                    try:
+                        series.astype(spec['dtype'])
+                    except (ValueError, TypeError) as e:
+                        failed.add(col)
+                        problems.append(_problem(col, 'dtype', f"column '{col}' does not fit dtype "
+                                                               f"{spec['dtype']}: {e}"))
+                if spec and not spec['nullable'] and len(values) < len(series):
+                    failed.add(col)
+                    problems.append(_problem(col, 'nulls', f"column '{col}' has missing values "
+                                                           f"but the schema forbids them"))
+                if col in numeric and not pd.api.types.is_numeric_dtype(series):
+                    failed.add(col)
+                    option = numeric[col].replace('_', '-')
+                    problems.append(_problem(col, 'numeric', f"column '{col}' (--{option}) is not "
+                                                             f"numeric{_example(series)}"))
+            if scanned >= rows:
+                break
+    except ValueError as e:  # pandas ParserError and pyarrow's ArrowInvalid included
+        problems.append(_problem(None, 'readable', f"cannot parse the first {rows} rows: {e}"))
+    if problems:
+        raise PreflightError(path, problems)
+
+    warnings = []
+    for col, count in counts.items():
+        if scanned and not count['values']:
+            warnings.append((col, 'entirely null'))
+        elif scanned and not count['varied'] and not count['nulls']:
+            warnings.append((col, 'constant'))
+    return {'columns': loaded, 'rows': scanned, 'seconds': time.perf_counter() - start, 'warnings': warnings}
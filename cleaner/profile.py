@@ -0,0 +1,114 @@
+import json
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+from cleaner.dtypes import sample_table
+from cleaner.formats import infer_format, is_plain_csv, iter_chunks
+from cleaner.sketches import DISTINCT_PRECISION, QUANTILE_K, rank_error
+from cleaner.stream import resolve_dtype, _summarize
+
+# Columns of the numeric summary, in DataFrame.describe() order.
+DESCRIBE = ('count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max')
+
+
+def _number(value):
+    # plain Python numbers for JSON; NaN (empty column) becomes null
+    if value is None or pd.isna(value):
+        return None
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def estimate_rows(path, fmt, rows):
+    """
+    Row count of a file whose first ``rows`` rows were read: exact for
+    Parquet (from its metadata), extrapolated from the bytes per line of
+    those rows for plain CSV, None for other formats.
+    """
+    fmt = infer_format(path, fmt)
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+
+        return pq.ParquetFile(path).metadata.num_rows
+    if not is_plain_csv(path, fmt):
+        return None
+    with open(path, 'rb') as f:
+        header = len(f.readline())
+        sampled = sum(len(f.readline()) for _ in range(rows))
+    return round((os.path.getsize(path) - header) * rows / sampled) if sampled else 0
+
+
+def profile_file(path, fmt=None, columns=None, chunksize=100_000, sample_rows=None, sketch_k=QUANTILE_K,
+                 threads=None):
+    """
+    Profile of a data file from one streaming pass over ``chunksize`` rows at
+    a time: dtypes, null counts, distinct counts and the ``describe()``
+    statistics of the numeric columns. Memory does not depend on the file:
+    moments and min/max are merged chunk by chunk (Chan et al., Welford's
+    update for batches), quartiles come from KLL sketches of size
+    ``sketch_k`` (exact until they first compact) and distinct counts from
+    HyperLogLog sketches (exact up to 10 values).
+
+    With ``sample_rows`` only the first that many rows are read; the row
+    count is then estimated (see ``estimate_rows``) and the statistics
+    describe the sample.
+    """
+    summaries = {}
+    dtypes = {}
+    rows = 0
+    if sample_rows:
+        chunks = [sample_table(path, fmt, columns, sample_rows)]
+    else:
+        chunks = iter_chunks(path, chunksize, fmt, columns)
+    for chunk in chunks:
+        def update(summary, col):
+            summary.update(chunk[col], sketch=True, count_distinct=True)
+        _summarize(summaries, chunk.columns, update, sketch_k, threads)
+        for col in chunk.columns:
+            dtypes.setdefault(col, set()).add(str(chunk[col].dtype))
+        rows += len(chunk)
+
+    sampled = sample_rows and rows == sample_rows
+    profile = {'input': path, 'rows': estimate_rows(path, fmt, rows) if sampled else rows,
+               'sampled_rows': rows if sampled else None, 'columns': len(summaries),
+               'dtypes': {}, 'nulls': {}, 'distinct': {}, 'numeric': {},
+               'quantile_rank_error': rank_error(sketch_k),
+               'distinct_standard_error': 1.04 / math.sqrt(2 ** DISTINCT_PRECISION)}
+    for col, summary in summaries.items():
+        names = dtypes[col]
+        profile['dtypes'][col] = names.pop() if len(names) == 1 else resolve_dtype(summary.kinds)
+        profile['nulls'][col] = summary.nulls
+        profile['distinct'][col] = summary.nunique()
+        if summary.kinds <= set('iuf'):
+            profile['numeric'][col] = dict(zip(DESCRIBE, map(_number, (
+                summary.count, summary.mean(), summary.std(), summary.min,
+                *(summary.quantile_sketch.quantile(q) if summary.quantile_sketch else np.nan
+                  for q in (0.25, 0.5, 0.75)),
+                summary.max))))
+    return profile
+
+
+def profile_lines(profile):
+    """The profile as the text ``--profile`` prints."""
+    lines = ["📊 Dataset Profile:"]
+    if profile['sampled_rows']:
+        total = f"~{profile['rows']}" if profile['rows'] is not None else "unknown"
+        lines.append(f"Shape: ({total}, {profile['columns']})  "
+                     f"[estimated from the first {profile['sampled_rows']} rows]")
+    else:
+        lines.append(f"Shape: {(profile['rows'], profile['columns'])}")
+    lines += ["", "Column types:", str(pd.Series(profile['dtypes'], dtype=object))]
+    lines += ["", "Null values:", str(pd.Series(profile['nulls'], dtype='int64'))]
+    lines += ["", "Distinct values:", str(pd.Series(profile['distinct'], dtype='int64'))]
+    stats = pd.DataFrame.from_dict(profile['numeric'], orient='index', columns=list(DESCRIBE)).astype('float64')
+    lines += ["", "Stats (numeric columns):", str(stats)]
+    lines.append(f"\nQuartiles within {profile['quantile_rank_error']:.2%} of the exact rank; distinct counts "
+                 f"past 10 within {profile['distinct_standard_error']:.2%} (standard error)")
+    return lines
+
+
+def save_profile(profile, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(profile, f, indent=2, default=_number)
@@ -0,0 +1,240 @@
+import math
+import os
+from datetime import datetime
+
+from cleaner.sketches import DISTINCT_PRECISION, rank_error
+
+
+# Each helper appends one section of the Markdown report and logs what the
+# stage did, so the in-memory and chunked pipelines report identically.
+
+def report_header(report_lines, input_path, output_path, original_shape, logger):
+    report_lines.append("# 📊 Data Cleaning Report")
+    report_lines.append(f"- **Run time:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    report_lines.append(f"- **Input file:** `{input_path}`")
+    report_lines.append(f"- **Output file:** `{output_path}`\n")
+
+    report_lines.append("## 📐 Initial Dataset")
+    report_lines.append(f"- Rows: {original_shape[0]}")
+    report_lines.append(f"- Columns: {original_shape[1]}\n")
+
+    logger.info(f"Loaded data with shape: {original_shape}")
+
+
+def _mb(size):
+    return f"{size / 2**20:.2f} MB"
+
+
+def report_memory(report_lines, memory, logger):
+    """``memory`` maps each column to ((dtype, bytes) before, (dtype, bytes) after)."""
+    before = sum(old[1] for old, _ in memory.values())
+    after = sum(new[1] for _, new in memory.values())
+    logger.info(f"Optimized dtypes: {_mb(before)} -> {_mb(after)}")
+    report_lines.append("## 🧠 Memory Optimization")
+    report_lines.append("- Before: default dtypes, estimated from a sample of the file")
+    for col, ((old_dtype, old_size), (new_dtype, new_size)) in memory.items():
+        report_lines.append(f"  - `{col}`: `{old_dtype}` {_mb(old_size)} → `{new_dtype}` {_mb(new_size)}")
+    report_lines.append(f"- **Total:** `{_mb(before)}` → `{_mb(after)}`\n")
+
+
+def report_in_place(report_lines, in_place, metrics, logger, mapped=0):
+    """
+    ``in_place`` is ``last_run['in_place']``: the largest temporary copy of
+    each stage in MB, in place and on the regular path. ``mapped`` is the
+    bytes of float columns moved to a memory-mapped file.
+    """
+    copies = in_place['copies']
+    saved = max((regular for _, regular in copies.values()), default=0) - \
+        max((own for own, _ in copies.values()), default=0)
+    logger.info(f"In-place numeric engine: largest temporary copy {round(saved, 2)} MB smaller than the regular path")
+    report_lines.append("## 🧮 In-Place Numeric Engine")
+    if mapped:
+        report_lines.append(f"- Float columns memory-mapped: `{_mb(mapped)}`, paged from a temporary file")
+    report_lines.append("- Largest temporary copy per stage, in place → regular path:")
+    for stage, (own, regular) in copies.items():
+        report_lines.append(f"  - `{stage}`: {own} MB → {regular} MB")
+    if metrics['peak_rss_mb'] is not None:
+        report_lines.append(f"- Peak RSS `{metrics['peak_rss_mb']} MB`; the regular path's largest copy would "
+                            f"add up to `{round(saved, 2)} MB` to it")
+    report_lines.append("")
+
+
+def report_approximation(report_lines, sketch_k, logger):
+    quantile_error = rank_error(sketch_k)
+    distinct_error = 1.04 / math.sqrt(2 ** DISTINCT_PRECISION)
+    logger.info(f"Approximate statistics: KLL k={sketch_k} (±{quantile_error:.2%} rank), "
+                f"HyperLogLog p={DISTINCT_PRECISION} (±{distinct_error:.2%})")
+    report_lines.append("## 🎯 Approximate Statistics")
+    report_lines.append(f"- Median fill and IQR quartiles: KLL sketch, k = {sketch_k}, "
+                        f"rank error ≤ {quantile_error:.2%} (99% confidence)")
+    report_lines.append(f"- High-cardinality check: HyperLogLog, {2 ** DISTINCT_PRECISION} registers, "
+                        f"standard error {distinct_error:.2%}\n")
+
+
+def report_incremental(report_lines, start, end, rows, written, state, logger):
+    """
+    An append-only run: bytes ``[start, end)`` held ``rows`` new rows, of which
+    ``written`` were appended; ``state`` is the saved totals.
+    """
+    logger.info(f"Incremental run: {rows} new rows (bytes {start}-{end}), {state['rows']} processed in total")
+    report_lines.append("## ♻️ Incremental Run")
+    report_lines.append(f"- New rows: {rows} (input bytes {start}–{end}); earlier rows were not read again")
+    report_lines.append(f"- Rows appended to the output: {written}")
+    report_lines.append(f"- Rows processed since the last full build: {state['rows']}")
+    report_lines.append(f"- Rows in the output since the last full build: {state['output_rows']}")
+    report_lines.append(f"- Statistics fitted by the full build on {state['built']}\n")
+
+
+def report_preflight(report_lines, preflight, logger):
+    """``preflight`` is the result of ``cleaner.preflight.preflight``."""
+    report_lines.append("## 🛫 Pre-flight Checks")
+    report_lines.append(f"- Header and first {preflight['rows']} rows checked: all requested columns usable")
+    for col, issue in preflight['warnings']:
+        logger.warning(f"Column '{col}' is {issue} in the first {preflight['rows']} rows")
+        report_lines.append(f"- `{col}` is {issue} in the first {preflight['rows']} rows")
+    report_lines.append("")
+
+
+def report_strip(report_lines, stripped, logger, casefold=False, unicode_form=None):
+    for col in stripped:
+        logger.info(f"Stripped whitespace from column: {col}")
+    if stripped:
+        report_lines.append("## 🔠 Whitespace Cleanup")
+        report_lines.append(f"- Stripped whitespace from: `{', '.join(stripped)}`")
+        if casefold:
+            report_lines.append("- Case-folded the same columns")
+        if unicode_form:
+            report_lines.append(f"- Normalized the same columns to Unicode {unicode_form}")
+        report_lines.append("")
+
+
+def report_fill(report_lines, fill_method, values, logger):
+    report_lines.append("## 🔧 Missing Value Filling")
+    report_lines.append(f"- Method: `{fill_method}`")
+    for col, val in values.items():
+        logger.info(f"Filled missing values in '{col}' with {val}")
+        report_lines.append(f"  - `{col}` → filled with `{val}`")
+    report_lines.append("")
+
+
+def report_duplicates(report_lines, subset_cols, removed, logger, spills=0, dropped_path=None):
+    report_lines.append("## 🧹 Duplicate Removal")
+    if subset_cols:
+        logger.info(f"Removed duplicates using columns: {subset_cols}")
+        report_lines.append(f"- Based on columns: `{', '.join(subset_cols)}`")
+    else:
+        logger.info("Removed full row duplicates")
+        report_lines.append("- Based on full rows")
+    report_lines.append(f"- Duplicates removed: `{removed}`")
+    if spills:
+        logger.info(f"Duplicate row hashes spilled to disk {spills} times")
+        report_lines.append(f"- Row hashes spilled to disk: `{spills}` times")
+    if dropped_path:
+        logger.info(f"Saved dropped duplicate rows to {dropped_path}")
+        report_lines.append(f"- Dropped rows saved to: `{dropped_path}`")
+    report_lines.append("")
+
+
+def report_outliers(report_lines, outlier_method, counts, total_removed, logger):
+    report_lines.append("## 🧪 Outlier Removal")
+    report_lines.append(f"- Method: `{outlier_method}`")
+    for col, removed in counts.items():
+        logger.info(f"Marked {removed} outliers from '{col}'")
+        report_lines.append(f"  - `{col}` → `{removed}` outliers marked")
+    logger.info(f"Total outliers removed: {total_removed}")
+    report_lines.append(f"- **Total outlier rows removed:** `{total_removed}`\n")
+
+
+def report_encoding(report_lines, encode_method, vocab, logger, other=()):
+    report_lines.append("## 🔣 Categorical Encoding")
+    report_lines.append(f"- Method: `{encode_method}`")
+    for col in vocab:
+        if encode_method == 'label':
+            logger.info(f"Label encoded column '{col}'")
+            report_lines.append(f"  - `{col}` encoded (label)")
+        elif encode_method == 'onehot' and col in other:
+            logger.info(f"Applied one-hot encoding to: {col} ({len(vocab[col])} levels + other)")
+            report_lines.append(f"  - `{col}` encoded (one-hot, {len(vocab[col])} levels + other)")
+        elif encode_method == 'onehot':
+            logger.info(f"Applied one-hot encoding to: {col}")
+            report_lines.append(f"  - `{col}` encoded (one-hot)")
+
+
+def report_normalization(report_lines, normalize_method, scales, logger):
+    report_lines.append("## 📊 Normalization")
+    report_lines.append(f"- Method: `{normalize_method}`")
+    for col, params in scales.items():
+        if normalize_method == 'zscore':
+            logger.info(f"Z-score normalized '{col}' (mean={params['mean']}, std={params['std']})")
+            report_lines.append(f"  - `{col}` normalized (z-score)")
+        elif normalize_method == 'minmax':
+            logger.info(f"Min-max scaled '{col}' (min={params['min']}, max={params['max']})")
+            report_lines.append(f"  - `{col}` normalized (min-max)")
+    report_lines.append("")
+
+
+def report_stages(report_lines, plan, logger):
+    """Report every enabled stage of a ``CleaningPlan`` after a run."""
+    run = plan.last_run
+    if plan.preflight:
+        report_preflight(report_lines, plan.preflight, logger)
+    if plan.strip_whitespace:
+        report_strip(report_lines, run['stripped'], logger, plan.casefold, plan.unicode_form)
+    if plan.fill_method:
+        filled = {col: val for col, val in plan.params['fill'].items() if col in run['filled']}
+        report_fill(report_lines, plan.fill_method, filled, logger)
+    if plan.drop_duplicates:
+        report_duplicates(report_lines, plan.subset_cols, run['duplicates_removed'], logger,
+                          run['dedup_spills'], run['duplicates_path'])
+    if plan.outlier_method:
+        counts = {col: run['outlier_counts'].get(col, 0) for col in plan.params['outliers']}
+        report_outliers(report_lines, plan.outlier_method, counts, run['outliers_removed'], logger)
+    if plan.encode_method:
+        report_encoding(report_lines, plan.encode_method, plan.params['encode'], logger,
+                        plan.params.get('encode_other', ()))
+    if plan.normalize_method:
+        report_normalization(report_lines, plan.normalize_method, plan.params['normalize'], logger)
+
+
+def report_validation(report_lines, issues, logger):
+    report_lines.append("## ⚠️ Column Validation Warnings")
+    for col, issue in issues:
+        logger.warning(f"Column '{col}' is {issue}")
+        report_lines.append(f"- `{col}` is {issue}")
+    report_lines.append("")
+
+
+def report_final_shape(report_lines, final_shape):
+    report_lines.append("## 📉 Final Dataset Shape")
+    report_lines.append(f"- Rows: {final_shape[0]}")
+    report_lines.append(f"- Columns: {final_shape[1]}")
+
+
+def report_performance(report_lines, metrics, logger):
+    """``metrics`` is ``StageMetrics.to_dict()``: time, rows and memory per stage."""
+    peak = f", peak RSS `{metrics['peak_rss_mb']} MB`" if metrics['peak_rss_mb'] is not None else ""
+    logger.info(f"Total time: {metrics['total_seconds']:.3f}s")
+    report_lines.append("\n## ⏱️ Performance")
+    report_lines.append(f"- Total time: `{metrics['total_seconds']:.3f} s`{peak}")
+    for record in metrics['stages']:
+        line = f"  - `{record['stage']}`: {record['seconds']:.3f} s (CPU {record['cpu_seconds']:.3f} s)"
+        if record['rows_in'] is not None:
+            line += f", rows {record['rows_in']} → {record['rows_out']}"
+        elif record['rows_out'] is not None:
+            line += f", {record['rows_out']} rows"
+        if record['calls'] > 1:
+            line += f", {record['calls']} calls"
+        if record['rss_mb'] is not None:
+            line += f", RSS {record['rss_mb']} MB"
+        if record['traced_peak_mb'] is not None:
+            line += f", traced peak {record['traced_peak_mb']} MB"
+        logger.info(f"Stage '{record['stage']}' took {record['seconds']:.3f}s")
+        report_lines.append(line)
+
+
+def write_report(report_lines, report_path, logger):
+    if report_path:
+        os.makedirs(os.path.dirname(report_path), exist_ok=True)
+        with open(report_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(report_lines))
+        logger.info(f"Saved report to {report_path}")
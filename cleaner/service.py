@@ -0,0 +1,537 @@
+import hmac
+import http.client
+import json
+import logging
+import multiprocessing
+import os
+import secrets
+import signal
+import socket
+import socketserver
+import stat
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Standard library only at import time: `CLI.py --submit` and the GUI use this
+# module as clients and should not pay for pandas. The daemon and its workers
+# import the cleaner where it is used.
+
+HOST = '127.0.0.1'
+PORT = 8765
+ADDRESS = f"{HOST}:{PORT}"
+QUEUE_SIZE = 32
+MAX_BODY = 1 << 20  # bytes of one request body; job options are far smaller
+KEEP_FINISHED = 1000
+LOOPBACK = ('127.0.0.1', 'localhost', '::1')
+# Every request carries the service's token in this header. The token is in a
+# file only the user running the service can read (see ``token_path``).
+TOKEN_HEADER = 'X-Cleaner-Token'
+TOKEN_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'cleaning-data-tool')
+ACTIVE = ('queued', 'running')
+# Job options holding paths, resolved against the submitting process's working directory
+PATH_OPTIONS = ('input_path', 'output_path', 'report_path', 'log_path', 'output_dir', 'fit_plan', 'apply_plan',
+                'duplicates_path', 'metrics_path', 'profile_dir', 'state_path', 'memmap_dir', 'schema_path',
+                'bundle_path')
+
+
+class QueueFull(Exception):
+    """The service holds as many jobs as it accepts; submit again later."""
+
+
+class ServiceError(Exception):
+    """The service rejected a request or could not be reached."""
+
+
+def parse_address(text):
+    """``"host:port"`` as a ``(host, port)`` TCP address; anything else is a Unix socket path."""
+    host, sep, port = text.rpartition(':')
+    if sep and port.isdigit() and '/' not in text:
+        return host or HOST, int(port)
+    return text
+
+
+def _describe(address):
+    return address if isinstance(address, str) else f"http://{address[0]}:{address[1]}"
+
+
+def token_path(address):
+    """The access token file of the service at ``address``: next to a Unix socket, else in ``TOKEN_DIR``."""
+    if isinstance(address, str):
+        return f"{address}.token"
+    return os.path.join(TOKEN_DIR, f"service-{address[0].replace(':', '_')}-{address[1]}.token")
+
+
+def write_token(path):
+    """A new random token, saved to ``path`` readable by this user only (0600)."""
+    token = secrets.token_urlsafe(32)
+    os.makedirs(os.path.dirname(path) or '.', mode=0o700, exist_ok=True)
+    if os.path.lexists(path):
+        os.unlink(path)  # never reuse a file someone else may have opened
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, 'w') as f:
+        f.write(token)
+    return token
+
+
+def read_token(address):
+    try:
+        with open(token_path(address), encoding='utf-8') as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _loopback_host(host):
+    # Host header, e.g. 127.0.0.1:8765, [::1]:8765 or localhost
+    host = (host or '').strip().lower()
+    name = host[1:].partition(']')[0] if host.startswith('[') else host.partition(':')[0]
+    return name in LOOPBACK
+
+
+# --- Worker processes ---
+
+_events = None
+
+
+def _warm(events):
+    # once per worker process: import pandas, NumPy and the stages now instead of in its first job
+    global _events
+    _events = events
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C stops the service, which shuts the pool down
+    import cleaner.batch  # noqa: F401
+
+
+def _ready():
+    return os.getpid()
+
+
+class _Progress(logging.Handler):
+    """Forwards the first line of every log record of a job to the service."""
+
+    def __init__(self, job_id):
+        super().__init__(logging.INFO)
+        self.job_id = job_id
+
+    def emit(self, record):
+        lines = record.getMessage().strip().splitlines()
+        _events.put((self.job_id, 'step', lines[0] if lines else ''))
+
+
+def _run_job(job_id, job):
+    from cleaner.batch import clean_file
+
+    _events.put((job_id, 'started', time.time()))
+    options = {key: value for key, value in job.items()
+               if key not in ('input_path', 'output_path', 'report_path', 'log_path')}
+    return clean_file(job['input_path'], job['output_path'], job.get('report_path'), job['log_path'], options,
+                      progress=_Progress(job_id))
+
+
+# --- Service ---
+
+def prepare_job(job):
+    """
+    A submitted job as ``clean_file`` arguments. Paths are resolved against
+    the job's ``cwd``; without ``output_path`` the outputs are named like a
+    batch run into ``output_dir`` (after ``name``, if given). Raises ValueError for a job ``clean_data``
+    would not accept.
+    """
+    from inspect import signature
+
+    from cleaner.batch import batch_paths
+    from cleaner.core import clean_data
+
+    if not isinstance(job, dict):
+        raise ValueError("A job is a JSON object of clean_data options")
+    job = dict(job)
+    cwd = job.pop('cwd', None) or os.getcwd()
+    allowed = set(signature(clean_data).parameters) - {'logger', 'return_data'} | {'log_path', 'output_dir', 'name'}
+    unknown = sorted(set(job) - allowed)
+    if unknown:
+        raise ValueError(f"Unknown job options: {', '.join(unknown)}")
+    if not job.get('input_path'):
+        raise ValueError("input_path is required")
+    for key in PATH_OPTIONS:
+        if job.get(key):
+            job[key] = os.path.join(cwd, job[key])
+
+    output_dir = job.pop('output_dir', None)
+    paths = batch_paths(job['input_path'], output_dir or cwd, job.get('output_format'), job.pop('name', None))
+    if not job.get('output_path'):
+        if not output_dir:
+            raise ValueError("output_path or output_dir is required")
+        os.makedirs(output_dir, exist_ok=True)
+        job['output_path'] = paths['output_path']
+        job.setdefault('report_path', os.path.join(cwd, paths['report_path']))
+    job['log_path'] = job.get('log_path') or os.path.join(cwd, paths['log_path'])
+    for name in ('fill_method', 'normalize_method', 'outlier_method', 'encode_method', 'duplicate_cols',
+                 'report_path'):
+        job.setdefault(name, None)
+    for name in ('drop_duplicates', 'strip_whitespace', 'validate_cols'):
+        job.setdefault(name, False)
+    return job
+
+
+class CleaningService:
+    """
+    A pool of ``workers`` warm cleaning processes behind a bounded job queue.
+
+    Workers import pandas, NumPy and the cleaner once at start, so a job
+    only pays for its own data. At most ``workers + queue_size`` jobs are
+    queued or running; ``submit`` raises QueueFull past that instead of
+    letting the backlog (and memory) grow. Each job records its state
+    (queued, running, done, failed), its last log line as progress and
+    finally the ``clean_file`` result; the newest ``KEEP_FINISHED``
+    finished jobs are kept.
+    """
+
+    def __init__(self, workers=None, queue_size=QUEUE_SIZE):
+        self.workers = workers or os.cpu_count() or 1
+        self.capacity = self.workers + queue_size
+        self.jobs = OrderedDict()
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._pool_lock = threading.Lock()
+        # spawned, not forked: the service runs server threads, which fork would copy mid-flight
+        self._context = multiprocessing.get_context('spawn')
+        self._events = self._context.Queue()
+        self._pool = self._start_pool()
+        self._drainer = threading.Thread(target=self._drain, daemon=True)
+        self._drainer.start()
+
+    def _start_pool(self):
+        pool = ProcessPoolExecutor(self.workers, mp_context=self._context, initializer=_warm,
+                                   initargs=(self._events,))
+        # start every worker now rather than on the first jobs
+        for future in [pool.submit(_ready) for _ in range(self.workers)]:
+            future.result()
+        return pool
+
+    def submit(self, job):
+        """Queue ``job`` (see ``prepare_job``); returns its status record."""
+        job = prepare_job(job)
+        with self._lock:
+            if self._pending >= self.capacity:
+                raise QueueFull(f"{self._pending} jobs queued or running (limit {self.capacity})")
+            job_id = uuid.uuid4().hex[:12]
+            record = {'id': job_id, 'input': job['input_path'], 'output': job['output_path'], 'state': 'queued',
+                      'submitted': time.time(), 'started': None, 'finished': None, 'progress': None,
+                      'steps': 0, 'result': None, 'error': None}
+            self.jobs[job_id] = record
+            self._pending += 1
+            self._trim()
+            status = dict(record)
+        with self._pool_lock:
+            try:
+                future = self._pool.submit(_run_job, job_id, job)
+            except BrokenProcessPool:  # a worker died; its jobs failed, start over for the rest
+                self._pool = self._start_pool()
+                future = self._pool.submit(_run_job, job_id, job)
+        future.add_done_callback(lambda future: self._finish(job_id, future))
+        return status
+
+    def _finish(self, job_id, future):
+        try:
+            result = future.result()
+            error = result['error']
+        except Exception as e:  # e.g. the worker process died
+            result, error = None, f"{type(e).__name__}: {e}"
+        with self._lock:
+            self._pending -= 1
+            record = self.jobs.get(job_id)
+            if record is not None:
+                record.update(state='failed' if error else 'done', finished=time.time(), result=result, error=error)
+
+    def _drain(self):
+        while True:
+            event = self._events.get()
+            if event is None:
+                return
+            job_id, kind, value = event
+            with self._lock:
+                record = self.jobs.get(job_id)
+                if record is None:
+                    continue
+                if kind == 'started' and record['state'] == 'queued':
+                    record.update(state='running', started=value)
+                elif kind == 'step' and record['state'] == 'running':
+                    record['progress'] = value
+                    record['steps'] += 1
+
+    def _trim(self):
+        finished = [job_id for job_id, record in self.jobs.items() if record['state'] not in ACTIVE]
+        for job_id in finished[:max(0, len(finished) - KEEP_FINISHED)]:
+            del self.jobs[job_id]
+
+    def status(self, job_id):
+        """A copy of the job's record, or None for an unknown (or long finished) job."""
+        with self._lock:
+            record = self.jobs.get(job_id)
+            return dict(record) if record else None
+
+    def summary(self):
+        with self._lock:
+            counts = {state: 0 for state in ('queued', 'running', 'done', 'failed')}
+            for record in self.jobs.values():
+                counts[record['state']] += 1
+        return {'workers': self.workers, 'capacity': self.capacity, **counts}
+
+    def close(self):
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        self._events.put(None)
+        self._drainer.join()
+
+
+# --- HTTP server ---
+
+class _Handler(BaseHTTPRequestHandler):
+    """
+    ``POST /jobs`` queues a job (202, 400 for a bad job, 503 with
+    Retry-After when full); ``GET /jobs/<id>`` is its status;
+    ``GET /status`` counts jobs by state; ``POST /expand`` resolves input
+    patterns as a batch run would, with their output names.
+
+    Jobs read and write files as the user, so only that user's programs may
+    call the service. A request gets 403 without the service token, with an
+    ``Origin`` header (browsers send one on cross-site requests) or with a
+    ``Host`` other than a loopback name (DNS rebinding). A POST that is not
+    ``application/json`` gets 415, as no HTML form can send that.
+    """
+
+    def _allowed(self, post=False):
+        token = self.headers.get(TOKEN_HEADER) or ''
+        if ('Origin' in self.headers or not _loopback_host(self.headers.get('Host'))
+                or not hmac.compare_digest(token.encode('utf-8'), self.server.token.encode('utf-8'))):
+            self._reply(403, {'error': 'Forbidden: requests need the service token and no Origin header'})
+            return False
+        if post and (self.headers.get('Content-Type') or '').split(';')[0].strip().lower() != 'application/json':
+            self._reply(415, {'error': 'Requests must be application/json'})
+            return False
+        return True
+
+    def do_GET(self):
+        if not self._allowed():
+            return
+        service = self.server.service
+        if self.path == '/status':
+            self._reply(200, service.summary())
+        elif self.path.startswith('/jobs/'):
+            record = service.status(self.path[len('/jobs/'):])
+            if record:
+                self._reply(200, record)
+            else:
+                self._reply(404, {'error': 'Unknown job'})
+        else:
+            self._reply(404, {'error': f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        size = self.headers.get('Content-Length') or '0'
+        size = int(size) if size.isdigit() else MAX_BODY + 1
+        if size > MAX_BODY:
+            self.close_connection = True
+            self._reply(413, {'error': f"Request body over {MAX_BODY} bytes"})
+            return
+        data = self.rfile.read(size)  # read before any reply, so the client can finish sending
+        if not self._allowed(post=True):
+            return
+        try:
+            body = json.loads(data or b'{}')
+        except ValueError as e:
+            self._reply(400, {'error': f"Invalid JSON: {e}"})
+            return
+        if self.path == '/jobs':
+            try:
+                self._reply(202, self.server.service.submit(body))
+            except QueueFull as e:
+                self._reply(503, {'error': str(e)}, {'Retry-After': '1'})
+            except ValueError as e:
+                self._reply(400, {'error': str(e)})
+        elif self.path == '/expand':
+            from cleaner.batch import batch_names, expand_inputs
+
+            cwd = body.get('cwd') or os.getcwd()
+            inputs = expand_inputs([os.path.join(cwd, pattern) for pattern in body.get('inputs', [])])
+            self._reply(200, {'inputs': inputs, 'names': batch_names(inputs)})
+        else:
+            self._reply(404, {'error': f"Unknown path {self.path}"})
+
+    def _reply(self, code, payload, headers=None):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def address_string(self):
+        return self.client_address[0] if self.client_address else 'unix'
+
+    def log_message(self, format, *args):
+        self.server.logger.debug(f"{self.address_string()} {format % args}")
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(service, address, logger):
+    """
+    HTTP server for ``service`` on a loopback ``(host, port)`` or a Unix
+    socket path (0600). A new access token is written to ``token_path``.
+    """
+    if isinstance(address, str):
+        if os.path.exists(address) and stat.S_ISSOCK(os.stat(address).st_mode):
+            os.unlink(address)  # left behind by a daemon that did not shut down
+        server = _UnixHTTPServer(address, _Handler)
+        os.chmod(address, 0o600)
+    else:
+        # jobs read and write any path the user can: never listen beyond this machine
+        if address[0] not in LOOPBACK:
+            raise ValueError(f"The cleaning service only listens on the loopback interface, not {address[0]}")
+        server = ThreadingHTTPServer(address, _Handler)
+    server.service = service
+    server.logger = logger
+    server.token = write_token(token_path(address))
+    return server
+
+
+def run_service(address, workers=None, queue_size=QUEUE_SIZE, logger=None):
+    """Serve cleaning jobs on ``address`` until interrupted."""
+    logger = logger or logging.getLogger(__name__)
+    service = CleaningService(workers, queue_size)
+    server = make_server(service, address, logger)
+    message = (f"Cleaning service on {_describe(address)}: {service.workers} warm workers, "
+               f"up to {service.capacity} jobs queued or running")
+    logger.info(message)
+    print(message, flush=True)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))  # stop as on Ctrl+C
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+        for path in (address if isinstance(address, str) else None, token_path(address)):
+            if path and os.path.exists(path):
+                os.unlink(path)
+        logger.info("Cleaning service stopped")
+
+
+# --- Client ---
+
+class _UnixConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+def request(address, method, path, payload=None, timeout=30):
+    """
+    One JSON request to the service, with the token from its token file;
+    raises QueueFull on 503 and ServiceError on other errors.
+    """
+    if isinstance(address, str):
+        connection = _UnixConnection(address, timeout)
+    else:
+        connection = http.client.HTTPConnection(*address, timeout=timeout)
+    try:
+        body = None if payload is None else json.dumps(payload)
+        headers = {TOKEN_HEADER: read_token(address) or ''}
+        if body:
+            headers['Content-Type'] = 'application/json'
+        connection.request(method, path, body, headers)
+        response = connection.getresponse()
+        data = json.loads(response.read() or b'null')
+    except OSError as e:
+        raise ServiceError(f"No cleaning service at {_describe(address)} ({e}); start one with CLI.py --serve")
+    finally:
+        connection.close()
+    if response.status == 503:
+        raise QueueFull(data['error'])
+    if response.status >= 400:
+        raise ServiceError(data['error'])
+    return data
+
+
+def submit_job(address, job, wait=60.0):
+    """
+    Submit ``job`` (``clean_data`` options plus ``input_path``,
+    ``output_path`` or ``output_dir``, ``report_path`` and ``log_path``;
+    relative paths are relative to this process). While the service is full,
+    retries with backoff for up to ``wait`` seconds before raising
+    QueueFull. Returns the job's status record.
+    """
+    job = dict(job, cwd=job.get('cwd') or os.getcwd())
+    deadline = time.monotonic() + wait
+    delay = 0.05
+    while True:
+        try:
+            return request(address, 'POST', '/jobs', job)
+        except QueueFull:
+            if time.monotonic() + delay > deadline:
+                raise
+            time.sleep(delay)
+            delay = min(delay * 2, 1.0)
+
+
+def job_status(address, job_id):
+    return request(address, 'GET', f"/jobs/{job_id}")
+
+
+def expand_remote(address, patterns, names=False):
+    """
+    Input files for ``patterns``, expanded by the service like a batch run
+    (see ``expand_inputs``); with ``names``, also their output names as
+    ``(inputs, names)`` (see ``batch_names``), to send as each job's ``name``.
+    """
+    reply = request(address, 'POST', '/expand', {'inputs': list(patterns), 'cwd': os.getcwd()})
+    return (reply['inputs'], reply['names']) if names else reply['inputs']
+
+
+def wait_jobs(address, job_ids, poll=0.5, on_update=None):
+    """
+    Poll until every job has finished and return their records in order.
+    Polls start 10 ms apart, so small jobs return at once, and back off to
+    ``poll`` seconds. ``on_update(record)`` is called whenever a job's state
+    or progress changes.
+    """
+    records = {}
+    delay = 0.01
+    while True:
+        active = [job_id for job_id in job_ids if job_id not in records or records[job_id]['state'] in ACTIVE]
+        if not active:
+            return [records[job_id] for job_id in job_ids]
+        for job_id in active:
+            record = job_status(address, job_id)
+            old = records.get(job_id)
+            if on_update and (old is None or (old['state'], old['steps']) != (record['state'], record['steps'])):
+                on_update(record)
+            records[job_id] = record
+        if any(record['state'] in ACTIVE for record in records.values()):
+            time.sleep(delay)
+            delay = min(delay * 2, poll)
+
+
+def job_line(record):
+    """One line for a job record: its file and state, then progress or outcome."""
+    name = os.path.basename(record['input'])
+    if record['state'] in ACTIVE:
+        return f"{name}: {record['state']}" + (f" - {record['progress']}" if record['progress'] else '')
+    if record['error']:
+        return f"{name}: failed ({record['error']})"
+    result = record['result']
+    return f"{name}: {result['rows_in']} -> {result['rows_out']} rows in {result['seconds']:.2f}s"
@@ -0,0 +1,128 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+# Default sketch sizes: ~1.3% rank error for quantiles, ~0.8% for distinct counts.
+QUANTILE_K = 200
+DISTINCT_PRECISION = 14
+
+
+def rank_error(k):
+    """
+    Normalized rank error of a KLL sketch with parameter ``k`` at 99%
+    confidence (the empirical fit published with Apache DataSketches).
+    """
+    return 2.296 / k ** 0.9723
+
+
+class QuantileSketch:
+    """
+    KLL quantile sketch (Karnin, Lang, Liberty 2016) over float values.
+
+    Values land in level 0. A level over its capacity is sorted and every
+    other value, starting at a random offset, moves up one level with
+    double weight. Capacities shrink by 2/3 per level below the top, so
+    memory stays around ``3 * k`` values whatever the row count. Until the
+    first compaction the sketch holds every value and quantiles are exact.
+    Sketches merge level by level, so chunks or workers can be sketched
+    separately. The offsets come from a seeded generator, so reruns give the
+    same answers.
+    """
+
+    def __init__(self, k=QUANTILE_K, seed=0):
+        self.k = k
+        self.count = 0
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def capacity(self, level):
+        depth = len(self.levels) - 1 - level
+        return max(2, math.ceil(self.k * (2 / 3) ** depth))
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self.count += len(values)
+        self._compress()
+        return self
+
+    def merge(self, other):
+        for level, items in enumerate(other.levels):
+            if level == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self._compress()
+        return self
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self.capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                odd = len(items) % 2  # an odd value out stays behind
+                promoted = items[odd + self._rng.integers(2)::2]
+                self.levels[level] = items[:odd]
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    @property
+    def exact(self):
+        return len(self.levels) == 1
+
+    def quantile(self, q):
+        if not self.count:
+            return np.nan
+        if self.exact:
+            return float(np.quantile(self.levels[0], q))
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(values), 2 ** level) for level, values in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        cum = np.cumsum(weights[order])
+        position = np.searchsorted(cum, q * (cum[-1] - 1), side='right')
+        return float(items[order[min(position, len(items) - 1)]])
+
+
+class DistinctSketch:
+    """
+    HyperLogLog distinct count (Flajolet et al. 2007) with ``2**precision``
+    one-byte registers: 16 KiB and ~0.8% standard error at the default
+    precision, for any number of rows. Values are hashed with
+    ``pd.util.hash_pandas_object``; sketches merge by register-wise maximum.
+    """
+
+    def __init__(self, precision=DISTINCT_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(2 ** precision, dtype=np.uint8)
+
+    @property
+    def standard_error(self):
+        return 1.04 / math.sqrt(len(self.registers))
+
+    def update(self, values):
+        hashes = pd.util.hash_pandas_object(pd.Series(values), index=False).to_numpy()
+        width = 64 - self.precision
+        index = (hashes >> np.uint64(width)).astype(np.intp)
+        rest = hashes & np.uint64(2 ** width - 1)
+        # register value: position of the leftmost 1-bit in the remaining bits
+        # (frexp's exponent is the bit length, exact since the values fit in 53 bits)
+        rank = width + 1 - np.frexp(rest.astype(float))[1]
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+        return self
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self):
+        m = len(self.registers)
+        raw = 0.7213 / (1 + 1.079 / m) * m * m / np.sum(np.exp2(-self.registers.astype(float)))
+        zeros = int((self.registers == 0).sum())
+        if raw <= 2.5 * m and zeros:
+            return int(round(m * math.log(m / zeros)))  # linear counting for small cardinalities
+        return int(round(raw))
@@ -0,0 +1,458 @@
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from cleaner.dedup import row_hashes
+from cleaner.numeric import float_view
+from cleaner.parallel import column_blocks, map_columns
+from cleaner.stats import ColumnStats, numeric_matrix, _as_column_dtype
+
+# Columns with fewer distinct values than this are treated as categorical.
+CATEGORICAL_CARDINALITY = 10
+TEXT_DTYPES = ['object', 'category', 'string']
+
+
+def split_cols(value):
+    """Turn a comma-separated column string (CLI/GUI style) into a list."""
+    return [col.strip() for col in value.split(',')] if value else None
+
+
+def detect_columns(df, stats=None, threads=None):
+    """
+    Split columns into auto-categoricals (text/category, or numeric with
+    fewer than 10 distinct values) and auto-numerics (everything else numeric).
+    """
+    stats = stats or ColumnStats(df)
+    numeric = df.select_dtypes(include='number').columns
+    categoricals = set(df.select_dtypes(include=TEXT_DTYPES).columns)
+    distinct = map_columns(stats.nunique, numeric, threads)
+    categoricals.update(col for col, count in zip(numeric, distinct) if count < CATEGORICAL_CARDINALITY)
+    auto_categoricals = [col for col in df.columns if col in categoricals]
+    auto_numerics = [col for col in numeric if col not in categoricals]
+    return auto_categoricals, auto_numerics
+
+
+def is_text(series):
+    """Object or Arrow/pandas string column (not category)."""
+    return series.dtype == 'object' or isinstance(series.dtype, pd.StringDtype)
+
+
+def as_str(series):
+    """``astype(str)`` that spells nulls 'nan' for every text dtype, as object columns do."""
+    if isinstance(series.dtype, pd.StringDtype):
+        series = series.astype(object).where(series.notna(), np.nan)
+    return series.astype(str)
+
+
+# --- Strip Whitespace ---
+# The characters str.strip() removes (str.isspace), so Arrow trims exactly what Python does.
+WHITESPACE = ('\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f \x85\xa0\u1680\u2000\u2001\u2002\u2003\u2004\u2005\u2006'
+              '\u2007\u2008\u2009\u200a\u2028\u2029\u202f\u205f\u3000')
+# Object columns with at most this share of distinct values in their first
+# DICTIONARY_SAMPLE rows are cleaned once per distinct value, not per row.
+DICTIONARY_SHARE = 0.5
+DICTIONARY_SAMPLE = 10_000
+UNICODE_FORMS = ('NFC', 'NFKC', 'NFD', 'NFKD')
+
+
+def clean_text(value, casefold=False, unicode_form=None):
+    """One string as the strip stage leaves it: case-folded, normalized to ``unicode_form``, stripped."""
+    if casefold:
+        value = value.casefold()
+    if unicode_form:
+        value = unicodedata.normalize(unicode_form, value)
+    return value.strip()
+
+
+def _strip_categories(series, casefold=False, unicode_form=None):
+    # clean each category label once instead of every row; the codes only
+    # change when labels merge or (unordered) fall out of sorted order
+    labels = _strip_objects(pd.Series(series.cat.categories.astype(str)), casefold, unicode_form)
+    if labels.is_unique and (series.cat.ordered or labels.is_monotonic_increasing):
+        return series.cat.rename_categories(labels.tolist())
+    lookup = pd.Categorical(labels)
+    codes = np.append(lookup.codes, -1)[series.cat.codes.to_numpy()]  # code -1 (null) stays -1
+    stripped = pd.Categorical.from_codes(codes, lookup.categories).remove_unused_categories()
+    return pd.Series(stripped, index=series.index, name=series.name)
+
+
+def _strip_arrow(series, casefold=False, unicode_form=None):
+    # pyarrow.compute kernels over the column's own buffers; Arrow has no case
+    # folding, so that runs in Python over the distinct values only
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    values = pa.array(series)
+    if casefold:
+        encoded = values.dictionary_encode()
+        folded = pa.array([value.casefold() for value in encoded.dictionary.to_pylist()], values.type)
+        values = folded.take(encoded.indices)
+    if unicode_form:
+        values = pc.utf8_normalize(values, form=unicode_form)
+    values = pc.utf8_trim(values, characters=WHITESPACE)
+    return pd.Series(type(series.array)(values), index=series.index, name=series.name)
+
+
+def _strip_objects(series, casefold=False, unicode_form=None):
+    # other values are cleaned as str(value), as astype(str) spells them
+    if pd.api.types.infer_dtype(series, skipna=True) not in ('string', 'empty'):
+        series = series.where(series.isna(), series.astype(str))
+    sample = series.iloc[:DICTIONARY_SAMPLE]
+    if sample.nunique() <= DICTIONARY_SHARE * len(sample):
+        codes, uniques = pd.factorize(series)
+        cleaned = np.array([clean_text(value, casefold, unicode_form) for value in uniques] + [None], dtype=object)
+        values = np.where(codes >= 0, cleaned[codes], series.to_numpy(dtype=object))  # nulls as they were
+        return pd.Series(values, index=series.index, name=series.name, dtype=series.dtype)
+    text = series.str
+    if casefold:
+        text = text.casefold().str
+    if unicode_form:
+        text = text.normalize(unicode_form).str
+    return text.strip()
+
+
+def _strip(series, casefold=False, unicode_form=None):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return _strip_categories(series, casefold, unicode_form)
+    if isinstance(series.dtype, pd.StringDtype) and series.dtype.storage != 'python':
+        return _strip_arrow(series, casefold, unicode_form)
+    return _strip_objects(series, casefold, unicode_form)
+
+
+def strip_columns(df, threads=None, casefold=False, unicode_form=None):
+    """
+    Strip text columns, and with ``casefold`` / ``unicode_form`` also fold
+    case and normalize them (e.g. 'NFKC'). Nulls stay null and every dtype
+    keeps its own: category columns clean each label once, Arrow strings
+    use pyarrow.compute kernels, and object columns with few distinct
+    values clean each distinct value once.
+    """
+    stripped = df.select_dtypes(include=TEXT_DTYPES).columns.tolist()
+    results = map_columns(lambda col: _strip(df[col], casefold, unicode_form), stripped, threads)
+    for col, series in zip(stripped, results):
+        df[col] = series
+    return df, stripped
+
+
+# --- Fill Missing Values ---
+def fit_fill(df, fill_method, stats=None, threads=None):
+    """Fill value for every numeric column, so a fitted plan can fill any later file."""
+    stats = stats or ColumnStats(df, threads)
+    cols = df.select_dtypes(include=np.number).columns.tolist()
+    if fill_method in ('mean', 'median'):
+        return dict(zip(cols, stats.numeric(cols, fill_method)[fill_method]))
+    if fill_method == 'mode':
+        return dict(zip(cols, map_columns(stats.mode, cols, threads)))
+    return {}
+
+
+def _fill(series, val):
+    if series.dtype == 'float32':  # a downcast column; keep the float64 fill value exact
+        series = series.astype('float64')
+    return series.fillna(val)
+
+
+def apply_fill(df, values, stats=None, threads=None, in_place=False):
+    """
+    Fill the columns that have nulls; returns the frame and the filled
+    columns. ``in_place`` writes float64 columns through instead of
+    replacing them.
+    """
+    cols = [col for col in values if col in df.columns]
+    nulls = map_columns(lambda col: stats.nulls(col) if stats else df[col].isnull().sum(), cols, threads)
+    filled = [col for col, count in zip(cols, nulls) if count > 0]
+
+    def fill(col):
+        view = float_view(df, col) if in_place else None
+        if view is None:
+            return _fill(df[col], values[col])
+        np.copyto(view, values[col], where=np.isnan(view))
+    for col, series in zip(filled, map_columns(fill, filled, threads)):
+        if series is not None:
+            df[col] = series
+    return df, filled
+
+
+# --- Remove Duplicates ---
+def duplicate_mask(df, subset_cols=None, seen=None):
+    """
+    Boolean mask of the duplicate rows, keeping the first occurrence. With
+    ``seen`` (a ``RowHashSet``) duplicates are tracked across calls by row
+    fingerprint, so chunks of one file can be deduplicated one after another.
+    """
+    if seen is None:
+        return df.duplicated(subset=subset_cols).to_numpy()
+    return seen.add(row_hashes(df, subset_cols))
+
+
+def drop_duplicate_rows(df, subset_cols=None, seen=None):
+    """Drop duplicate rows; returns the frame and a boolean mask of the dropped rows."""
+    dupes = duplicate_mask(df, subset_cols, seen)
+    return df.take(np.flatnonzero(~dupes)), dupes
+
+
+# --- Outlier Removal ---
+def fit_outliers(df, outlier_method, targets, logger, stats=None):
+    """Outlier parameters for every target column, computed over one numeric matrix."""
+    cols = []
+    for col in targets:
+        if col not in df.columns:
+            logger.warning(f"Outlier column '{col}' not found in DataFrame.")
+        elif col not in cols:
+            cols.append(col)
+    if outlier_method not in ('iqr', 'zscore'):
+        for _ in cols:
+            logger.warning(f"Unknown outlier method: {outlier_method}")
+        return {}
+    if not cols:
+        return {}
+
+    stats = stats or ColumnStats(df)
+    bounds = {}
+    if outlier_method == 'iqr':
+        quartiles = stats.numeric(cols, 'q1', 'q3')
+        for col, q1, q3 in zip(cols, quartiles['q1'], quartiles['q3']):
+            bounds[col] = iqr_bounds(q1, q3)
+    else:
+        moments = stats.numeric(cols, 'mean', 'std')
+        for col, mean, std in zip(cols, moments['mean'], moments['std']):
+            if std == 0 or np.isnan(std):
+                logger.warning(f"Skipped outlier detection for column '{col}' due to zero or NaN std.")
+                continue
+            bounds[col] = {'mean': mean, 'std': std}
+    return bounds
+
+
+def iqr_bounds(q1, q3):
+    iqr = q3 - q1
+    return {'lower': q1 - 1.5 * iqr, 'upper': q3 + 1.5 * iqr}
+
+
+def _flag_outliers(df, outlier_method, bounds, cols, rows=None):
+    matrix = numeric_matrix(df, cols)
+    if rows is not None:
+        matrix = matrix[rows]
+    params = [bounds[col] for col in cols]
+    with np.errstate(invalid='ignore'):
+        if outlier_method == 'iqr':
+            lower = np.array([p['lower'] for p in params], dtype=np.float64)
+            upper = np.array([p['upper'] for p in params], dtype=np.float64)
+            # NaN fails both comparisons and counts as an outlier, like ~Series.between
+            flagged = ~((matrix >= lower) & (matrix <= upper))
+        else:
+            mean = np.array([p['mean'] for p in params], dtype=np.float64)
+            std = np.array([p['std'] for p in params], dtype=np.float64)
+            flagged = np.abs((matrix - mean) / std) > 3
+    return flagged.any(axis=1), flagged.sum(axis=0).tolist()
+
+
+def outlier_mask(df, outlier_method, bounds, rows=None, threads=None, per_column=False):
+    """
+    Boolean mask of the rows flagged in any column, and per-column counts.
+    All target columns are tested at once as one boolean matrix (one per
+    column block with ``threads``, one per column with ``per_column``, so
+    only one column is copied at a time). With ``rows`` (a boolean mask)
+    only those rows are tested and counted; the others are never flagged.
+    """
+    cols = [col for col in bounds if col in df.columns]
+    if not cols:
+        return np.zeros(len(df), dtype=bool), {}
+    blocks = [[col] for col in cols] if per_column else column_blocks(cols, threads)
+    results = map_columns(lambda block: _flag_outliers(df, outlier_method, bounds, block, rows), blocks, threads)
+    flagged = np.logical_or.reduce([any_flagged for any_flagged, _ in results])
+    counts = dict(zip(cols, [count for _, block_counts in results for count in block_counts]))
+    if rows is None:
+        return flagged, counts
+    mask = np.zeros(len(df), dtype=bool)
+    mask[rows] = flagged
+    return mask, counts
+
+
+def apply_outliers(df, outlier_method, bounds):
+    """Drop rows flagged in any column; returns the frame and per-column counts."""
+    flagged, counts = outlier_mask(df, outlier_method, bounds)
+    # take() returns an independent frame, so later stages can assign columns without copy warnings
+    return df.take(np.flatnonzero(~flagged)), counts
+
+
+# --- Encode Categoricals ---
+def label_codes(series):
+    """
+    ``(codes, labels)`` with ``labels[codes]`` equal to ``as_str(series)``,
+    casting only the distinct values to str: category codes for categoricals,
+    ``pd.factorize`` otherwise. Object columns that mix types (factorize
+    treats 1, 1.0 and True as one value) or null kinds are cast row by row.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes, uniques = series.cat.codes.to_numpy(), series.cat.categories
+    else:
+        if series.dtype == object and pd.api.types.infer_dtype(series, skipna=True) not in ('string', 'empty'):
+            series = as_str(series)
+        codes, uniques = pd.factorize(series)
+    # code -1 (null) picks the trailing label, spelled as as_str spells the nulls
+    null_labels = as_str(series[codes == -1]).unique() if (codes == -1).any() else ['nan']
+    if len(null_labels) > 1:  # None and NaN in one object column
+        return label_codes(as_str(series))
+    return codes, np.append(as_str(pd.Series(uniques)).to_numpy(dtype=object), null_labels[0]).astype(object)
+
+
+def cap_levels(levels, counts, max_categories):
+    """
+    Keep the ``max_categories - 1`` most frequent of ``levels`` (ties go to
+    the earlier level) when there are more than ``max_categories``; the rest
+    share one "other" column. Returns (kept levels in their order, capped?).
+    """
+    if not max_categories or len(levels) <= max_categories:
+        return list(levels), False
+    counts = counts.reindex(levels, fill_value=0)
+    order = np.argsort(-counts.to_numpy(), kind='stable')[:max(max_categories - 1, 0)]
+    return [levels[i] for i in sorted(order)], True
+
+
+def _fit_vocabulary(series, encode_method, max_categories=None):
+    """(vocabulary, capped?) of one column."""
+    if encode_method == 'label':
+        codes, labels = label_codes(series)
+        return np.unique(labels[np.unique(codes)]).tolist(), False
+    levels = pd.Categorical(series).remove_unused_categories().categories.tolist()
+    counts = series.value_counts() if max_categories else None
+    return cap_levels(levels, counts, max_categories)
+
+
+def fit_encoding(df, encode_method, targets, max_categories=None, threads=None):
+    """
+    Vocabulary per target column, and the one-hot columns whose rarest
+    levels were capped into "other" by ``max_categories``.
+    """
+    if encode_method not in ('label', 'onehot'):
+        return {}, []
+    cols = list(dict.fromkeys(targets))
+    fitted = map_columns(lambda col: _fit_vocabulary(df[col], encode_method, max_categories), cols, threads)
+    vocab = {col: levels for col, (levels, _) in zip(cols, fitted)}
+    other = [col for col, (_, capped) in zip(cols, fitted) if capped]
+    return vocab, other
+
+
+def onehot_block(series, classes, other=False, sparse=False):
+    """
+    Dummy columns ``<col>_<level>`` for ``classes`` (plus ``<col>_other``),
+    named and typed like ``pd.get_dummies``. Nulls get no column; unseen
+    levels go to "other" if there is one. Built straight from the category
+    codes, as dense bool or, with ``sparse``, ``Sparse[bool]`` columns.
+    """
+    codes = pd.Categorical(series, categories=classes).codes.astype(np.intp)
+    names = [f"{series.name}_{level}" for level in classes]
+    if other:
+        codes[(codes == -1) & series.notna().to_numpy()] = len(classes)
+        names.append(f"{series.name}_other")
+    rows = np.flatnonzero(codes >= 0)
+    if sparse:
+        from scipy import sparse as sp
+
+        matrix = sp.csc_matrix((np.ones(len(rows), dtype=np.uint8), (rows, codes[rows])),
+                               shape=(len(series), len(names)))
+        block = pd.DataFrame.sparse.from_spmatrix(matrix, index=series.index, columns=names)
+        return block.astype(pd.SparseDtype(bool, False))
+    block = np.zeros((len(series), len(names)), dtype=bool)
+    block[rows, codes[rows]] = True
+    return pd.DataFrame(block, index=series.index, columns=names)
+
+
+def _label_encode(series, classes):
+    # encode each distinct value once, then map the rows through their codes
+    codes, labels = label_codes(series)
+    return pd.Categorical(labels, categories=classes).codes[codes]
+
+
+def apply_encoding(df, encode_method, vocab, logger=None, other=(), sparse=False, threads=None):
+    """
+    Encode with a fixed vocabulary; unseen labels become -1, unseen one-hot
+    levels all zeros (or "other" for the columns in ``other``). One-hot
+    blocks for all columns are joined to the frame in a single concat.
+    """
+    if encode_method == 'onehot':
+        cols = [col for col in vocab if col in df.columns]
+        if not cols:
+            return df
+        blocks = map_columns(lambda col: onehot_block(df[col], vocab[col], col in other, sparse), cols, threads)
+        return pd.concat([df.drop(columns=cols)] + blocks, axis=1)
+
+    if encode_method == 'label':
+        cols = list(vocab)
+        for col, codes in zip(cols, map_columns(lambda col: _label_encode(df[col], vocab[col]), cols, threads)):
+            unseen = int((codes == -1).sum())
+            if unseen and logger:
+                logger.warning(f"{unseen} values in '{col}' were not in the fitted vocabulary (encoded as -1)")
+            df[col] = codes
+    return df
+
+
+# --- Normalize ---
+def fit_normalization(df, normalize_method, targets, stats=None):
+    """Scaling parameters for every target column, computed over one numeric matrix."""
+    cols = list(dict.fromkeys(col for col in targets if col in df.columns))
+    if not cols or normalize_method not in ('zscore', 'minmax'):
+        return {}
+    stats = stats or ColumnStats(df)
+    if normalize_method == 'zscore':
+        moments = stats.numeric(cols, 'mean', 'std')
+        return {col: {'mean': mean, 'std': std}
+                for col, mean, std in zip(cols, moments['mean'], moments['std'])}
+    extremes = stats.numeric(cols, 'min', 'max')
+    return {col: {'min': _as_column_dtype(lo, df[col]), 'max': _as_column_dtype(hi, df[col])}
+            for col, lo, hi in zip(cols, extremes['min'], extremes['max'])}
+
+
+def apply_normalization(df, normalize_method, scales, threads=None, in_place=False):
+    """
+    Scale all target columns in one matrix operation (one per column block
+    with ``threads``). ``in_place`` scales float64 columns where they are
+    and only copies the others into the matrix.
+    """
+    cols = [col for col in scales if col in df.columns]
+    if not cols or normalize_method not in ('zscore', 'minmax'):
+        return df
+    views = [float_view(df, col) if in_place else None for col in cols]
+    copied = [j for j, view in enumerate(views) if view is None]
+    matrix = numeric_matrix(df, [cols[j] for j in copied], threads)
+    params = [scales[col] for col in cols]
+    if normalize_method == 'zscore':
+        shift = np.array([p['mean'] for p in params], dtype=np.float64)
+        scale = np.array([p['std'] for p in params], dtype=np.float64)
+    else:
+        shift = np.array([p['min'] for p in params], dtype=np.float64)
+        scale = np.array([p['max'] for p in params], dtype=np.float64) - shift
+
+    # (values, positions in cols): whole columns in place, column blocks of the matrix
+    tasks = [(view, j) for j, view in enumerate(views) if view is not None]
+    tasks += [(matrix[:, block[0]:block[-1] + 1], [copied[k] for k in block])
+              for block in column_blocks(range(len(copied)), threads) if block]
+
+    def rescale(task):
+        values, j = task
+        with np.errstate(invalid='ignore', divide='ignore'):
+            np.subtract(values, shift[j], out=values)
+            np.divide(values, scale[j], out=values)
+    map_columns(rescale, tasks, threads)
+    if copied:
+        df[[cols[j] for j in copied]] = matrix
+    return df
+
+
+# --- Validate Columns ---
+def _column_issues(df, col, stats):
+    issues = []
+    if stats.nunique(col, dropna=False) == 1:
+        issues.append((col, 'constant'))
+    if len(df) and stats.nulls(col) == len(df):
+        issues.append((col, 'entirely null'))
+    if is_text(df[col]) and stats.nunique(col) / len(df) > 0.5:
+        issues.append((col, 'high cardinality'))
+    return issues
+
+
+def find_column_issues(df, stats=None, threads=None):
+    stats = stats or ColumnStats(df)
+    found = map_columns(lambda col: _column_issues(df, col, stats), df.columns, threads)
+    return [issue for issues in found for issue in issues]
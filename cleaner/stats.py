@@ -0,0 +1,141 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from cleaner.parallel import column_blocks, map_columns
+
+
+# --- Numeric matrix helpers ---
+def numeric_matrix(df, cols, threads=None):
+    """
+    Columns as one float64 2-D array with each column contiguous (Fortran
+    order), so column reductions over axis 0 use NumPy's pairwise summation.
+    Built with a single copy per column, without an intermediate frame;
+    ``threads`` copies several columns at once.
+    """
+    matrix = np.empty((len(df), len(cols)), dtype=np.float64, order='F')
+
+    def copy(j):
+        # na_value maps pd.NA of nullable dtypes (Int64, Float64, ...) to NaN
+        matrix[:, j] = df[cols[j]].to_numpy(dtype=np.float64, na_value=np.nan)
+    map_columns(copy, range(len(cols)), threads)
+    return matrix
+
+
+def _column_stats(matrix, *names):
+    """Column-wise NaN-aware statistics over ``matrix``, all in vectorized passes."""
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)  # all-NaN columns give NaN, like pandas
+        stats = {}
+        for name in names:
+            if name == 'quartiles':
+                stats['q1'], stats['q3'] = np.nanquantile(matrix, [0.25, 0.75], axis=0)
+            elif name == 'median':
+                stats['median'] = np.nanmedian(matrix, axis=0)
+            elif name == 'mean':
+                stats['mean'] = np.nanmean(matrix, axis=0)
+            elif name == 'std':
+                stats['std'] = np.nanstd(matrix, axis=0, ddof=1)
+            elif name == 'min':
+                stats['min'] = np.nanmin(matrix, axis=0) if len(matrix) else np.full(matrix.shape[1], np.nan)
+            elif name == 'max':
+                stats['max'] = np.nanmax(matrix, axis=0) if len(matrix) else np.full(matrix.shape[1], np.nan)
+        return stats
+
+
+def _as_column_dtype(value, series):
+    # keep integer min/max as integers, matching the pandas reductions
+    return series.dtype.type(value) if series.dtype.kind in 'iu' and not np.isnan(value) else value
+
+
+# Numeric statistics ColumnStats.numeric can compute; q1/q3 come from one quantile call.
+NUMERIC_STATS = {'q1': 'quartiles', 'q3': 'quartiles', 'median': 'median', 'mean': 'mean',
+                 'std': 'std', 'min': 'min', 'max': 'max'}
+
+
+class ColumnStats:
+    """
+    Per-column statistics of one DataFrame (nulls, cardinality, moments,
+    min/max, quantiles, mode), each computed on first use and then cached.
+
+    Stages that change the frame call ``update`` with the new version and the
+    columns they mutated, so only those columns are recomputed; a change of
+    rows (duplicate or outlier removal) invalidates every column.
+
+    ``threads`` computes numeric statistics over column blocks in parallel.
+    Threads may also fill the cache as long as each works on its own columns.
+    """
+
+    def __init__(self, df, threads=None):
+        self.df = df
+        self.threads = threads
+        self._cache = {}  # column -> {statistic: value}
+
+    def update(self, df, changed=None):
+        """Point at a new version of the frame; ``changed=None`` means the rows changed."""
+        self.df = df
+        if changed is None:
+            self._cache.clear()
+            return self
+        for col in list(self._cache):
+            if col in changed or col not in df.columns:
+                del self._cache[col]
+        return self
+
+    def _get(self, col, name, compute):
+        stats = self._cache.setdefault(col, {})
+        if name not in stats:
+            stats[name] = compute(self.df[col])
+        return stats[name]
+
+    # --- Any column ---
+    def nulls(self, col):
+        return self._get(col, 'nulls', lambda s: int(s.isnull().sum()))
+
+    def null_counts(self, cols=None):
+        cols = self.df.columns if cols is None else cols
+        return pd.Series([self.nulls(col) for col in cols], index=cols, dtype='int64')
+
+    def nunique(self, col, dropna=True):
+        # without nulls both counts are the same, so one nunique() serves both
+        if self.nulls(col) == 0:
+            return self._get(col, 'nunique', lambda s: s.nunique())
+        key = 'nunique' if dropna else 'nunique_all'
+        return self._get(col, key, lambda s: s.nunique(dropna=dropna))
+
+    def mode(self, col):
+        def first_mode(series):
+            modes = series.mode()
+            return modes[0] if len(modes) else np.nan
+        return self._get(col, 'mode', first_mode)
+
+    # --- Numeric columns ---
+    def numeric(self, cols, *names):
+        """
+        ``{name: [value per column]}`` for numeric statistics in ``NUMERIC_STATS``.
+        Columns missing any of them are computed together over one matrix,
+        or over one matrix per column block with ``threads``.
+        """
+        missing = [col for col in dict.fromkeys(cols)
+                   if any(name not in self._cache.get(col, {}) for name in names)]
+        if missing:
+            kinds = dict.fromkeys(NUMERIC_STATS[name] for name in names)
+            blocks = column_blocks(missing, self.threads)
+            results = map_columns(lambda block: _column_stats(numeric_matrix(self.df, block), *kinds),
+                                  blocks, self.threads)
+            for block, computed in zip(blocks, results):
+                for j, col in enumerate(block):
+                    stats = self._cache.setdefault(col, {})
+                    for name in names:
+                        stats[name] = computed[name][j]
+        return {name: [self._cache[col][name] for col in cols] for name in names}
+
+    def describe(self, cols):
+        """Same layout as ``DataFrame.describe()`` for numeric ``cols``."""
+        stats = self.numeric(cols, 'mean', 'std', 'min', 'q1', 'median', 'q3', 'max')
+        rows = {'count': [float(len(self.df) - self.nulls(col)) for col in cols]}
+        for label, name in (('mean', 'mean'), ('std', 'std'), ('min', 'min'), ('25%', 'q1'),
+                            ('50%', 'median'), ('75%', 'q3'), ('max', 'max')):
+            rows[label] = stats[name]
+        return pd.DataFrame.from_dict(rows, orient='index', columns=list(cols)).astype('float64')
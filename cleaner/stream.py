@@ -0,0 +1,421 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from cleaner.counts import ValueCounts
+from cleaner.dedup import RowHashSet, row_hashes
+from cleaner.formats import iter_chunks, TableWriter
+from cleaner.metrics import StageMetrics
+from cleaner.parallel import map_columns
+from cleaner.pipeline import required_columns, shared_normalize_pass
+from cleaner.report import (report_header, report_approximation, report_stages, report_validation,
+                            report_in_place, report_final_shape, report_performance, write_report)
+from cleaner.sketches import DistinctSketch, QuantileSketch
+from cleaner.stages import CATEGORICAL_CARDINALITY, cap_levels, iqr_bounds
+
+
+class ColumnSummary:
+    """
+    Mergeable statistics for one column, updated chunk by chunk.
+
+    Row/null counts, moments and min/max take constant memory. Distinct values
+    are only tracked up to ``distinct_cap`` unless ``counts=True`` is passed to
+    ``update``, which keeps full value counts (needed for vocabularies).
+    ``exact=True`` counts numeric values in a ``ValueCounts`` instead, which
+    spills to disk, for exact medians, modes and quantiles in bounded
+    memory. ``sketch=True`` keeps
+    fixed-size sketches instead: a KLL quantile sketch of size ``sketch_k``
+    for numeric columns and a HyperLogLog distinct count for the others;
+    ``count_distinct=True`` adds the HyperLogLog for numeric columns too.
+    """
+
+    def __init__(self, distinct_cap=CATEGORICAL_CARDINALITY, sketch_k=None):
+        self.kinds = set()
+        self.rows = 0
+        self.nulls = 0
+        self.count = 0
+        self.total = 0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+        self.distinct = set()
+        self.distinct_cap = distinct_cap
+        self.counts = None
+        self.value_counts = None
+        self.sketch_k = sketch_k
+        self.quantile_sketch = None
+        self.distinct_sketch = None
+
+    def update(self, series, counts=False, exact=False, sketch=False, count_distinct=False):
+        self.kinds.add(series.dtype.kind)
+        values = series.dropna()
+        self.rows += len(series)
+        self.nulls += len(series) - len(values)
+        if len(self.distinct) < self.distinct_cap:
+            self.distinct.update(values.unique()[:self.distinct_cap])
+        if counts:
+            chunk_counts = values.value_counts(sort=False)
+            self.counts = chunk_counts if self.counts is None else self.counts.add(chunk_counts, fill_value=0)
+        numeric = series.dtype.kind in 'iuf'
+        if exact and numeric:
+            if self.value_counts is None:
+                self.value_counts = ValueCounts()
+            self.value_counts.add(values.to_numpy(np.float64))
+        if sketch and numeric:
+            self.quantile_sketch = (self.quantile_sketch or QuantileSketch(self.sketch_k)).update(values)
+        if (sketch and not numeric) or count_distinct:
+            self.distinct_sketch = (self.distinct_sketch or DistinctSketch()).update(values)
+        if numeric and len(values):
+            self._update_moments(values)
+        return self
+
+    def _update_moments(self, values):
+        # Chan et al. pairwise update, so the variance stays stable across chunks
+        n = len(values)
+        chunk_total = values.sum().item()
+        chunk_mean = chunk_total / n
+        chunk_m2 = float(((values - chunk_mean) ** 2).sum())
+        if self.count:
+            delta = chunk_mean - self.total / self.count
+            self.m2 += chunk_m2 + delta * delta * self.count * n / (self.count + n)
+        else:
+            self.m2 = chunk_m2
+        self.total += chunk_total
+        self.count += n
+        chunk_min, chunk_max = values.min(), values.max()
+        self.min = chunk_min if self.min is None else min(self.min, chunk_min)
+        self.max = chunk_max if self.max is None else max(self.max, chunk_max)
+
+    def nunique(self, dropna=True):
+        if self.counts is not None:
+            distinct = len(self.counts)
+        elif self.value_counts is not None:
+            distinct = len(self.value_counts)
+        elif self.distinct_sketch is not None and len(self.distinct) >= self.distinct_cap:
+            distinct = self.distinct_sketch.estimate()
+        else:
+            distinct = len(self.distinct)
+        return distinct + (0 if dropna or not self.nulls else 1)
+
+    def mean(self):
+        return self.total / self.count if self.count else np.nan
+
+    def std(self):
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else np.nan
+
+    def quantile(self, q):
+        # Same linear interpolation as numpy/pandas, read off the value counts
+        if not self.count:
+            return np.nan
+        if self.value_counts is None:
+            return self.quantile_sketch.quantile(q)
+        h = (self.count - 1) * q
+        lo = math.floor(h)
+        a = self.value_counts.kth(lo)
+        b = self.value_counts.kth(min(lo + 1, self.count - 1))
+        t = h - lo
+        return a + (b - a) * t if t < 0.5 else b - (b - a) * (1 - t)
+
+    def median(self):
+        if not self.count:
+            return np.nan
+        if self.value_counts is None:
+            return self.quantile_sketch.quantile(0.5)
+        mid = self.count // 2
+        upper = self.value_counts.kth(mid)
+        if self.count % 2:
+            return upper
+        return (self.value_counts.kth(mid - 1) + upper) / 2
+
+    def mode(self):
+        mode = self.value_counts.mode()
+        return int(mode) if mode is not None and self.kinds <= set('iu') else mode
+
+    def close(self):
+        """Delete the spill files of the exact value counts, if any."""
+        if self.value_counts is not None:
+            self.value_counts.close()
+
+
+def resolve_dtype(kinds):
+    """Pick the dtype a full ``read_csv`` would infer from the per-chunk dtype kinds."""
+    if kinds <= set('iu'):
+        return 'int64'
+    if kinds <= set('iuf'):
+        return 'float64'
+    if kinds == {'b'}:
+        return 'bool'
+    return 'object'
+
+
+def _count_distinct(distinct, col, series, cap, memory_mb):
+    """
+    Count the distinct values of a text column into ``distinct[col]``: a
+    ``RowHashSet`` of their 64-bit hashes (8 bytes each, spilled past
+    ``memory_mb``) until ``cap`` is reached, then only the count. Without a
+    cap (``--approximate``) the column's sketch is used instead and
+    ``distinct[col]`` stays None.
+    """
+    if cap is None:
+        distinct.setdefault(col, None)
+        return
+    if col not in distinct:
+        distinct[col] = RowHashSet(memory_mb)
+    seen = distinct[col]
+    if isinstance(seen, RowHashSet):
+        seen.add(row_hashes(series.dropna().to_frame()))
+        if len(seen) >= cap:
+            distinct[col] = len(seen)
+            seen.close()
+
+
+def _distinct(summary, seen):
+    """Distinct values counted by ``_count_distinct``, or estimated by the summary's sketch."""
+    if seen is None:
+        return summary.nunique()
+    return len(seen) if isinstance(seen, RowHashSet) else seen
+
+
+def _summarize(summaries, cols, update, sketch_k=None, threads=None):
+    """
+    Call ``update(summary, col)`` for the ``ColumnSummary`` of each of
+    ``cols``, on ``threads`` worker threads. Missing summaries are created
+    first, in column order, so the result does not depend on thread timing.
+    """
+    for col in cols:
+        summaries.setdefault(col, ColumnSummary(sketch_k=sketch_k))
+    map_columns(lambda col: update(summaries[col], col), cols, threads)
+
+
+def _scan(plan, source, stop, targets, logger, count_cols=(), exact_cols=(), str_cols=(), sketch_cols=()):
+    """
+    One statistics pass: run the plan's stages before ``stop`` on every chunk
+    and summarize ``targets``. Columns in ``count_cols`` keep full value
+    counts, columns in ``exact_cols`` exact ``ValueCounts``, columns in
+    ``sketch_cols`` sketches; columns in ``str_cols`` are
+    summarized as strings (label encoding).
+    """
+    plan.reset_run()
+    summaries = {}
+    columns = required_columns(plan, source['columns'], stop, targets)
+    for chunk in iter_chunks(source['path'], source['chunksize'], source['fmt'], columns, source['dtypes'],
+                             source['byte_range']):
+        chunk = plan.transform(chunk, logger, stop=stop, chunked=True)
+
+        def update(summary, col):
+            values = chunk[col].astype(str) if col in str_cols else chunk[col]
+            summary.update(values, counts=col in count_cols, exact=col in exact_cols, sketch=col in sketch_cols)
+        _summarize(summaries, [col for col in targets if col in chunk.columns], update, source['sketch_k'],
+                   plan.threads)
+    return summaries
+
+
+def fit_plan_chunked(plan, source, layout, dtypes, logger):
+    """
+    Fit ``plan`` from chunks. Fill statistics come from the layout pass;
+    stages whose statistics depend on earlier row filtering (outliers after
+    dedup, encoding and normalization after outlier removal) get one more
+    statistics pass each.
+    """
+    columns = source['columns']
+    numerics = [col for col in columns if dtypes[col] in ('int64', 'float64')]
+    auto_categoricals = [col for col in columns if dtypes[col] == 'object'
+                         or (col in numerics and layout[col].nunique() < CATEGORICAL_CARDINALITY)]
+    auto_numerics = [col for col in numerics if col not in auto_categoricals]
+    targets = plan.targets(auto_categoricals, auto_numerics)
+    plan.params = {}
+
+    if plan.fill_method:
+        values = {}
+        for col in numerics:
+            if plan.fill_method == 'mean':
+                values[col] = layout[col].mean()
+            elif plan.fill_method == 'median':
+                values[col] = layout[col].median()
+            elif plan.fill_method == 'mode':
+                values[col] = layout[col].mode()
+            layout[col].close()
+        plan.params['fill'] = values
+
+    # --- Outlier statistics (after fill and dedup) ---
+    if plan.outlier_method:
+        iqr = plan.outlier_method == 'iqr'
+        quantile_cols = targets['outliers'] if iqr else ()
+        approximate = source['sketch_k'] is not None
+        summaries = _scan(plan, source, 'outliers', targets['outliers'], logger,
+                          exact_cols=() if approximate else quantile_cols,
+                          sketch_cols=quantile_cols if approximate else ())
+        bounds = {}
+        for col in targets['outliers']:
+            if col not in columns:
+                logger.warning(f"Outlier column '{col}' not found in DataFrame.")
+                continue
+            summary = summaries.get(col) or ColumnSummary()
+            if iqr:
+                bounds[col] = iqr_bounds(summary.quantile(0.25), summary.quantile(0.75))
+            elif plan.outlier_method == 'zscore':
+                std = summary.std()
+                if std == 0 or np.isnan(std):
+                    logger.warning(f"Skipped outlier detection for column '{col}' due to zero or NaN std.")
+                    continue
+                bounds[col] = {'mean': summary.mean(), 'std': std}
+            else:
+                logger.warning(f"Unknown outlier method: {plan.outlier_method}")
+            summary.close()
+        plan.params['outliers'] = bounds
+
+    # --- Encoding vocabularies and normalization statistics (after outliers) ---
+    # Normalization shares the encoding pass unless it targets columns that
+    # encoding rewrites or creates.
+    shared_pass = shared_normalize_pass(plan, columns, targets)
+
+    if plan.encode_method:
+        scanned = targets['encode'] + (targets['normalize'] if plan.normalize_method and shared_pass else [])
+        summaries = _scan(plan, source, 'encode', scanned, logger,
+                          count_cols=targets['encode'],
+                          str_cols=targets['encode'] if plan.encode_method == 'label' else ())
+        vocab = {}
+        other = []
+        for col in targets['encode']:
+            if col not in columns:
+                raise KeyError(col)
+            counts = summaries[col].counts if col in summaries else None
+            levels = [] if counts is None else counts.index.tolist()
+            if plan.encode_method == 'label':
+                vocab[col] = sorted(levels)
+            elif plan.encode_method == 'onehot':
+                levels = pd.Categorical(levels).categories.tolist()
+                vocab[col], capped = cap_levels(levels, counts, plan.max_categories)
+                if capped and col not in other:
+                    other.append(col)
+        plan.params['encode'] = vocab
+        plan.params['encode_other'] = other
+
+    if plan.normalize_method:
+        if not (plan.encode_method and shared_pass):
+            summaries = _scan(plan, source, 'normalize', targets['normalize'], logger)
+        scales = {}
+        for col in targets['normalize']:
+            if col not in summaries:
+                continue
+            summary = summaries[col]
+            if plan.normalize_method == 'zscore':
+                scales[col] = {'mean': summary.mean(), 'std': summary.std()}
+            elif plan.normalize_method == 'minmax':
+                scales[col] = {'min': summary.min, 'max': summary.max}
+        plan.params['normalize'] = scales
+    return plan
+
+
+def clean_data_chunked(plan, input_path, output_path, validate_cols, report_path, logger,
+                       chunksize=100_000, input_format=None, output_format=None, columns=None,
+                       duplicates_path=None, metrics=None, sketch_k=None, byte_range=None):
+    """
+    Chunked counterpart of ``clean_data`` for files that do not fit in memory.
+
+    The first pass reads the file chunk by chunk to settle dtypes, auto-detect
+    column roles and collect the fill statistics; an unfitted ``plan`` is then
+    fitted with ``fit_plan_chunked``. The final pass applies every stage per
+    chunk and appends to the output, so peak memory follows ``chunksize``
+    rather than the file size. The output matches the in-memory path.
+    ``metrics`` (a ``StageMetrics``) times each pass, and each stage summed
+    over the chunks of the final pass.
+
+    With ``sketch_k`` the median fill, IQR bounds and the high-cardinality
+    check use fixed-size sketches (``cleaner.sketches``) instead of full
+    value counts, so their memory no longer grows with the number of
+    distinct values; the report states the error bounds.
+
+    ``byte_range`` (start, end) cleans only those bytes of a plain CSV file
+    (see ``cleaner.incremental``). The row hashes of the dedup stage are
+    left in ``plan.seen`` for the caller to save or close.
+    """
+    metrics = metrics or StageMetrics()
+
+    # --- Pass 1: shape, dtypes, column roles and fill statistics ---
+    approximate = sketch_k is not None
+    fill_stats = plan.fill_method in ('median', 'mode') and not plan.is_fitted
+    fill_sketch = fill_stats and approximate and plan.fill_method == 'median'
+    layout = {}
+    with metrics.stage('layout pass') as run:
+        for chunk in iter_chunks(input_path, chunksize, input_format, columns, byte_range=byte_range):
+            def update(summary, col):
+                numeric = chunk[col].dtype.kind in 'iuf'
+                summary.update(chunk[col], exact=fill_stats and not fill_sketch and numeric,
+                               sketch=fill_sketch and numeric)
+            _summarize(layout, chunk.columns, update, sketch_k, plan.threads)
+            run['rows_out'] = (run['rows_out'] or 0) + len(chunk)
+
+    columns = list(layout)
+    dtypes = {col: resolve_dtype(summary.kinds) for col, summary in layout.items()}
+    original_shape = (layout[columns[0]].rows if columns else 0, len(columns))
+    source = {'path': input_path, 'chunksize': chunksize, 'fmt': input_format,
+              'columns': columns, 'dtypes': dtypes, 'sketch_k': sketch_k, 'byte_range': byte_range}
+
+    if not plan.is_fitted:
+        with metrics.stage('fit passes'):
+            fit_plan_chunked(plan, source, layout, dtypes, logger)
+
+    # --- Final pass: apply every stage and append each chunk to the output ---
+    # Validation keeps no value counts: the constant and all-null checks need
+    # only the capped distinct set and null counts. Text columns count their
+    # distinct values as hashes until they pass half the input rows; the output
+    # never has more rows, so the high-cardinality warning is certain by then.
+    plan.reset_run()
+    output_summaries = {}
+    text_distinct = {}
+    cardinality_cap = original_shape[0] // 2 + 1
+    output_columns = columns
+    writer = TableWriter(output_path, output_format, bundle=plan.bundle)
+    with plan.collect_duplicates(duplicates_path, columns):
+        chunks = metrics.iterate('read', iter_chunks(input_path, chunksize, input_format, columns, dtypes,
+                                                     byte_range))
+        for chunk in chunks:
+            chunk = plan.transform(chunk, logger, chunked=True, metrics=metrics)
+            output_columns = chunk.columns.tolist()
+            if validate_cols:
+                with metrics.stage('validate', len(chunk)):
+                    def update(summary, col):
+                        text = chunk[col].dtype == 'object'
+                        summary.update(chunk[col], sketch=text and approximate)
+                        if text:
+                            _count_distinct(text_distinct, col, chunk[col], None if approximate else cardinality_cap,
+                                            plan.dedup_memory_mb)
+                    _summarize(output_summaries, output_columns, update, sketch_k, plan.threads)
+            with metrics.stage('write', len(chunk)):
+                writer.write(chunk)
+    with metrics.stage('write'):
+        writer.close(columns)
+    final_rows = writer.rows
+
+    # --- Report, in the same order as the in-memory path ---
+    report_lines = []
+    report_header(report_lines, input_path, output_path, original_shape, logger)
+    if approximate:
+        report_approximation(report_lines, sketch_k, logger)
+    report_stages(report_lines, plan, logger)
+    if validate_cols:
+        issues = []
+        for col in output_columns:
+            summary = output_summaries.get(col) or ColumnSummary()
+            if summary.nunique(dropna=False) == 1:
+                issues.append((col, 'constant'))
+            if summary.rows and summary.nulls == summary.rows:
+                issues.append((col, 'entirely null'))
+            if col in text_distinct and final_rows and _distinct(summary, text_distinct[col]) / final_rows > 0.5:
+                issues.append((col, 'high cardinality'))
+        report_validation(report_lines, issues, logger)
+        for seen in text_distinct.values():
+            if isinstance(seen, RowHashSet):
+                seen.close()
+
+    logger.info(f"Saved cleaned data to {output_path}")
+    report_final_shape(report_lines, (final_rows, len(output_columns)))
+    plan.last_run['shapes'] = (original_shape, (final_rows, len(output_columns)))
+    plan.last_run['dtypes'] = dtypes
+    if plan.in_place:
+        report_in_place(report_lines, plan.last_run['in_place'], metrics.to_dict(), logger)
+    report_performance(report_lines, metrics.to_dict(), logger)
+    write_report(report_lines, report_path, logger)
+    return plan
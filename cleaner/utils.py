@@ -1,38 +1,36 @@
-import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
 import json
-import os
-import streamlit as st
-import zipfile
+
+from cleaner.stats import ColumnStats
 
 def load_templates(path="templates.json"):
     with open(path, "r") as f:
         return json.load(f)
 
-def profile_summary(df):
+# streamlit, matplotlib and seaborn (through cleaner.visuals) are imported where
+# they are used, so that importing this module stays cheap
+
+def profile_summary(df, stats=None):
+    import streamlit as st
+
+    stats = stats or ColumnStats(df)
     st.markdown("### 🔍 Profile Summary")
     st.write("**Shape:**", df.shape)
     st.write("**Column Types:**", df.dtypes)
     st.write("**Missing Values:**")
-    st.write(df.isnull().sum())
+    st.write(stats.null_counts())
     st.write("**Descriptive Stats:**")
-    st.write(df.describe())
+    numeric_cols = df.select_dtypes(include="number").columns
+    st.write(stats.describe(numeric_cols) if len(numeric_cols) else df.describe())
 
 def generate_visuals(df):
+    import streamlit as st
+    from cleaner.visuals import box_summary, draw_boxplot
+
     st.markdown("### 📊 Data Visualizations")
     numeric_cols = df.select_dtypes(include="number").columns.tolist()
     if numeric_cols:
         st.subheader("Boxplot for Outlier Detection")
-        fig, ax = plt.subplots(figsize=(12, 4))
-        sns.boxplot(data=df[numeric_cols], ax=ax)
+        # drawn from five-number summaries, not the rows, so large frames stay fast
+        fig = draw_boxplot([box_summary(df[col]) for col in numeric_cols], title=None)
+        fig.set_size_inches(12, 4)
         st.pyplot(fig)
-
-def create_zip(output_csv, report_md, log_txt, zip_path):
-    with zipfile.ZipFile(zip_path, 'w') as zipf:
-        if os.path.exists(output_csv):
-            zipf.write(output_csv)
-        if os.path.exists(report_md):
-            zipf.write(report_md)
-        if os.path.exists(log_txt):
-            zipf.write(log_txt)
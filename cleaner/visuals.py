@@ -0,0 +1,131 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+# Every chart is drawn from aggregates of bounded size, so drawing time does
+# not depend on the row count; only computing the aggregates reads the data.
+HIST_BINS = 50
+MAX_FLIERS = 500  # outlier points drawn per box
+KDE_SAMPLE = 10_000  # values the density curve is estimated from
+KDE_POINTS = 200
+TOP_CATEGORIES = 30
+
+# matplotlib and seaborn are imported where they are used, like in cleaner.utils
+
+
+def _values(series):
+    return pd.to_numeric(series, errors='coerce').dropna().to_numpy(dtype=float)
+
+
+def _spread(values, limit):
+    """At most ``limit`` evenly spaced values of sorted ``values``, first and last included."""
+    if len(values) <= limit:
+        return values
+    return values[np.linspace(0, len(values) - 1, limit).round().astype(int)]
+
+
+def box_summary(series, label=None):
+    """
+    Five-number summary of a numeric column in the form ``Axes.bxp`` draws:
+    quartiles, whiskers at the furthest values within 1.5 IQR (as seaborn
+    and matplotlib place them) and at most ``MAX_FLIERS`` of the outliers.
+    """
+    values = _values(series)
+    label = series.name if label is None else label
+    if not len(values):
+        return {'label': label, 'med': np.nan, 'q1': np.nan, 'q3': np.nan, 'whislo': np.nan, 'whishi': np.nan,
+                'fliers': np.empty(0), 'outliers': 0, 'count': 0}
+    q1, med, q3 = np.quantile(values, [0.25, 0.5, 0.75])
+    low, high = q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)
+    inside = values[(values >= low) & (values <= high)]
+    fliers = np.sort(values[(values < low) | (values > high)])
+    return {'label': label, 'med': med, 'q1': q1, 'q3': q3, 'whislo': inside.min(), 'whishi': inside.max(),
+            'fliers': _spread(fliers, MAX_FLIERS), 'outliers': len(fliers), 'count': len(values)}
+
+
+def _kde(values, edges):
+    """Gaussian density (Scott's bandwidth) of up to ``KDE_SAMPLE`` values, scaled to histogram counts."""
+    sample = values
+    if len(values) > KDE_SAMPLE:
+        sample = np.random.default_rng(0).choice(values, KDE_SAMPLE, replace=False)
+    std = sample.std()
+    x = np.linspace(edges[0], edges[-1], KDE_POINTS)
+    if std == 0 or len(sample) < 2:
+        return x, np.zeros_like(x)
+    bandwidth = std * len(sample) ** (-1 / 5)
+    density = np.exp(-0.5 * ((x[:, None] - sample[None, :]) / bandwidth) ** 2).sum(axis=1)
+    density /= len(sample) * bandwidth * np.sqrt(2 * np.pi)
+    return x, density * len(values) * (edges[1] - edges[0])
+
+
+def histogram(series, bins=HIST_BINS):
+    """Bin counts and edges of a numeric column, with a density curve on the same scale."""
+    values = _values(series)
+    counts, edges = np.histogram(values, bins=bins) if len(values) else (np.zeros(bins, dtype=int),
+                                                                         np.linspace(0, 1, bins + 1))
+    return {'label': series.name, 'counts': counts, 'edges': edges, 'kde': _kde(values, edges)}
+
+
+def top_counts(series, top=TOP_CATEGORIES):
+    """The ``top`` most frequent values, with the rest summed up as "(other)"."""
+    counts = series.value_counts()
+    if len(counts) > top:
+        counts = pd.concat([counts.iloc[:top], pd.Series({'(other)': counts.iloc[top:].sum()})])
+    return counts
+
+
+def correlation(df, cols):
+    return df[list(cols)].corr()
+
+
+# --- Drawing ---
+def draw_boxplot(summaries, title="Boxplot of Numeric Columns"):
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(10, 5))
+    ax.bxp([summary for summary in summaries if summary['count']], showfliers=True,
+           flierprops={'marker': 'd', 'markersize': 3, 'alpha': 0.5})
+    if title:
+        ax.set_title(title)
+    ax.set_xticklabels(ax.get_xticklabels(), rotation=45, ha="right")
+    return fig
+
+
+def draw_histogram(hist):
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots()
+    ax.stairs(hist['counts'], hist['edges'], fill=True, alpha=0.5)
+    ax.plot(*hist['kde'])
+    ax.set_title(f"Histogram of {hist['label']}")
+    ax.set_ylabel("Count")
+    return fig
+
+
+def draw_heatmap(corr):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    fig, ax = plt.subplots(figsize=(8, 6))
+    sns.heatmap(corr, annot=len(corr) <= 20, cmap="coolwarm", ax=ax)
+    return fig
+
+
+def draw_counts(counts, label):
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots()
+    counts.plot(kind="bar", ax=ax)
+    ax.set_title(f"Value Counts for {label}")
+    return fig
+
+
+def figure_png(fig):
+    """Render ``fig`` to PNG bytes (cacheable, unlike the figure) and free it."""
+    import matplotlib.pyplot as plt
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', bbox_inches='tight')
+    plt.close(fig)
+    return buffer.getvalue()
@@ -0,0 +1,47 @@
+import os
+
+import pandas as pd
+
+from cleaner.batch import expand_inputs, run_batch
+
+
+def test_batch_keeps_going_after_bad_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # reports/ and logs/ are created relative to the run
+    (tmp_path / "in").mkdir()
+    pd.DataFrame({"A": [1, None, 3]}).to_csv(tmp_path / "in" / "good.csv", index=False)
+    (tmp_path / "in" / "bad.csv").write_text('A\n1\n"unterminated\n')
+
+    inputs = expand_inputs(["in"])
+    options = dict(fill_method="mean", normalize_method=None, outlier_method=None,
+                   encode_method=None, drop_duplicates=False, duplicate_cols=None,
+                   strip_whitespace=False, validate_cols=False)
+    results = run_batch(inputs, options, output_dir="out", workers=2)
+
+    assert [r["input"] for r in results] == ["in/bad.csv", "in/good.csv"]
+    assert results[0]["error"] and results[1]["error"] is None
+    assert (results[1]["rows_in"], results[1]["rows_out"]) == (3, 3)
+    assert pd.read_csv(tmp_path / "out" / "good_cleaned.csv")["A"].isnull().sum() == 0
+    assert (tmp_path / "reports" / "good_report.md").exists()
+    assert (tmp_path / "logs" / "bad.log").exists()
+
+
+def test_batch_gives_same_named_inputs_distinct_outputs(tmp_path, monkeypatch):
+    from cleaner.batch import batch_names, format_summary
+
+    monkeypatch.chdir(tmp_path)
+    for folder, values in (("a", [1, 2]), ("b", [3, 4, 5])):
+        (tmp_path / folder).mkdir()
+        pd.DataFrame({"A": values}).to_csv(tmp_path / folder / "t.csv", index=False)
+    options = dict(fill_method=None, normalize_method=None, outlier_method=None,
+                   encode_method=None, drop_duplicates=False, duplicate_cols=None,
+                   strip_whitespace=False, validate_cols=False)
+    results = run_batch(["a/t.csv", "b/t.csv"], options, output_dir="out", workers=2)
+
+    assert [r["output"] for r in results] == [f"out{os.sep}a_t_cleaned.csv", f"out{os.sep}b_t_cleaned.csv"]
+    assert pd.read_csv(tmp_path / "out" / "a_t_cleaned.csv")["A"].tolist() == [1, 2]
+    assert pd.read_csv(tmp_path / "out" / "b_t_cleaned.csv")["A"].tolist() == [3, 4, 5]
+    assert (tmp_path / "logs" / "a_t.log").exists() and (tmp_path / "logs" / "b_t.log").exists()
+    assert "a/t.csv" in format_summary(results, 0.1) and "b/t.csv" in format_summary(results, 0.1)
+    # same folder name too: a counter; unique names are left alone
+    names = batch_names(["x/a/t.csv", "y/a/t.csv", "t.parquet", "u.csv"])
+    assert names == ["a_t", "a_t_2", f"{tmp_path.name}_t", "u"]
@@ -0,0 +1,37 @@
+import sys
+
+import pandas as pd
+
+from benchmarks.run_benchmarks import compare, parse_size
+from benchmarks.startup import CLI, import_times
+from benchmarks.synthetic import make_dataset
+
+
+def test_synthetic_dataset_is_deterministic_and_messy():
+    df = make_dataset(2_000, numeric_cols=3, categorical_cols=2, null_fraction=0.1, duplicate_rate=0.05,
+                      cardinality=6, seed=7)
+
+    pd.testing.assert_frame_equal(df, make_dataset(2_000, numeric_cols=3, categorical_cols=2, null_fraction=0.1,
+                                                   duplicate_rate=0.05, cardinality=6, seed=7))
+    assert list(df.columns) == ["num_0", "num_1", "num_2", "cat_0", "cat_1"]
+    assert df.duplicated().sum() == 100
+    assert 0.07 < df.isnull().mean().mean() < 0.13
+    assert df["cat_0"].nunique() == 6
+    assert df["cat_0"].str.startswith(" ").any()
+
+
+def test_compare_flags_only_real_slowdowns():
+    baseline = {"results": [{"rows": 10, "combo": "a", "seconds": 1.0}, {"rows": 10, "combo": "b", "seconds": 0.01}]}
+    results = {"results": [{"rows": 10, "combo": "a", "seconds": 1.5}, {"rows": 10, "combo": "b", "seconds": 0.03},
+                           {"rows": 20, "combo": "a", "seconds": 9.0}]}
+
+    assert compare(results, baseline, threshold=0.2) == [((10, "a"), 1.0, 1.5)]
+    assert compare(results, baseline, threshold=0.6) == []
+    assert parse_size("10k") == 10_000 and parse_size("1.5m") == 1_500_000
+
+
+def test_cli_help_does_not_import_pandas_or_sklearn():
+    modules = import_times([sys.executable, CLI, "--help"])
+
+    assert "argparse" in modules
+    assert not any(name.split(".")[0] in ("pandas", "sklearn") for name in modules)
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+
+from cleaner.cache import ResultCache, cache_key, content_hash
+
+
+def test_result_cache_evicts_lru_to_disk_and_back(tmp_path):
+    frame = pd.DataFrame({"A": np.arange(20_000, dtype=float)})  # 160 KB
+    cache = ResultCache(tmp_path / "cache", memory_mb=0.4, disk_mb=0.4)
+
+    computed = []
+    for i in range(4):
+        key = cache_key("clean", content_hash(b"data"), {"fill": i})
+        cache.fetch(key, lambda: computed.append(i) or frame + i)
+    assert computed == [0, 1, 2, 3]
+    assert cache.memory_bytes <= 0.4 * 2**20
+    assert len(list((tmp_path / "cache").iterdir())) == 2  # 0 and 1 moved to disk
+
+    # a disk hit comes back without recomputing and is the same frame
+    again = cache.fetch(cache_key("clean", content_hash(b"data"), {"fill": 1}), lambda: computed.append(1))
+    pd.testing.assert_frame_equal(again, frame + 1)
+    assert computed == [0, 1, 2, 3] and cache.hits == 1
+
+    # over the disk budget the oldest files are deleted
+    for i in range(4, 8):
+        cache.put(cache_key("clean", content_hash(b"data"), {"fill": i}), frame + i)
+    assert sum(path.stat().st_size for path in (tmp_path / "cache").iterdir()) <= 0.4 * 2**20
+    assert cache_key("clean", content_hash(b"data"), {"fill": 0}) not in cache
+    assert cache_key("clean", content_hash(b"other"), {"fill": 7}) not in cache
+
+    # a new process picks up the files left on disk
+    reopened = ResultCache(tmp_path / "cache", memory_mb=0.4, disk_mb=0.4)
+    assert reopened.disk_bytes == cache.disk_bytes
+    pd.testing.assert_frame_equal(reopened.get(cache_key("clean", content_hash(b"data"), {"fill": 5})), frame + 5)
@@ -102,3 +102,343 @@ def test_label_encoding(tmp_path):
     print(result.dtypes)
 
     assert result["Gender"].isin([0, 1]).all()
+
+
+def test_plan_roundtrip(tmp_path):
+    import logging
+    import pandas as pd
+    from cleaner.plan import CleaningPlan
+
+    reference = pd.DataFrame({"A": [1.0, None, 3.0, 5.0], "Color": ["red", "blue", "red", "green"]})
+    plan = CleaningPlan(fill_method="median", encode_method="label", normalize_method="minmax",
+                        encode_cols="Color", normalize_cols="A")
+    expected = plan.fit_transform(reference.copy(), logging.getLogger())
+
+    plan_file = tmp_path / "plan.json"
+    plan.save(plan_file)
+    loaded = CleaningPlan.load(plan_file)
+
+    pd.testing.assert_frame_equal(loaded.transform(reference.copy(), logging.getLogger()), expected)
+
+    # new data reuses the reference statistics and vocabulary
+    new = loaded.transform(pd.DataFrame({"A": [None, 5.0], "Color": ["green", "purple"]}), logging.getLogger())
+    assert new["A"].tolist() == [0.5, 1.0]
+    assert new["Color"].tolist() == [1, -1]
+
+
+def test_onehot_other_bucket_and_sparse_output():
+    import logging
+    import pandas as pd
+    from cleaner.plan import CleaningPlan
+
+    reference = pd.DataFrame({"Color": ["red"] * 4 + ["blue"] * 3 + ["green", "pink", None]})
+    plan = CleaningPlan(encode_method="onehot", encode_cols="Color", max_categories=3)
+    dense = plan.fit_transform(reference.copy(), logging.getLogger())
+    assert list(dense.columns) == ["Color_blue", "Color_red", "Color_other"]
+    assert dense.sum().tolist() == [3, 4, 2]  # nulls get no column
+    assert plan.params["encode_other"] == ["Color"]
+
+    # the vocabulary is fixed: unseen levels fall into "other", the columns never change
+    plan.onehot_sparse = True
+    new = plan.transform(pd.DataFrame({"Color": ["purple", "red"]}), logging.getLogger())
+    assert list(new.columns) == list(dense.columns)
+    assert isinstance(new["Color_red"].dtype, pd.SparseDtype)
+    assert new.sparse.to_dense().values.tolist() == [[False, False, True], [False, True, False]]
+
+
+
+def test_steps_run_in_pipeline_order_with_one_row_filter():
+    import logging
+    import pandas as pd
+    import pytest
+    from cleaner.pipeline import options_from_steps, optimize, plan_steps, explain
+    from cleaner.plan import CleaningPlan
+
+    steps = [{"step": "encode", "method": "label", "columns": ["Color"]}, {"step": "dedup"},
+             {"step": "outliers", "method": "iqr", "columns": ["A"]}, {"step": "fill", "method": "median"}]
+    plan = CleaningPlan(**options_from_steps(steps))
+    assert [step["step"] for step in plan_steps(plan)] == ["fill", "dedup", "outliers", "encode"]
+    assert optimize(plan_steps(plan)) == [("map", ["fill"]), ("filter", ["dedup", "outliers"]), ("map", ["encode"])]
+    assert plan_steps(CleaningPlan(**options_from_steps(plan_steps(plan)))) == plan_steps(plan)
+    with pytest.raises(ValueError):
+        options_from_steps([{"step": "fill", "how": "mean"}])
+
+    df = pd.DataFrame({"A": [1.0, 2.0, 2.0, 3.0, 2.5, 100.0, None], "Color": list("rggbrrb")})
+    expected = CleaningPlan(fill_method="median", drop_duplicates=True, outlier_method="iqr", outlier_cols="A",
+                            encode_method="label", encode_cols="Color")
+    pd.testing.assert_frame_equal(plan.fit_transform(df.copy(), logging.getLogger()),
+                                  expected.fit_transform(df.copy(), logging.getLogger()))
+    assert (plan.last_run["duplicates_removed"], plan.last_run["outliers_removed"]) == (1, 1)
+    assert any(line.startswith("  Reordered") for line in
+               explain(plan, list(df.columns), plan.targets(["Color"], ["A"]), [s["step"] for s in steps]))
+
+
+def test_matrix_outliers_and_scaling_match_per_column():
+    import logging
+    import numpy as np
+    import pandas as pd
+    from cleaner.stages import fit_outliers, apply_outliers, fit_normalization, apply_normalization
+
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame(rng.normal(size=(200, 5)), columns=list("ABCDE"))
+    df.iloc[::7, 1] = None
+    df.iloc[3, 0] = 50
+
+    bounds = fit_outliers(df, "iqr", list(df.columns), logging.getLogger())
+    for col in df.columns:
+        q1, q3 = df[col].quantile(0.25), df[col].quantile(0.75)
+        assert np.isclose(bounds[col]["lower"], q1 - 1.5 * (q3 - q1))
+    cleaned, counts = apply_outliers(df, "iqr", bounds)
+    assert counts["B"] >= df["B"].isnull().sum()  # NaN counts as outside the IQR range
+    assert 3 not in cleaned.index
+
+    scales = fit_normalization(cleaned, "minmax", ["A", "C"])
+    scaled = apply_normalization(cleaned.copy(), "minmax", scales)
+    assert scaled[["A", "C"]].min().tolist() == [0.0, 0.0]
+    assert scaled[["A", "C"]].max().tolist() == [1.0, 1.0]
+
+
+def test_threads_give_the_same_result_and_log_order(caplog):
+    import logging
+    import numpy as np
+    import pandas as pd
+    from cleaner.parallel import column_blocks, map_columns
+    from cleaner.plan import CleaningPlan
+
+    assert map_columns(lambda x: x * 2, range(10), threads=4) == list(range(0, 20, 2))
+    assert column_blocks("abcde", 2) == [list("abc"), list("de")]
+
+    rng = np.random.default_rng(2)
+    df = pd.DataFrame(rng.normal(size=(300, 8)), columns=[f"n{i}" for i in range(8)])
+    df.iloc[::5, ::2] = None
+    for i in range(3):
+        df[f"c{i}"] = rng.choice([" a", "b ", None, "c"], 300)
+    results = []
+    for threads in (1, 4):
+        plan = CleaningPlan(fill_method="median", outlier_method="iqr", encode_method="label",
+                            normalize_method="zscore", strip_whitespace=True, drop_duplicates=True)
+        plan.threads = threads
+        plan.fit(df.iloc[:200], logging.getLogger())
+        caplog.clear()
+        cleaned = plan.transform(df.iloc[200:].assign(c0="z"), logging.getLogger())
+        results.append((cleaned, plan.params, plan.last_run["outlier_counts"], caplog.messages))
+    (serial, *rest), (threaded, *rest_threaded) = results
+    pd.testing.assert_frame_equal(serial, threaded)
+    assert rest == rest_threaded
+    assert rest[-1] and all("'c0'" in message for message in rest[-1])
+
+
+def test_strip_keeps_nulls_and_dtypes_on_every_text_path():
+    import sys
+    import numpy as np
+    import pandas as pd
+    from cleaner.pipeline import options_from_steps
+    from cleaner.stages import WHITESPACE, clean_text, strip_columns
+
+    assert set(WHITESPACE) == {chr(c) for c in range(sys.maxunicode + 1) if chr(c).isspace()}
+    values = [" Straße\u3000", "STRASSE ", None, "\x1c\ufb01le ", np.nan, "ﬁle", "x", " x"] * 3
+    unique = [f" row {i}\t" for i in range(24)]  # too many distinct values for the dictionary path
+    unique[5] = None
+    df = pd.DataFrame({"low": values, "high": unique, "mixed": [1, " a ", None, 2.5] * 6,
+                       "cat": pd.Categorical(values), "arrow": pd.Series(values, dtype="string[pyarrow]"),
+                       "python": pd.Series(values, dtype="string[python]")})
+    df, stripped = strip_columns(df, casefold=True, unicode_form="NFKC")
+
+    assert stripped == ["low", "high", "mixed", "cat", "arrow", "python"]
+    expected = [None if pd.isna(value) else clean_text(value, True, "NFKC") for value in values]
+    assert expected[:4] == ["strasse", "strasse", None, "file"]
+    for col in ("low", "cat", "arrow", "python"):
+        assert [None if pd.isna(value) else value for value in df[col]] == expected, col
+    assert df["low"].iloc[4] is np.nan and df["high"].iloc[5] is None and df["high"].iloc[0] == "row 0"
+    assert df["mixed"].tolist()[:3] == ["1", "a", None]
+    assert [str(dtype) for dtype in df.dtypes] == ["object", "object", "object", "category", "string", "string"]
+    assert df["arrow"].dtype.storage == "pyarrow" and list(df["cat"].cat.categories) == ["file", "strasse", "x"]
+
+    # labels of ordered categories that stay distinct are renamed in place
+    categories = strip_columns(pd.DataFrame({"c": pd.Categorical([" b", None, "a "], ordered=True)}))[0]["c"]
+    assert categories.tolist()[::2] == ["b", "a"] and categories.cat.ordered
+
+    assert options_from_steps([{"step": "strip", "casefold": True, "unicode": "NFC"}])["unicode_form"] == "NFC"
+
+
+def test_in_place_engine_matches_regular_path(tmp_path):
+    import logging
+    import numpy as np
+    import pandas as pd
+    from cleaner.core import clean_data
+    from cleaner.numeric import compact_rows, float_view, memmap_numeric
+
+    rng = np.random.default_rng(4)
+    df = pd.DataFrame({"a": rng.normal(size=500), "b": rng.integers(0, 9, 500), "c": rng.choice(["x", "y"], 500)})
+    df.loc[::6, "a"] = np.nan
+    df.loc[3, "a"] = 40.0
+    keep = rng.random(500) > 0.3
+    mapped, size = memmap_numeric(df.copy(), str(tmp_path))
+    assert size == 500 * 8 and isinstance(float_view(mapped, "a").base, np.memmap)
+    compacted = compact_rows(mapped, keep)
+    pd.testing.assert_frame_equal(compacted, df.take(np.flatnonzero(keep)))
+    assert np.shares_memory(compacted["a"].to_numpy(), mapped["a"].to_numpy())
+
+    path = tmp_path / "in.csv"
+    df.to_csv(path, index=False)
+    options = dict(fill_method="median", normalize_method="zscore", outlier_method="iqr", encode_method="label",
+                   drop_duplicates=True, duplicate_cols=None, strip_whitespace=False, validate_cols=False,
+                   logger=logging.getLogger())
+    clean_data(str(path), str(tmp_path / "regular.csv"), report_path=None, **options)
+    plan = clean_data(str(path), str(tmp_path / "lean.csv"), report_path=str(tmp_path / "report.md"),
+                      memmap_dir=str(tmp_path), **options)
+    assert (tmp_path / "regular.csv").read_text() == (tmp_path / "lean.csv").read_text()
+    copies = plan.last_run["in_place"]["copies"]
+    assert set(copies) == {"fill", "outliers", "compact", "normalize"}
+    assert all(own <= regular for own, regular in copies.values())
+    assert "## 🧮 In-Place Numeric Engine" in (tmp_path / "report.md").read_text(encoding="utf-8")
+
+
+def test_preflight_rejects_before_loading_and_schema_sets_dtypes(tmp_path):
+    import json
+    import logging
+    import pandas as pd
+    import pytest
+    from cleaner.batch import clean_file
+    from cleaner.core import clean_data
+    from cleaner.preflight import PreflightError
+
+    path = tmp_path / "in.csv"
+    pd.DataFrame({"a": [1.0, None, 3.0], "b": ["x", "y", "z"], "c": [5, 5, 5], "d": [None] * 3}).to_csv(path,
+                                                                                                   index=False)
+    options = dict(fill_method="mean", normalize_method=None, outlier_method=None, encode_method=None,
+                   drop_duplicates=False, duplicate_cols=None, strip_whitespace=False, validate_cols=False)
+    run = dict(options, logger=logging.getLogger(), report_path=None)
+
+    with pytest.raises(PreflightError) as rejected:
+        clean_data(str(path), str(tmp_path / "out.csv"), **dict(run, encode_method="onehot", encode_cols="b,q",
+                                                                 drop_duplicates=True, duplicate_cols="z"))
+    assert [(p["column"], p["check"]) for p in rejected.value.problems] == [("z", "missing"), ("q", "missing")]
+    with pytest.raises(PreflightError, match=r"column 'b' \(--normalize-cols\) is not numeric \(e.g. 'x'\)"):
+        clean_data(str(path), str(tmp_path / "out.csv"), **dict(run, normalize_method="zscore", normalize_cols="b"))
+    assert not (tmp_path / "out.csv").exists()
+    # label-encoded text and one-hot columns are numeric by the time they are normalized
+    clean_data(str(path), str(tmp_path / "out.csv"), **dict(run, encode_method="label", normalize_method="minmax",
+                                                             normalize_cols="b"))
+    clean_data(str(path), str(tmp_path / "out.csv"), **dict(run, encode_method="onehot", normalize_method="minmax",
+                                                             normalize_cols="b_x"))
+
+    schema = tmp_path / "schema.json"
+    schema.write_text(json.dumps({"columns": {"a": "float32", "b": "category", "c": {"dtype": "int8"}}}))
+    plan, df = clean_data(str(path), str(tmp_path / "out.csv"), schema_path=str(schema), return_data=True,
+                          **dict(run, fill_method=None, report_path=str(tmp_path / "report.md")))
+    assert df.dtypes.astype(str).to_dict() == {"a": "float32", "b": "category", "c": "int8"}
+    assert plan.preflight["warnings"] == [("c", "constant")]
+    assert "- `c` is constant in the first 3 rows" in (tmp_path / "report.md").read_text(encoding="utf-8")
+
+    schema.write_text(json.dumps({"columns": {"a": "int64", "d": {"dtype": None, "nullable": False}}}))
+    result = clean_file(str(path), str(tmp_path / "out2.csv"), None, str(tmp_path / "run.log"),
+                        dict(options, schema_path=str(schema)))
+    assert result["error"].startswith("PreflightError") and not (tmp_path / "out2.csv").exists()
+    assert [(p["column"], p["check"]) for p in result["problems"]] == [("a", "dtype"), ("d", "nulls")]
+
+
+def test_bundle_streams_output_and_skips_unchanged_files(tmp_path):
+    import logging
+    import os
+    import tarfile
+    import zipfile
+    import pandas as pd
+    import pytest
+    from cleaner.bundle import create_bundle, read_manifest
+    from cleaner.core import clean_data
+
+    path, output, report = tmp_path / "in.csv", tmp_path / "out.csv", tmp_path / "report.md"
+    pd.DataFrame({"a": [1.0, None, 3.0, 4.0] * 50, "b": ["x", "y", "z", "w"] * 50}).to_csv(path, index=False)
+    logger = logging.getLogger("test_bundle")
+    logger.setLevel(logging.INFO)
+    handler = logging.FileHandler(tmp_path / "run.log", mode="w", encoding="utf-8")
+    logger.addHandler(handler)
+    options = dict(fill_method="mean", normalize_method=None, outlier_method=None, encode_method=None,
+                   drop_duplicates=False, duplicate_cols=None, strip_whitespace=False, validate_cols=False,
+                   logger=logger, report_path=str(report))
+    try:
+        clean_data(str(path), str(output), bundle_path=str(tmp_path / "bundle.zip"), **options)
+    finally:
+        logger.removeHandler(handler)
+        handler.close()
+
+    files = [str(output), str(report), str(tmp_path / "run.log")]
+    with zipfile.ZipFile(tmp_path / "bundle.zip") as archive:
+        # the CSV member was written alongside the file, deflated
+        assert [info.filename for info in archive.infolist()] == [os.path.basename(f) for f in files]
+        assert archive.getinfo("out.csv").compress_type == zipfile.ZIP_DEFLATED
+        assert archive.read("out.csv") == output.read_bytes()
+        assert "Bundling the output" in archive.read("run.log").decode("utf-8")
+    assert read_manifest(str(tmp_path / "bundle.zip"))["out.csv"]["path"] == str(output)
+
+    # unchanged files are not bundled again, touched ones are hashed, changed ones rebuild it
+    assert create_bundle(str(tmp_path / "bundle.zip"), files) is False
+    os.utime(output, ns=(0, 10**18))
+    assert create_bundle(str(tmp_path / "bundle.zip"), files) is False
+    assert read_manifest(str(tmp_path / "bundle.zip"))["out.csv"]["mtime_ns"] == 10**18
+    report.write_text("changed", encoding="utf-8")
+    progress = []
+    assert create_bundle(str(tmp_path / "bundle.zip"), files, progress=lambda *args: progress.append(args)) is True
+    assert progress[-1][:2] == (sum(os.path.getsize(f) for f in files),) * 2
+    with zipfile.ZipFile(tmp_path / "bundle.zip") as archive:
+        assert archive.read("report.md") == b"changed"
+    with pytest.raises(OSError):  # a failed run leaves no bundle behind
+        clean_data(str(path), str(tmp_path), bundle_path=str(tmp_path / "failed.zip"), **options)
+    assert not (tmp_path / "failed.zip").exists() and not (tmp_path / "failed.zip.part").exists()
+
+    zstandard = pytest.importorskip("zstandard")
+    clean_data(str(path), str(output), bundle_path=str(tmp_path / "bundle.tar.zst"), chunksize=50,
+               **dict(options, report_path=None))
+    with open(tmp_path / "bundle.tar.zst", "rb") as f:
+        # tar readers stop at the manifest frame that trails the zstd stream
+        with tarfile.open(fileobj=zstandard.ZstdDecompressor().stream_reader(f, read_across_frames=False),
+                          mode="r|") as archive:
+            member = next(iter(archive))
+            assert member.name == "out.csv" and archive.extractfile(member).read() == output.read_bytes()
+    assert create_bundle(str(tmp_path / "bundle.tar.zst"), [str(output)]) is False
+
+
+def test_column_stats_cache_and_invalidation():
+    import pandas as pd
+    from cleaner.stats import ColumnStats
+
+    df = pd.DataFrame({"A": [1.0, None, 3.0, 3.0], "B": [4, 5, 6, 7], "C": ["x", None, "y", "x"]})
+    stats = ColumnStats(df)
+    pd.testing.assert_frame_equal(stats.describe(["A", "B"]), df.describe())
+    assert stats.null_counts().tolist() == df.isnull().sum().tolist()
+    assert [stats.nunique("C"), stats.nunique("C", dropna=False)] == [2, 3]
+
+    # only the mutated column is recomputed; a row change invalidates everything
+    df["A"] = df["A"].fillna(0.0)
+    stats.update(df, ["A"])
+    assert stats.nulls("A") == 0
+    df.loc[0, "B"] = 100  # unnoticed mutation: B keeps its cached maximum
+    assert stats.numeric(["B"], "max")["max"] == [7]
+    stats.update(df.iloc[:2])
+    assert stats.numeric(["A", "B"], "max")["max"] == [1.0, 100.0]
+
+
+def test_stage_metrics_report_and_json(tmp_path):
+    import json
+    import logging
+    import pandas as pd
+    from cleaner.core import clean_data
+
+    input_file = tmp_path / "input.csv"
+    pd.DataFrame({"A": [1.0, None, 3.0, 3.0], "B": ["x", "y", "y", "y"]}).to_csv(input_file, index=False)
+    report_file = tmp_path / "reports" / "report.md"
+    metrics_file = tmp_path / "metrics.json"
+
+    plan = clean_data(str(input_file), str(tmp_path / "output.csv"), "mean", None, None, "label", True, None,
+                      False, True, str(report_file), logging.getLogger(), metrics_path=str(metrics_file),
+                      trace_memory=True, profile_dir=str(tmp_path / "profiles"))
+
+    metrics = json.loads(metrics_file.read_text())
+    stages = [record["stage"] for record in metrics["stages"]]
+    assert stages == ["preflight", "load", "detect", "fill", "dedup", "encode", "validate", "write"]
+    assert metrics["stages"][4]["rows_in"] == 4 and metrics["stages"][4]["rows_out"] == 3
+    assert all(record["traced_peak_mb"] is not None for record in metrics["stages"])
+    assert plan.last_run["metrics"]["stages"][1]["rows_out"] == 4
+    assert sorted(path.name for path in (tmp_path / "profiles").iterdir()) == sorted(f"{s}.prof" for s in stages)
+    assert "## ⏱️ Performance" in report_file.read_text(encoding="utf-8")
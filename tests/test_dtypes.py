@@ -0,0 +1,46 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+from cleaner.core import clean_data
+from cleaner.dtypes import read_lean
+
+
+def test_read_lean_narrows_without_losing_values(tmp_path):
+    df = pd.DataFrame({
+        "small": np.arange(1000) % 100,
+        "wide": np.where(np.arange(1000) < 990, 1, 100_000),  # out of int8 range after the sample
+        "half": np.arange(1000) / 2,
+        "noisy": np.linspace(0, 1, 1000),
+        "color": np.array(["red", "green", None, "blue"], dtype=object)[np.arange(1000) % 4],
+    })
+    input_file = tmp_path / "input.csv"
+    df.to_csv(input_file, index=False)
+
+    lean, memory = read_lean(str(input_file), sample_rows=100)
+
+    assert lean.dtypes.astype(str).tolist() == ["int8", "int32", "float32", "float64", "category"]
+    pd.testing.assert_frame_equal(lean.astype({"small": "int64", "wide": "int64", "half": "float64",
+                                               "color": object}), pd.read_csv(input_file))
+    assert memory["color"][0][0] == "object" and memory["color"][1][1] < memory["color"][0][1]
+
+
+def test_optimized_run_matches_default_run(tmp_path):
+    df = pd.DataFrame({
+        "A": [1.5, None, 3.0, 4.5, 1.5] * 20,
+        "B": [3, 1, 2, 2, 3] * 20,
+        "Gender": [" M", "F ", None, "M", " M"] * 20,
+    })
+    input_file = tmp_path / "input.csv"
+    df.to_csv(input_file, index=False)
+    options = dict(fill_method="mean", normalize_method="minmax", outlier_method=None, encode_method="label",
+                   drop_duplicates=True, duplicate_cols=None, strip_whitespace=True, validate_cols=True,
+                   logger=logging.getLogger())
+
+    clean_data(str(input_file), str(tmp_path / "default.csv"), report_path=None, **options)
+    clean_data(str(input_file), str(tmp_path / "lean.csv"), report_path=str(tmp_path / "report.md"),
+               optimize_dtypes=True, **options)
+
+    assert (tmp_path / "lean.csv").read_text() == (tmp_path / "default.csv").read_text()
+    assert "## 🧠 Memory Optimization" in (tmp_path / "report.md").read_text(encoding="utf-8")
@@ -0,0 +1,61 @@
+import logging
+
+import pandas as pd
+import pytest
+
+from cleaner.core import clean_data
+from cleaner.formats import infer_format, iter_chunks, read_table
+
+pytest.importorskip("pyarrow")
+
+
+def test_infer_format():
+    assert infer_format("data/x.csv.gz") == "csv"
+    assert infer_format("data/x.parquet") == "parquet"
+    assert infer_format("data/x.arrow") == "feather"
+    assert infer_format("data/x.csv", "parquet") == "parquet"
+
+
+def test_parquet_roundtrip_keeps_dtypes(tmp_path):
+    df = pd.DataFrame({
+        "A": [1.0, None, 3.0, 4.0],
+        "Flag": [True, False, True, True],
+        "Group": pd.Categorical(["x", "y", "x", "y"]),
+        "Unused": ["a", "b", "c", "d"],
+    })
+    input_file = tmp_path / "input.parquet"
+    df.to_parquet(input_file, index=False)
+
+    for chunksize in (None, 3):
+        output_file = tmp_path / f"output_{chunksize}.parquet"
+        clean_data(
+            input_path=str(input_file),
+            output_path=str(output_file),
+            fill_method="mean",
+            normalize_method=None,
+            outlier_method=None,
+            encode_method=None,
+            drop_duplicates=False,
+            duplicate_cols=None,
+            strip_whitespace=False,
+            validate_cols=False,
+            report_path=None,
+            logger=logging.getLogger(),
+            chunksize=chunksize,
+            columns="A,Flag,Group",
+        )
+        result = read_table(str(output_file))
+        assert result.columns.tolist() == ["A", "Flag", "Group"]
+        assert result["A"].tolist() == [1.0, 8 / 3, 3.0, 4.0]
+        assert result["Flag"].dtype == bool
+        assert isinstance(result["Group"].dtype, pd.CategoricalDtype)
+
+
+def test_iter_chunks_projects_columns(tmp_path):
+    path = tmp_path / "input.feather"
+    pd.DataFrame({"A": range(10), "B": range(10)}).to_feather(path)
+
+    chunks = list(iter_chunks(str(path), 4, columns=["B"]))
+
+    assert [len(chunk) for chunk in chunks] == [4, 4, 2]
+    assert all(chunk.columns.tolist() == ["B"] for chunk in chunks)
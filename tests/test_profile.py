@@ -0,0 +1,34 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from cleaner.profile import profile_file, profile_lines, save_profile
+
+
+def test_streaming_profile_matches_pandas_and_samples(tmp_path):
+    rng = np.random.default_rng(3)
+    df = pd.DataFrame({"a": rng.normal(size=1000), "b": rng.integers(0, 50, 1000),
+                       "c": rng.choice(["x", "y", None], 1000)})
+    df.loc[::9, "a"] = np.nan
+    path = tmp_path / "in.csv"
+    df.to_csv(path, index=False)
+
+    # a sketch larger than the column keeps every value, so the streamed numbers are exact
+    profile = profile_file(str(path), chunksize=128, sketch_k=1000)
+    assert profile["rows"] == 1000 and profile["sampled_rows"] is None
+    assert profile["dtypes"] == {"a": "float64", "b": "int64", "c": "object"}
+    assert profile["nulls"] == df.isnull().sum().to_dict()
+    assert profile["distinct"]["b"] == df["b"].nunique() and profile["distinct"]["c"] == 2
+    expected = df.describe()
+    for col in ("a", "b"):
+        np.testing.assert_allclose([profile["numeric"][col][stat] for stat in expected.index],
+                                   expected[col].to_numpy())
+    assert "Stats (numeric columns):" in profile_lines(profile)
+
+    sample = profile_file(str(path), sample_rows=100)
+    assert sample["sampled_rows"] == 100 and abs(sample["rows"] - 1000) < 100
+    assert profile_file(str(path), sample_rows=5000)["rows"] == 1000  # the whole file fit in the sample
+
+    save_profile(profile, tmp_path / "profile.json")
+    assert json.loads((tmp_path / "profile.json").read_text())["nulls"]["c"] == profile["nulls"]["c"]
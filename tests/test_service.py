@@ -0,0 +1,82 @@
+import json
+import logging
+import os
+import threading
+
+import pandas as pd
+import pytest
+
+from cleaner.batch import clean_file
+from cleaner.service import (TOKEN_HEADER, CleaningService, QueueFull, ServiceError, _UnixConnection, expand_remote,
+                             make_server, read_token, submit_job, token_path, wait_jobs)
+
+def raw_post(address, path, body, headers):
+    connection = _UnixConnection(address, 10)
+    connection.putrequest("POST", path, skip_host="Host" in headers)
+    for name, value in dict(headers, **{"Content-Length": str(len(body))}).items():
+        connection.putheader(name, value)
+    connection.endheaders(body.encode("utf-8"))
+    status = connection.getresponse().status
+    connection.close()
+    return status
+
+
+OPTIONS = dict(fill_method="median", normalize_method=None, outlier_method=None, encode_method=None,
+               drop_duplicates=True, duplicate_cols=None, strip_whitespace=True, validate_cols=False)
+
+
+def test_service_cleans_concurrent_jobs_with_backpressure(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for i in range(6):
+        pd.DataFrame({"a": [1.0, None, 3.0, 3.0, i], "b": [" x", "y ", None, None, "z"]}).to_csv(f"f{i}.csv",
+                                                                                            index=False)
+    clean_file("f0.csv", "local.csv", None, "local.log", OPTIONS)
+
+    service = CleaningService(workers=2, queue_size=1)
+    server = make_server(service, str(tmp_path / "service.sock"), logging.getLogger())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    address = str(tmp_path / "service.sock")
+    try:
+        # more clients than the service accepts at once: submits wait for room instead of failing
+        ids = []
+        threads = [threading.Thread(target=lambda i=i: ids.append(submit_job(address, dict(
+            OPTIONS, input_path=f"f{i}.csv", output_dir="out"))["id"])) for i in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        updates = []
+        records = wait_jobs(address, ids, on_update=updates.append)
+        assert [record["state"] for record in records] == ["done"] * 6
+        assert all(record["steps"] > 0 and record["result"]["rows_out"] == 4 for record in records)
+        assert updates and service.summary()["done"] == 6
+        assert (tmp_path / "out" / "f0_cleaned.csv").read_text() == (tmp_path / "local.csv").read_text()
+        assert (tmp_path / "reports" / "f0_report.md").exists() and (tmp_path / "logs" / "f0.log").exists()
+        assert expand_remote(address, ["f*.csv"]) == [str(tmp_path / f"f{i}.csv") for i in range(6)]
+        assert expand_remote(address, ["f*.csv"], names=True)[1] == [f"f{i}" for i in range(6)]
+        record = wait_jobs(address, [submit_job(address, dict(OPTIONS, input_path="f0.csv", output_dir="out",
+                                                              name="renamed"))["id"]])[0]
+        assert record["result"]["output"] == str(tmp_path / "out" / "renamed_cleaned.csv")
+
+        # only the user's own programs get in: no token, a browser Origin, a foreign Host or a form post
+        token = read_token(address)
+        assert oct(os.stat(token_path(address)).st_mode & 0o777) == "0o600"
+        assert oct(os.stat(address).st_mode & 0o777) == "0o600"
+        job = json.dumps(dict(OPTIONS, input_path="f0.csv", output_path=str(tmp_path / "evil.csv")))
+        for headers in ({"Content-Type": "application/json"},
+                        {"Content-Type": "application/json", TOKEN_HEADER: "wrong"},
+                        {"Content-Type": "text/plain", TOKEN_HEADER: token, "Origin": "http://evil.example"},
+                        {"Content-Type": "application/json", TOKEN_HEADER: token, "Host": "evil.example:8765"}):
+            assert raw_post(address, "/jobs", job, headers) == 403
+        assert raw_post(address, "/jobs", job, {"Content-Type": "text/plain", TOKEN_HEADER: token}) == 415
+        assert not (tmp_path / "evil.csv").exists() and service.summary()["done"] == 7
+
+        with pytest.raises(ServiceError, match="Unknown job options: bogus"):
+            submit_job(address, dict(input_path="f0.csv", output_path="x.csv", bogus=1))
+        service.capacity = 0
+        with pytest.raises(QueueFull):
+            submit_job(address, dict(OPTIONS, input_path="f0.csv", output_path="x.csv"), wait=0)
+    finally:
+        server.shutdown()
+        server.server_close()
+        service.close()
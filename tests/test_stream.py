@@ -0,0 +1,237 @@
+import logging
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import cleaner.counts
+from cleaner.core import clean_data
+from cleaner.dedup import RowHashSet
+from cleaner.formats import TableWriter
+from cleaner.sketches import DistinctSketch, QuantileSketch, rank_error
+from cleaner.stream import ColumnSummary
+
+
+def run_clean(input_file, output_file, **options):
+    config = dict(
+        fill_method="median",
+        normalize_method="zscore",
+        outlier_method="iqr",
+        encode_method="onehot",
+        drop_duplicates=True,
+        duplicate_cols=None,
+        strip_whitespace=True,
+        validate_cols=True,
+        report_path=None,
+        logger=logging.getLogger(),
+        normalize_cols=None,
+        encode_cols=None,
+        outlier_cols=None,
+    )
+    config.update(options)
+    clean_data(input_path=str(input_file), output_path=str(output_file), **config)
+    return pd.read_csv(output_file)
+
+
+def test_chunked_matches_in_memory(tmp_path):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "A": rng.normal(50, 10, 500).round(2),
+        "B": rng.integers(0, 100, 500).astype(float),
+        "Gender": rng.choice([" M", "F ", "M"], 500),
+    })
+    df.loc[::17, "A"] = None
+    df.loc[3, "B"] = 10_000
+    df = pd.concat([df, df.head(40)])  # duplicates spread across chunks
+    input_file = tmp_path / "input.csv"
+    df.to_csv(input_file, index=False)
+
+    expected = run_clean(input_file, tmp_path / "memory.csv")
+    result = run_clean(input_file, tmp_path / "chunked.csv", chunksize=64)
+
+    pd.testing.assert_frame_equal(result, expected, check_exact=False, rtol=1e-9)
+
+
+def test_chunked_validation_counts_text_distinct_values_up_to_a_cap(tmp_path):
+    from cleaner.stream import _count_distinct
+
+    df = pd.DataFrame({
+        "id": [f"u{i}" for i in range(100)],
+        "half": [f"h{i % 50}" for i in range(100)],  # exactly 0.5: not flagged
+        "near": [f"n{i % 51}" for i in range(100)],
+        "const": ["x"] * 100,
+        "empty": [None] * 100,
+    })
+    input_file = tmp_path / "input.csv"
+    df.to_csv(input_file, index=False)
+    reports = []
+    for name, chunksize in (("memory", None), ("chunked", 7)):
+        report = tmp_path / f"{name}.md"
+        run_clean(input_file, tmp_path / f"{name}.csv", fill_method=None, normalize_method=None,
+                  outlier_method=None, encode_method=None, drop_duplicates=False, strip_whitespace=False,
+                  report_path=str(report), chunksize=chunksize)
+        reports.append([line for line in report.read_text(encoding="utf-8").splitlines()
+                        if line.startswith("- `")])
+    assert reports[0] == reports[1]
+    assert "- `near` is high cardinality" in reports[1] and "- `half` is high cardinality" not in reports[1]
+
+    # past the cap only the count is kept
+    distinct = {}
+    for start in range(0, 100, 10):
+        _count_distinct(distinct, "id", df["id"][start:start + 10], 51, 1)
+    assert distinct["id"] == 60
+
+
+def test_column_summary_merges_chunks():
+    values = pd.Series([4.0, 1.0, None, 3.0, 3.0, 10.0, 2.0])
+    summary = ColumnSummary()
+    for chunk in (values[:3], values[3:5], values[5:]):
+        summary.update(chunk, exact=True)
+
+    assert summary.nulls == 1
+    assert summary.mean() == values.mean()
+    assert np.isclose(summary.std(), values.std())
+    assert summary.median() == values.median()
+    assert summary.quantile(0.25) == values.quantile(0.25)
+    assert summary.mode() == values.mode()[0]
+
+
+def test_column_summary_bounds_exact_counts_of_high_cardinality_floats(monkeypatch):
+    monkeypatch.setattr(cleaner.counts, "COUNTS_MEMORY_MB", 0.05)  # ~3300 distinct values in memory
+    monkeypatch.setattr(cleaner.counts, "BLOCK", 1_000)
+    rng = np.random.default_rng(4)
+    values = pd.Series(np.concatenate([rng.normal(size=40_000), np.full(50, 7.5)]))
+    values = values.sample(frac=1, random_state=0).reset_index(drop=True)
+    summary = ColumnSummary()
+    peak = 0
+    for start in range(0, len(values), 2_000):
+        summary.update(values[start:start + 2_000], exact=True)
+        peak = max(peak, summary.value_counts.memory_bytes)
+
+    assert summary.value_counts.spills > 0
+    assert peak <= summary.value_counts.memory_limit
+    assert summary.median() == values.median()
+    for q in (0.25, 0.75):
+        assert summary.quantile(q) == values.quantile(q)
+    assert summary.mode() == 7.5
+    assert summary.nunique() == values.nunique()
+    spill_dir = summary.value_counts._tmpdir
+    summary.close()
+    assert not os.path.exists(spill_dir)
+
+
+def test_sketches_merge_within_error_bounds():
+    rng = np.random.default_rng(3)
+    values = rng.lognormal(size=200_000)
+    merged = QuantileSketch(seed=0).update(values[:120_000]).merge(QuantileSketch(seed=1).update(values[120_000:]))
+    ordered = np.sort(values)
+    for q in (0.25, 0.5, 0.75):
+        assert abs(np.searchsorted(ordered, merged.quantile(q)) / len(values) - q) <= rank_error(200)
+    assert sum(map(len, merged.levels)) < 3 * 200
+    small = pd.Series([4.0, 1.0, None, 3.0])
+    assert QuantileSketch().update(small).quantile(0.25) == small.quantile(0.25)  # exact until it compacts
+
+    ids = pd.Series([f"user{i}" for i in range(60_000)])
+    distinct = DistinctSketch().update(ids[:40_000]).merge(DistinctSketch().update(ids[20_000:]))
+    assert abs(distinct.estimate() / 60_000 - 1) < 3 * distinct.standard_error
+
+
+def test_row_hash_set_spills_and_stays_exact():
+    rng = np.random.default_rng(2)
+    batches = [rng.integers(0, 5_000, 1_000).astype(np.uint64) for _ in range(12)]
+    hashes = RowHashSet(memory_mb=0.01, partitions=4)  # ~1300 hashes before each spill
+    seen = set()
+    for batch in batches:
+        expected = []
+        for value in batch.tolist():
+            expected.append(value in seen)
+            seen.add(value)
+        assert hashes.add(batch).tolist() == expected
+    assert hashes.spills > 0
+    assert len(hashes) == len(seen)
+    hashes.close()
+
+
+def test_chunked_run_deletes_dedup_spill_files_when_it_fails(tmp_path, monkeypatch):
+    input_file = tmp_path / "events.csv"
+    pd.DataFrame({"id": np.arange(3_000)}).to_csv(input_file, index=False)
+    spill_dir = tmp_path / "tmp"
+    spill_dir.mkdir()
+    monkeypatch.setattr(tempfile, "tempdir", str(spill_dir))
+    writes = []
+
+    def fail_late(writer, chunk):
+        writes.append(len(chunk))
+        if len(writes) == 20:
+            assert list(spill_dir.iterdir())  # the row hashes have spilled by now
+            raise OSError("disk full")
+    monkeypatch.setattr(TableWriter, "write", fail_late)
+
+    try:
+        run_clean(input_file, tmp_path / "out.csv", fill_method=None, normalize_method=None,
+                  outlier_method=None, encode_method=None, validate_cols=False, chunksize=100,
+                  dedup_memory_mb=0.001)
+    except OSError as e:  # checked while the traceback still holds the run's plan
+        assert str(e) == "disk full"
+        assert not list(spill_dir.iterdir())
+    else:
+        pytest.fail("the run did not fail")
+
+
+def test_chunked_dedup_writes_dropped_rows(tmp_path):
+    df = pd.DataFrame({"id": np.arange(300) % 120, "value": np.arange(300) % 120 * 1.5})
+    input_file = tmp_path / "events.csv"
+    df.to_csv(input_file, index=False)
+
+    result = run_clean(input_file, tmp_path / "out.csv", fill_method=None, normalize_method=None,
+                       outlier_method=None, encode_method=None, chunksize=50, dedup_memory_mb=0.0001,
+                       duplicates_path=str(tmp_path / "dropped.csv"))
+    dropped = pd.read_csv(tmp_path / "dropped.csv")
+
+    assert result["id"].tolist() == list(range(120))
+    assert len(dropped) == 180
+    pd.testing.assert_frame_equal(dropped, df[df.duplicated()].reset_index(drop=True))
+
+
+def test_incremental_appends_new_rows_and_rebuilds_on_edits(tmp_path):
+    from cleaner.incremental import load_state
+
+    rng = np.random.default_rng(2)
+    df = pd.DataFrame({"A": rng.normal(50, 10, 600).round(2), "Gender": rng.choice(["M", "F"], 600)})
+    df.loc[::11, "A"] = None
+    df = pd.concat([df, df.iloc[:50]], ignore_index=True)  # duplicates of rows from the first run
+    input_file, output_file = tmp_path / "input.csv", tmp_path / "out.csv"
+    options = dict(incremental=True, chunksize=100, validate_cols=False)
+
+    df.iloc[:400].to_csv(input_file, index=False)
+    first = run_clean(input_file, output_file, fit_plan=str(tmp_path / "plan.json"), **options)
+    with open(input_file, "a") as f:
+        f.write(df.iloc[400:].to_csv(index=False, header=False) + "1.0,M")  # unfinished last line
+    report_file = tmp_path / "report.md"
+    result = run_clean(input_file, output_file, report_path=str(report_file), **options)
+    state = load_state(str(output_file) + ".state")
+    assert state["rows"] == len(df) and len(state["hash_runs"]) == 2
+
+    # the report counts this run's rows in both shapes, and labels the totals
+    report = report_file.read_text(encoding="utf-8")
+    written = len(result) - len(first)
+    assert f"## 📐 Initial Dataset\n- Rows: {len(df) - 400}\n" in report
+    assert f"## 📉 Final Dataset Shape\n- Rows: {written}\n" in report
+    assert f"- Rows appended to the output: {written}\n" in report
+    assert f"- Rows in the output since the last full build: {len(result)}\n" in report
+
+    # new rows are cleaned with the first run's statistics and deduplicated against earlier rows
+    df.to_csv(tmp_path / "all.csv", index=False)
+    expected = run_clean(tmp_path / "all.csv", tmp_path / "expected.csv", chunksize=100, validate_cols=False,
+                         apply_plan=str(tmp_path / "plan.json"))
+    pd.testing.assert_frame_equal(result, expected)
+
+    # an edit before the resume offset refits on the whole file
+    with open(input_file, "r+b") as f:
+        f.seek(len("A,Gender\n"))
+        f.write(b"9")
+    run_clean(input_file, output_file, **options)
+    state = load_state(str(output_file) + ".state")
+    assert state["rows"] == len(df) and len(state["hash_runs"]) == 1
@@ -0,0 +1,26 @@
+import numpy as np
+import pandas as pd
+
+from cleaner.visuals import MAX_FLIERS, box_summary, histogram, top_counts
+
+
+def test_chart_aggregates_are_exact_and_bounded():
+    rng = np.random.default_rng(3)
+    values = pd.Series(np.concatenate([rng.normal(0, 1, 200_000), rng.normal(0, 30, 2_000)]), name="A")
+    values[::50] = None
+
+    box = box_summary(values)
+    clean = values.dropna()
+    q1, q3 = clean.quantile([0.25, 0.75])
+    assert (box["q1"], box["med"], box["q3"]) == (q1, clean.median(), q3)
+    assert box["whishi"] == clean[clean <= q3 + 1.5 * (q3 - q1)].max()
+    assert box["outliers"] == ((clean < q1 - 1.5 * (q3 - q1)) | (clean > q3 + 1.5 * (q3 - q1))).sum()
+    assert len(box["fliers"]) == MAX_FLIERS and box["fliers"][-1] == clean.max()
+
+    hist = histogram(values)
+    assert hist["counts"].sum() == len(clean) and len(hist["kde"][0]) == len(hist["kde"][1])
+    # the density curve is on the count scale: its area matches the histogram's
+    assert np.isclose(np.trapezoid(hist["kde"][1], hist["kde"][0]), len(clean) * np.diff(hist["edges"])[0], rtol=0.05)
+
+    counts = top_counts(pd.Series([f"c{i % 40}" for i in range(400)]), top=30)
+    assert len(counts) == 31 and counts["(other)"] == 100